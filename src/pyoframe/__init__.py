@@ -4,9 +4,21 @@ Also applies the monkey patch to the DataFrame libraries.
 """
 
 from pyoframe.monkey_patch import patch_dataframe_libraries
-from pyoframe.core import sum, sum_by, Set, Constraint, Expression, Variable
+from pyoframe.core import (
+    sum,
+    sum_by,
+    dot,
+    add,
+    quicksum,
+    ExpressionBuilder,
+    Set,
+    Constraint,
+    Expression,
+    Variable,
+)
 from pyoframe.constants import Config
 from pyoframe.model import Model
+from pyoframe.profiling import profile
 from pyoframe.constants import VType
 
 patch_dataframe_libraries()
@@ -14,6 +26,9 @@ patch_dataframe_libraries()
 __all__ = [
     "sum",
     "sum_by",
+    "dot",
+    "add",
+    "quicksum",
     "Variable",
     "Model",
     "Set",
@@ -21,4 +36,6 @@ __all__ = [
     "Config",
     "Constraint",
     "Expression",
+    "ExpressionBuilder",
+    "profile",
 ]
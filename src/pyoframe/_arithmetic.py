@@ -1,14 +1,16 @@
-from typing import TYPE_CHECKING, List, Optional
+from __future__ import annotations
+from typing import TYPE_CHECKING, List, Optional, Tuple
 import polars as pl
 
 from pyoframe.constants import (
-    COEF_KEY,
     RESERVED_COL_KEYS,
     VAR_KEY,
     UnmatchedStrategy,
     Config,
     PyoframeError,
 )
+from pyoframe.profiling import profiled
+from pyoframe.util import ElementMetadata, JoinEstimate
 
 if TYPE_CHECKING:  # pragma: no cover
     from pyoframe.core import Expression
@@ -29,8 +31,25 @@ def _add_expressions(*expressions: "Expression") -> "Expression":
 
 
 def _add_expressions_core(*expressions: "Expression") -> "Expression":
+    assert len(expressions) > 1, "Need at least two expressions to add together."
+
+    summation = _Summation(expressions[0])
+    for expr in expressions[1:]:
+        summation.add(expr)
+    return summation.to_expr()
+
+
+class _Summation:
+    """
+    Adds expressions together from left to right (i.e. `a + b + c` is computed as `(a + b) + c`).
+
+    Rather than concatenating and grouping the data after every addition, the data of each operand is kept in a
+    separate frame and the frames are only concatenated and grouped once, in `to_expr()`. Broadcasting (adding
+    dimensions) and dropping unmatched values are applied to each frame individually.
+    """
+
     # Mapping of how a sum of two expressions should propogate the unmatched strategy
-    propogatation_strategies = {
+    _propogatation_strategies = {
         (UnmatchedStrategy.DROP, UnmatchedStrategy.DROP): UnmatchedStrategy.DROP,
         (
             UnmatchedStrategy.UNSET,
@@ -42,54 +61,79 @@ def _add_expressions_core(*expressions: "Expression") -> "Expression":
         (UnmatchedStrategy.KEEP, UnmatchedStrategy.UNSET): UnmatchedStrategy.KEEP,
     }
 
-    assert len(expressions) > 1, "Need at least two expressions to add together."
-
-    dims = expressions[0].dimensions
-
-    if dims is None:
-        requires_join = False
-        dims = []
-    elif Config.disable_unmatched_checks:
-        requires_join = any(
-            expr.unmatched_strategy
-            not in (UnmatchedStrategy.KEEP, UnmatchedStrategy.UNSET)
-            for expr in expressions
-        )
-    else:
-        requires_join = any(
-            expr.unmatched_strategy != UnmatchedStrategy.KEEP for expr in expressions
-        )
-
-    has_dim_conflict = any(
-        sorted(dims) != sorted(expr.dimensions_unsafe) for expr in expressions[1:]
-    )
-
-    # If we cannot use .concat compute the sum in a pairwise manner
-    if len(expressions) > 2 and (has_dim_conflict or requires_join):
-        result = expressions[0]
-        for expr in expressions[1:]:
-            result = _add_expressions_core(result, expr)
-        return result
-
-    if has_dim_conflict:
-        assert len(expressions) == 2
-        expressions = (
-            _add_dimension(expressions[0], expressions[1]),
-            _add_dimension(expressions[1], expressions[0]),
-        )
-        assert sorted(expressions[0].dimensions_unsafe) == sorted(
-            expressions[1].dimensions_unsafe
+    def __init__(self, expr: "Expression"):
+        self._first = expr
+        self.frames: List[pl.DataFrame | pl.LazyFrame] = [expr._frame]
+        # The expression each frame originates from
+        self.sources: List["Expression"] = [expr]
+        # Whether all the frames are known to have the same indices, in the same order as their source
+        self.aligned = True
+        self.dimensions = expr.dimensions
+        self.unmatched_strategy = expr.unmatched_strategy
+        self.constant_only = expr._metadata.constant_only
+        self.index_token = expr._metadata.index_token
+        # The joins that created the frames (see Expression.explain)
+        self.joins: List[JoinEstimate] = list(expr._joins)
+
+    @property
+    def dimensions_unsafe(self) -> List[str]:
+        return [] if self.dimensions is None else self.dimensions
+
+    @property
+    def data(self) -> pl.DataFrame:
+        """The (ungrouped) data of all the frames. Only used to display errors."""
+        return _collect(pl.concat(_align_laziness(*self.frames), how="diagonal"))
+
+    def _indices(self, dims=None, materialize=False) -> pl.DataFrame | pl.LazyFrame:
+        if materialize:
+            # Validating unmatched values requires the data so we collect (possibly lazy) frames once such that
+            # the final concatenation doesn't recompute them.
+            self.frames = [_collect(frame) for frame in self.frames]
+        if dims is None:
+            dims = self.dimensions_unsafe
+        return pl.concat(
+            _align_laziness(*(frame.select(dims) for frame in self.frames))
+        ).unique(maintain_order=True)
+
+    def add(self, expr: "Expression"):
+        other = _Summation(expr)
+        # A sum of constants is constant. Otherwise, we can't tell since the variables could be dropped as unmatched.
+        self.constant_only = (
+            True if self.constant_only and other.constant_only else None
         )
 
-    dims = expressions[0].dimensions_unsafe
-    # Check no dims conflict
-    assert all(
-        sorted(dims) == sorted(expr.dimensions_unsafe) for expr in expressions[1:]
-    )
-    if requires_join:
-        assert len(expressions) == 2
+        dims = self.dimensions
+        strategies = (self.unmatched_strategy, other.unmatched_strategy)
+        if dims is None:
+            requires_join = False
+        elif Config.disable_unmatched_checks:
+            requires_join = any(
+                strat not in (UnmatchedStrategy.KEEP, UnmatchedStrategy.UNSET)
+                for strat in strategies
+            )
+        else:
+            requires_join = any(strat != UnmatchedStrategy.KEEP for strat in strategies)
+
+        if sorted(self.dimensions_unsafe) != sorted(other.dimensions_unsafe):
+            self_dims, self_indices = self.dimensions, self._indices()
+            self._add_dimension(other.dimensions, other._indices())
+            other._add_dimension(self_dims, self_indices)
+            assert sorted(self.dimensions_unsafe) == sorted(other.dimensions_unsafe)
+            self.aligned = other.aligned = False
+            self.index_token = other.index_token = None
+
+        if not requires_join:
+            self.frames = self.frames + other.frames
+            self.sources = self.sources + other.sources
+            self.joins = self.joins + other.joins
+            self.aligned = False
+            if self.index_token != other.index_token:
+                self.index_token = None
+            return
+
+        dims = self.dimensions_unsafe
         assert dims != []
-        left, right = expressions[0], expressions[1]
+        left, right = self, other
 
         # Order so that drop always comes before keep, and keep always comes before default
         if (left.unmatched_strategy, right.unmatched_strategy) in (
@@ -99,25 +143,66 @@ def _add_expressions_core(*expressions: "Expression") -> "Expression":
         ):
             left, right = right, left
 
-        def get_indices(expr):
-            return expr.data.select(dims).unique(maintain_order=True)
-
-        left_data, right_data = left.data, right.data
-
         strat = (left.unmatched_strategy, right.unmatched_strategy)
+        propogate_strat = self._propogatation_strategies[strat]  # type: ignore
 
-        propogate_strat = propogatation_strategies[strat]  # type: ignore
+        same_indices = left.index_token is not None and (
+            left.index_token == right.index_token
+        )
+        if same_indices:
+            # Both sides derive from the same indices in the same way so there are no unmatched values
+            pass
+        elif strat == (UnmatchedStrategy.UNSET, UnmatchedStrategy.UNSET) and (
+            left._has_same_sorted_indices(right, dims)
+            or left._has_same_indices(right, dims)
+        ):
+            # No unmatched values (checked without the joins below)
+            pass
+        else:
+            self._match_indices(left, right, strat, dims)
+
+        # A validated sum (no unmatched values) leaves the frames untouched and guarantees they have the same indices
+        self.aligned = (
+            left.aligned
+            and right.aligned
+            and strat == (UnmatchedStrategy.UNSET, UnmatchedStrategy.UNSET)
+        )
+        self.frames = left.frames + right.frames
+        self.sources = left.sources + right.sources
+        self.joins = left.joins + right.joins
+        self.unmatched_strategy = propogate_strat
+        if same_indices:
+            self.index_token = left.index_token
+        elif strat == (UnmatchedStrategy.UNSET, UnmatchedStrategy.UNSET):
+            # Validated to have the same indices
+            self.index_token = left.index_token or right.index_token
+        elif strat in (
+            (UnmatchedStrategy.DROP, UnmatchedStrategy.KEEP),
+            (UnmatchedStrategy.DROP, UnmatchedStrategy.UNSET),
+        ):
+            # The left side was reindexed to the right side
+            self.index_token = right.index_token
+        elif strat == (UnmatchedStrategy.KEEP, UnmatchedStrategy.UNSET):
+            # The right side's indices are a subset of the left side's
+            self.index_token = left.index_token
+        else:
+            self.index_token = None
+
+    @staticmethod
+    def _match_indices(left: "_Summation", right: "_Summation", strat, dims: List[str]):
+        """Drops or checks for unmatched values according to the unmatched strategies (`strat`) of both sides."""
+        materialize = UnmatchedStrategy.UNSET in strat
+        left_indices = left._indices(dims, materialize)
+        right_indices = right._indices(dims, materialize)
 
         if strat == (UnmatchedStrategy.DROP, UnmatchedStrategy.DROP):
-            left_data = left.data.join(get_indices(right), how="inner", on=dims)
-            right_data = right.data.join(get_indices(left), how="inner", on=dims)
+            left._join_indices(right_indices, how="inner")
+            right._join_indices(left_indices, how="inner")
         elif strat == (UnmatchedStrategy.UNSET, UnmatchedStrategy.UNSET):
             assert (
                 not Config.disable_unmatched_checks
             ), "This code should not be reached when unmatched checks are disabled."
-            outer_join = get_indices(left).join(
-                get_indices(right), how="outer", on=dims
-            )
+            outer_join = left_indices.join(right_indices, how="outer", on=dims)
             if outer_join.get_column(dims[0]).null_count() > 0:
                 raise PyoframeError(
                     "Dataframe has unmatched values. If this is intentional, use .drop_unmatched() or .keep_unmatched()\n"
@@ -133,19 +218,20 @@ def _add_expressions_core(*expressions: "Expression") -> "Expression":
                     )
                 )
         elif strat == (UnmatchedStrategy.DROP, UnmatchedStrategy.KEEP):
-            left_data = get_indices(right).join(left.data, how="left", on=dims)
+            left._reindex(right_indices)
         elif strat == (UnmatchedStrategy.DROP, UnmatchedStrategy.UNSET):
-            left_data = get_indices(right).join(left.data, how="left", on=dims)
-            if left_data.get_column(COEF_KEY).null_count() > 0:
+            unmatched = right_indices.join(left_indices, how="anti", on=dims)
+            if len(unmatched) > 0:
                 raise PyoframeError(
                     "Dataframe has unmatched values. If this is intentional, use .drop_unmatched() or .keep_unmatched()\n"
-                    + str(left_data.filter(left_data.get_column(COEF_KEY).is_null()))
+                    + str(unmatched)
                 )
+            left._reindex(right_indices)
         elif strat == (UnmatchedStrategy.KEEP, UnmatchedStrategy.UNSET):
             assert (
                 not Config.disable_unmatched_checks
             ), "This code should not be reached when unmatched checks are disabled."
-            unmatched = right.data.join(get_indices(left), how="anti", on=dims)
+            unmatched = right.data.join(left_indices, how="anti", on=dims)
             if len(unmatched) > 0:
                 raise PyoframeError(
                     "Dataframe has unmatched values. If this is intentional, use .drop_unmatched() or .keep_unmatched()\n"
@@ -154,63 +240,343 @@ def _add_expressions_core(*expressions: "Expression") -> "Expression":
         else:  # pragma: no cover
             assert False, "This code should've never been reached!"
 
-        expr_data = [left_data, right_data]
-    else:
-        propogate_strat = expressions[0].unmatched_strategy
-        expr_data = [expr.data for expr in expressions]
+    def _sorted_indices(self, dims: List[str]) -> Optional[pl.DataFrame]:
+        """
+        Returns the indices (in order) if all the frames are known to have the same sorted indices.
+        Otherwise, returns None. Unlike _indices(), this doesn't require hashing the data.
+        """
+        if not self.aligned or not all(
+            source._is_sorted_by(dims) for source in self.sources
+        ):
+            return None
+        frame = self.frames[0]
+        if isinstance(frame, pl.LazyFrame):
+            return None
+        return frame.filter(_index_boundaries(dims)).select(dims)
+
+    def _has_same_sorted_indices(self, other: "_Summation", dims: List[str]) -> bool:
+        indices = self._sorted_indices(dims)
+        if indices is None:
+            return False
+        other_indices = other._sorted_indices(dims)
+        return other_indices is not None and indices.equals(other_indices)
+
+    def _has_same_indices(self, other: "_Summation", dims: List[str]) -> bool:
+        """
+        Returns True if both sides have the same set of indices. Comparing the hashes of the indices quickly rules
+        out sides with different indices (these are then joined to find the unmatched values). Since distinct
+        indices may have the same hash, matching hashes are confirmed by comparing the sorted indices.
+        """
+        if not self._index_hashes(dims).equals(other._index_hashes(dims)):
+            return False
+        return self._distinct_indices(dims).equals(other._distinct_indices(dims))
+
+    def _distinct_indices(self, dims: List[str]) -> pl.DataFrame:
+        """Returns the distinct indices, sorted."""
+        indices = pl.concat([_collect(frame).select(dims) for frame in self.frames])
+        return indices.unique().sort(dims)
+
+    def _index_hashes(self, dims: List[str]) -> pl.Series:
+        """Returns the distinct hashes of the indices, sorted (see _has_same_indices)."""
+        # Like _indices(materialize=True), collect once such that the final concatenation doesn't recompute the frames
+        self.frames = [_collect(frame) for frame in self.frames]
+        key = pl.struct(dims) if len(dims) > 1 else pl.col(dims[0])
+        hashes = pl.concat([frame.select(key.hash(seed=0)) for frame in self.frames])
+        return hashes.to_series().sort().unique()
+
+    def _join_indices(self, indices: pl.DataFrame | pl.LazyFrame, how, on=None):
+        if on is None:
+            on = self.dimensions_unsafe
+        *frames, indices = _align_laziness(*self.frames, indices)
+        if how == "cross":
+            self.frames = [frame.join(indices, how="cross") for frame in frames]
+        else:
+            self.frames = [frame.join(indices, on=on, how=how) for frame in frames]
+
+    def _reindex(self, indices: pl.DataFrame | pl.LazyFrame):
+        """Keeps only the rows that match the indices (in the order of the indices)."""
+        indices, *frames = _align_laziness(indices, *self.frames)
+        self.frames = [
+            indices.join(frame, on=self.dimensions_unsafe, how="inner")
+            for frame in frames
+        ]
+
+    @profiled
+    def _add_dimension(
+        self,
+        target_dims: Optional[List[str]],
+        target_indices: pl.DataFrame | pl.LazyFrame,
+    ):
+        if target_dims is None:
+            return
+        dims = self.dimensions
+        if dims is None:
+            dims_in_common = []
+            missing_dims = target_dims
+        else:
+            dims_in_common = [dim for dim in dims if dim in target_dims]
+            missing_dims = [dim for dim in target_dims if dim not in dims]
+
+        # We're already at the size of our target
+        if not missing_dims:
+            return
+
+        if not set(missing_dims) <= set(self._first.allowed_new_dims):
+            raise PyoframeError(
+                f"Dataframe has missing dimensions {missing_dims}. If this is intentional, use .add_dim()\n{self.data}"
+            )
 
-    # Sort columns to allow for concat
-    expr_data = [e.select(sorted(e.columns)) for e in expr_data]
+        how = (
+            "cross"
+            if not dims_in_common
+            else (
+                "inner" if self.unmatched_strategy == UnmatchedStrategy.DROP else "left"
+            )
+        )
+        for frame in self.frames:
+            self.joins.append(
+                _estimate_join(
+                    "Adding dimensions", frame, target_indices, how, dims_in_common
+                )
+            )
 
-    data = pl.concat(expr_data, how="vertical_relaxed")
-    data = data.group_by(dims + [VAR_KEY], maintain_order=True).sum()
+        if not dims_in_common:
+            self._join_indices(target_indices, how="cross")
+        # If drop, we just do an inner join to get into the shape of the other
+        elif self.unmatched_strategy == UnmatchedStrategy.DROP:
+            self._join_indices(target_indices, how="inner", on=dims_in_common)
+        else:
+            self._join_indices(target_indices, how="left", on=dims_in_common)
+            # Checking for unmatched values requires the data
+            self.frames = [_collect(frame) for frame in self.frames]
+            if any(
+                frame.get_column(missing_dims[0]).null_count() > 0
+                for frame in self.frames
+            ):
+                raise PyoframeError(
+                    f"Cannot add dimension {missing_dims} since it contains unmatched values. If this is intentional, consider using .drop_unmatched()"
+                )
+
+        self.dimensions = self.dimensions_unsafe + missing_dims
+        # Like Expression._new(), broadcasting doesn't propogate the unmatched strategy
+        self.unmatched_strategy = UnmatchedStrategy.UNSET
+
+    def to_expr(self) -> "Expression":
+        dims = self.dimensions_unsafe
+        frames = self.frames
+        # If all the frames have the same sorted indices, the n-th index of every frame is the same.
+        # Hence, terms can be identified by their position in the frame rather than by hashing every dimension.
+        keyed = (
+            len(frames) > 1
+            and bool(dims)
+            and self.aligned
+            and all(source._is_sorted_by(dims) for source in self.sources)
+        )
+        if keyed:
+            frames = [_with_term_key(frame, dims) for frame in frames]
+        # Sort columns to allow for concat
+        frames = [frame.select(sorted(frame.columns)) for frame in frames]
+        data = pl.concat(_align_laziness(*frames), how="vertical_relaxed")
+        data = _sum_terms(data, dims, keyed)
+
+        new_expr = self._first._new(
+            data,
+            ElementMetadata(
+                None if self.dimensions is None else tuple(self.dimensions),
+                constant_only=self.constant_only,
+                sorted_by=tuple(dims) if keyed else None,
+                index_token=self.index_token,
+            ),
+        )
+        new_expr.unmatched_strategy = self.unmatched_strategy
+        new_expr._joins = tuple(self.joins)
+        return new_expr
+
+
+# Temporary column holding the key of each term (see _with_term_key)
+TERM_KEY = "__term"
+
+
+def _sorted_prefix(df: pl.DataFrame, dims: List[str]) -> Tuple[str, ...]:
+    """
+    Returns the longest prefix of `dims` by which the DataFrame is sorted (ascending).
+    Only compares neighbouring rows (a single linear pass) and hence is much cheaper than hashing or sorting the data.
+
+    Examples:
+        >>> import polars as pl
+        >>> df = pl.DataFrame({"a": [1, 1, 2, 2], "b": [1, 1, 1, 2], "c": [2, 1, 1, 1]})
+        >>> _sorted_prefix(df, ["a", "b", "c"])
+        ('a', 'b')
+        >>> _sorted_prefix(df, ["c", "a"])
+        ()
+    """
+    if df.height <= 1:
+        return tuple(dims)
+    checks = []
+    ties = None
+    for i, dim in enumerate(dims):
+        col = pl.col(dim)
+        in_order = col >= col.shift(1)
+        if ties is not None:
+            in_order = in_order | ~ties
+        checks.append(in_order.slice(1).fill_null(False).all().alias(str(i)))
+        same = col == col.shift(1)
+        ties = same if ties is None else ties & same
+    prefix = []
+    for dim, in_order in zip(dims, df.select(checks).row(0)):
+        if not in_order:
+            break
+        prefix.append(dim)
+    return tuple(prefix)
+
+
+def _index_boundaries(dims: List[str]) -> pl.Expr:
+    """
+    Evaluates to True for the first row of every index. Only valid if the rows of each index are contiguous (e.g. sorted).
+    """
+    return pl.any_horizontal(
+        [pl.col(dim) != pl.col(dim).shift(1) for dim in dims]
+    ).fill_null(True)
+
+
+def _with_term_key(
+    frame: pl.DataFrame | pl.LazyFrame, dims: List[str]
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Adds a single integer column (TERM_KEY) that identifies the term (index and variable) of each row such that
+    terms can be grouped without hashing every dimension. Only valid if the rows of each index are contiguous (e.g. sorted).
+    """
+    index_id = (pl.struct(dims) if len(dims) > 1 else pl.col(dims[0])).rle_id()
+    return frame.with_columns(
+        (index_id.cast(pl.UInt64) * (1 << 32) + pl.col(VAR_KEY)).alias(TERM_KEY)
+    )
+
+
+def _sum_terms(
+    frame: pl.DataFrame | pl.LazyFrame, dims: List[str], keyed: bool = False
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Combines the rows of identical terms, i.e. `frame.group_by(dims + [VAR_KEY], maintain_order=True).sum()`.
+    If `keyed`, the frame has a TERM_KEY column (see _with_term_key) which is grouped on instead
+    and the result is sorted by index (the terms of an index remain in order of appearance).
+    """
+    keys = dims + [VAR_KEY]
+    if not keyed:
+        return frame.group_by(keys, maintain_order=True).sum()
+    return (
+        frame.group_by(TERM_KEY, maintain_order=True)
+        .agg(pl.col(keys).first(), pl.exclude(keys + [TERM_KEY]).sum())
+        .sort(pl.col(TERM_KEY) // (1 << 32), maintain_order=True)
+        .drop(TERM_KEY)
+    )
 
-    new_expr = expressions[0]._new(data)
-    new_expr.unmatched_strategy = propogate_strat
 
-    return new_expr
+def _can_merge_join(left: "Expression", right: "Expression", on: List[str]) -> bool:
+    """
+    Returns True if a join can use polars' sorted merge join instead of a hash join.
+    This is the case when joining on a single numeric (or temporal) key by which both sides are sorted.
+    """
+    if len(on) != 1 or not (left._is_sorted_by(on) and right._is_sorted_by(on)):
+        return False
+    dtype = left.data.schema[on[0]]
+    return dtype.is_numeric() or dtype.is_temporal()
+
+
+def _estimate_join(
+    operation: str,
+    left: pl.DataFrame | pl.LazyFrame,
+    right: pl.DataFrame | pl.LazyFrame,
+    how: str,
+    on: List[str],
+    right_unique: bool = False,
+    left_rows: Optional[int] = None,
+    right_rows: Optional[int] = None,
+) -> JoinEstimate:
+    """
+    Returns an upper bound of the number of rows created by joining `left` and `right`, and raises an error
+    if it exceeds `Config.max_join_rows`.
 
+    The estimate doesn't run any query: the number of rows is read from eager frames or given by the caller
+    (`left_rows` and `right_rows`, e.g. from the elements' metadata), and a key may repeat on the right as often as the
+    right has rows unless the keys are known to be unique (`right_unique`). Only if `Config.max_join_rows` is set
+    are unknown numbers of rows counted and the repetitions of the keys on the right computed, which runs (part of)
+    the query of lazy frames, such that the limit is checked against a tight bound.
 
-def _add_dimension(self: "Expression", target: "Expression") -> "Expression":
-    target_dims = target.dimensions
-    if target_dims is None:
-        return self
-    dims = self.dimensions
-    if dims is None:
-        dims_in_common = []
-        missing_dims = target_dims
+    Examples:
+        >>> left = pl.DataFrame({"t": [1, 2, 3]})
+        >>> right = pl.DataFrame({"t": [1, 1, 2], "city": ["A", "B", "A"]})
+        >>> str(_estimate_join("example", left, right, "cross", []))
+        'example: cross join of 3 x 3 rows -> at most 9 rows'
+        >>> str(_estimate_join("example", left, right, "inner", ["t"]))
+        "example: inner join on ['t'] of 3 x 3 rows -> at most 9 rows"
+        >>> str(_estimate_join("example", left.lazy(), right.lazy(), "inner", ["t"], left_rows=3))
+        "example: inner join on ['t'] of 3 x ? rows -> at most ? rows"
+        >>> Config.max_join_rows = 8
+        >>> str(_estimate_join("example", left, right, "inner", ["t"]))
+        "example: inner join on ['t'] of 3 x 3 rows -> at most 6 rows"
+        >>> _estimate_join("example", left, right, "cross", [])
+        Traceback (most recent call last):
+        ...
+        pyoframe.constants.PyoframeError: example would create up to 9 rows (cross join of 3 x 3 rows), more than Config.max_join_rows (8). Check that the operands share the intended dimensions (e.g. that no dimension is missing).
+        >>> Config.max_join_rows = None
+    """
+    count = Config.max_join_rows is not None
+    left_rows = _count_rows(left, left_rows, count)
+    right_rows = _count_rows(right, right_rows, count)
+    if how == "cross":
+        repeats = right_rows
+    elif right_unique:
+        repeats = 1
+    elif count:
+        repeats = (
+            _collect(right.group_by(on).len().select(pl.col("len").max())).item() or 0
+        )
     else:
-        dims_in_common = [dim for dim in dims if dim in target_dims]
-        missing_dims = [dim for dim in target_dims if dim not in dims]
+        repeats = right_rows
 
-    # We're already at the size of our target
-    if not missing_dims:
-        return self
+    if left_rows is None or repeats is None:
+        rows = None
+    elif how == "left":
+        # Rows without a match are kept
+        rows = left_rows * max(repeats, 1)
+    else:
+        rows = left_rows * repeats
 
-    if not set(missing_dims) <= set(self.allowed_new_dims):
+    estimate = JoinEstimate(operation, how, tuple(on), left_rows, right_rows, rows)
+    if count and rows is not None and rows > Config.max_join_rows:
         raise PyoframeError(
-            f"Dataframe has missing dimensions {missing_dims}. If this is intentional, use .add_dim()\n{self.data}"
+            f"{operation} would create up to {rows:,} rows ({how} join{f' on {on}' if on else ''} of "
+            f"{left_rows:,} x {right_rows:,} rows), more than Config.max_join_rows ({Config.max_join_rows:,}). "
+            "Check that the operands share the intended dimensions (e.g. that no dimension is missing)."
         )
+    return estimate
 
-    target_data = target.data.select(target_dims).unique(maintain_order=True)
 
-    if not dims_in_common:
-        return self._new(self.data.join(target_data, how="cross"))
+def _count_rows(
+    frame: pl.DataFrame | pl.LazyFrame, known: Optional[int], count_lazy: bool
+) -> Optional[int]:
+    if isinstance(frame, pl.DataFrame):
+        return frame.height
+    if known is not None or not count_lazy:
+        return known
+    return frame.select(pl.len()).collect().item()
 
-    # If drop, we just do an inner join to get into the shape of the other
-    if self.unmatched_strategy == UnmatchedStrategy.DROP:
-        return self._new(self.data.join(target_data, on=dims_in_common, how="inner"))
 
-    result = self.data.join(target_data, on=dims_in_common, how="left")
-    right_has_missing = result.get_column(missing_dims[0]).null_count() > 0
-    if right_has_missing:
-        raise PyoframeError(
-            f"Cannot add dimension {missing_dims} since it contains unmatched values. If this is intentional, consider using .drop_unmatched()"
-        )
-    return self._new(result)
+def _collect(frame: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame:
+    return frame.collect() if isinstance(frame, pl.LazyFrame) else frame
+
+
+def _align_laziness(*frames: pl.DataFrame | pl.LazyFrame) -> List:
+    """
+    Returns the frames as LazyFrames if any of them is lazy (lazy and eager frames can't be joined or concatenated).
+    Otherwise, the frames are returned unchanged.
+    """
+    if any(isinstance(frame, pl.LazyFrame) for frame in frames):
+        return [frame.lazy() for frame in frames]
+    return list(frames)
 
 
-def _get_dimensions(df: pl.DataFrame) -> Optional[List[str]]:
+def _get_dimensions(df: pl.DataFrame | pl.LazyFrame) -> Optional[List[str]]:
     """
     Returns the dimensions of the DataFrame. Reserved columns do not count as dimensions.
     If there are no dimensions, returns None to force caller to handle this special case.
@@ -12,7 +12,6 @@ import typing
 from typing import Literal, Optional, Union
 import polars as pl
 
-
 COEF_KEY = "__coeff"
 VAR_KEY = "__variable_id"
 CONSTRAINT_KEY = "__constraint_id"
@@ -53,6 +52,26 @@ class Config(metaclass=_ConfigMeta):
     # Number of elements to show when printing a set to the console (additional elements are replaced with ...)
     print_max_set_elements: int = 50
     enable_is_duplicated_expression_safety_check: bool = False
+    # If True, expressions hold a polars LazyFrame (query plan) that is only collected when the data is needed
+    # (e.g. when a constraint is created, when .data is accessed or when the model is written to a file).
+    lazy_expressions: bool = False
+    # If True, string dimensions (e.g. names of plants, nodes or technologies) are encoded as categoricals backed by
+    # polars' global string cache such that joins and group bys operate on integer codes rather than strings.
+    # Dimensions are decoded back to strings when printing, naming variables and constraints, and returning results.
+    # Note that encoding a dimension enables polars' global string cache (pl.enable_string_cache()) for the rest of the
+    # process, which also applies to categoricals created outside of pyoframe.
+    encode_string_dimensions: bool = False
+    # The dtype of the coefficients of expressions and constraints. pl.Float32 halves the memory used by the
+    # coefficients but only keeps about 7 significant digits, so it should only be used when the data allows it.
+    coefficient_dtype: pl.PolarsDataType = pl.Float64
+    # If set (e.g. to pl.Int16 or pl.Int32), integer dimensions (e.g. years or hours) are cast to this dtype when
+    # sets and expressions are created from user data. All integer dimensions share the same dtype such that joins
+    # never need to cast. Values that do not fit raise an error. Results are returned with Int64 dimensions.
+    integer_dimension_dtype: Optional[pl.PolarsDataType] = None
+    # If set, operations raise an error before running a join (e.g. when multiplying or broadcasting expressions)
+    # that could create more rows than this, which typically happens when a dimension is forgotten.
+    # Estimating the size of a join requires counting the rows of lazy expressions (see Expression.explain).
+    max_join_rows: Optional[int] = None
 
     @classmethod
     def reset_defaults(cls):
@@ -1,21 +1,39 @@
 from __future__ import annotations
 from typing import (
+    Callable,
+    Hashable,
     Iterable,
+    Iterator,
     List,
     Mapping,
     Protocol,
     Sequence,
+    Tuple,
     overload,
     Union,
     Optional,
     TYPE_CHECKING,
 )
 from abc import ABC, abstractmethod
+from dataclasses import replace
+from datetime import timedelta
+from functools import partial
 
 import pandas as pd
 import polars as pl
 
-from pyoframe._arithmetic import _add_expressions, _get_dimensions
+from pyoframe._arithmetic import (
+    TERM_KEY,
+    _add_expressions,
+    _align_laziness,
+    _can_merge_join,
+    _collect,
+    _estimate_join,
+    _get_dimensions,
+    _index_boundaries,
+    _sum_terms,
+    _with_term_key,
+)
 from pyoframe.constants import (
     COEF_KEY,
     CONST_TERM,
@@ -41,9 +59,15 @@ from pyoframe.util import (
     parse_inputs_as_iterable,
     unwrap_single_values,
     dataframe_to_tupled_list,
+    derive_index_token,
+    ElementMetadata,
+    JoinEstimate,
+    apply_dimension_dtypes,
+    restore_dimension_dtypes,
     FuncArgs,
 )
 
+from pyoframe.profiling import profiled
 from pyoframe.model_element import (
     ModelElement,
     ModelElementWithId,
@@ -95,6 +119,9 @@ class SupportsMath(ABC, SupportsToExpr):
     __mul__ = _forward_to_expression("__mul__")
     sum = _forward_to_expression("sum")
     map = _forward_to_expression("map")
+    weighted_sum = _forward_to_expression("weighted_sum")
+    rolling_sum = _forward_to_expression("rolling_sum")
+    shift = _forward_to_expression("shift")
 
     def __neg__(self):
         res = self.to_expr() * -1
@@ -166,18 +193,75 @@ SetTypes = Union[
 ]
 
 
+def _cross_product(factors: List[pl.DataFrame]) -> pl.DataFrame | pl.LazyFrame:
+    """Returns the Cartesian product of the frames (lazily if there is more than one frame)."""
+    product = factors[0]
+    if len(factors) > 1:
+        product = product.lazy()
+        for df in factors[1:]:
+            product = product.join(df.lazy(), how="cross")
+    return product
+
+
+class _Identity:
+    """Wraps an object such that it's hashed and compared by identity (keeping the object alive)."""
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: object) -> None:
+        self.obj = obj
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Identity) and other.obj is self.obj
+
+    def __hash__(self) -> int:
+        return id(self.obj)
+
+
+def _factors_token(factors: List[pl.DataFrame]) -> Hashable:
+    """
+    Returns the index token (see `ElementMetadata.index_token`) of the Cartesian product of the factors.
+
+    The token is derived from the identity of the factors (not their content) such that only sets built from
+    the same factors (e.g. variables created over the same Set) share a token.
+    """
+    return frozenset(_Identity(df) for df in factors)
+
+
 class Set(ModelElement, SupportsMath, SupportPolarsMethodMixin):
     def __init__(self, *data: SetTypes | Iterable[SetTypes], **named_data):
         data_list = list(data)
         for name, set in named_data.items():
             data_list.append({name: set})
-        df = self._parse_acceptable_sets(*data_list)
-        if not df.is_empty() and df.is_duplicated().any():
-            raise ValueError("Duplicate rows found in input data.")
-        super().__init__(df)
+        # The set is stored as the factors of a Cartesian product and only expanded when its rows are needed
+        self._factors = self._parse_factors(*data_list)
+        # The product of sets without duplicates has no duplicates
+        if not any(df.is_empty() for df in self._factors):
+            for df in self._factors:
+                if df.is_duplicated().any():
+                    raise ValueError("Duplicate rows found in input data.")
+        super().__init__(_cross_product(self._factors))
+        # Unlike lazy expressions, the product is materialized on first use (see ModelElement._frame)
+        self._lazy = False
+        height = 1
+        for df in self._factors:
+            height *= df.height
+        self._update_metadata(
+            unique=True,
+            height=height,
+            size=height,
+            # If any factor is empty so is the product, hence so is every dimension
+            shape={
+                dim: df.get_column(dim).n_unique() if height else 0
+                for df in self._factors
+                for dim in df.columns
+            },
+            index_token=_factors_token(self._factors),
+        )
 
-    def _new(self, data: pl.DataFrame):
+    def _new(self, data: pl.DataFrame, metadata: Optional[ElementMetadata] = None):
         s = Set(data)
+        s._inherit_metadata(metadata)
         s._model = self._model
         # Copy over the unmatched strategy on operations like .rename(), .with_columns(), etc.
         s.unmatched_strategy = self.unmatched_strategy
@@ -211,19 +295,26 @@ class Set(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         │ 3    ┆ b    │
         └──────┴──────┘
         """
+        return _collect(_cross_product(Set._parse_factors(*over)))
+
+    @staticmethod
+    def _parse_factors(*over: SetTypes | Iterable[SetTypes]) -> List[pl.DataFrame]:
+        """Converts the sets to the factors of their Cartesian product (reusing the factors of any Set)."""
         assert len(over) > 0, "At least one set must be provided."
         over_iter: Iterable[SetTypes] = parse_inputs_as_iterable(*over)
 
-        over_frames: List[pl.DataFrame] = [Set._set_to_polars(set) for set in over_iter]
+        factors: List[pl.DataFrame] = []
+        for over_set in over_iter:
+            if isinstance(over_set, Set):
+                factors.extend(over_set._factors)
+            else:
+                factors.append(Set._set_to_polars(over_set))
 
-        over_merged = over_frames[0]
-
-        for df in over_frames[1:]:
-            assert (
-                set(over_merged.columns) & set(df.columns) == set()
-            ), "All coordinates must have unique column names."
-            over_merged = over_merged.join(df, how="cross")
-        return over_merged
+        columns = [col for df in factors for col in df.columns]
+        assert len(columns) == len(
+            set(columns)
+        ), "All coordinates must have unique column names."
+        return factors
 
     def to_expr(self) -> Expression:
         return Expression(
@@ -235,9 +326,9 @@ class Set(ModelElement, SupportsMath, SupportPolarsMethodMixin):
     def __mul__(self, other):
         if isinstance(other, Set):
             assert (
-                set(self.data.columns) & set(other.data.columns) == set()
+                set(self.dimensions_unsafe) & set(other.dimensions_unsafe) == set()
             ), "Cannot multiply two sets with columns in common."
-            return Set(self.data, other.data)
+            return Set(self, other)
         return super().__mul__(other)
 
     def __add__(self, other):
@@ -257,7 +348,7 @@ class Set(ModelElement, SupportsMath, SupportPolarsMethodMixin):
 
     def __repr__(self):
         return (
-            get_obj_repr(self, ("name",), size=self.data.height, dimensions=self.shape)
+            get_obj_repr(self, ("name",), size=self._height, dimensions=self.shape)
             + "\n"
             + dataframe_to_tupled_list(
                 self.data, num_max_elements=Config.print_max_set_elements
@@ -296,13 +387,13 @@ class Set(ModelElement, SupportsMath, SupportPolarsMethodMixin):
                     f"Cannot use reserved column names {reserved_key} as dimensions."
                 )
 
-        return df
+        return apply_dimension_dtypes(df)
 
 
 class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
     """A linear expression."""
 
-    def __init__(self, data: pl.DataFrame):
+    def __init__(self, data: pl.DataFrame | pl.LazyFrame):
         """
         >>> import pandas as pd
         >>> from pyoframe import Variable, Model
@@ -323,8 +414,14 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         assert VAR_KEY in data.columns, "Missing variable column."
         assert COEF_KEY in data.columns, "Missing coefficient column."
 
-        # Sanity check no duplicates indices
-        if Config.enable_is_duplicated_expression_safety_check:
+        height = data.height if isinstance(data, pl.DataFrame) else None
+        if Config.lazy_expressions:
+            data = data.lazy()
+
+        # Sanity check no duplicates indices (skipped for lazy expressions since it would require collecting the data)
+        if Config.enable_is_duplicated_expression_safety_check and isinstance(
+            data, pl.DataFrame
+        ):
             duplicated_mask = data.drop(COEF_KEY).is_duplicated()
             # In theory this should never happen unless there's a bug in the library
             if duplicated_mask.any():  # pragma: no cover
@@ -334,6 +431,10 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
                 )
 
         super().__init__(data)
+        if height is not None:
+            self._update_metadata(height=height)
+        # The joins run by the operations that created the expression (see explain())
+        self._joins: Tuple[JoinEstimate, ...] = ()
 
     # Might add this in later
     # @classmethod
@@ -349,6 +450,7 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
     #         )
     #     )
 
+    @profiled
     def sum(self, over: Union[str, Iterable[str]]):
         """
         Examples:
@@ -378,12 +480,136 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         assert set(over) <= set(dims), f"Cannot sum over {over} as it is not in {dims}"
         remaining_dims = [dim for dim in dims if dim not in over]
 
+        # If the data is sorted by the remaining dimensions, rows to combine are contiguous (a segmented sum)
+        keyed = bool(remaining_dims) and self._is_sorted_by(remaining_dims)
+        data = self._frame.drop(over)
+        if keyed:
+            data = _with_term_key(data, remaining_dims)
+
         return self._new(
-            self.data.drop(over)
-            .group_by(remaining_dims + [VAR_KEY], maintain_order=True)
-            .sum()
+            _sum_terms(data, remaining_dims, keyed),
+            ElementMetadata(
+                tuple(remaining_dims) or None,
+                constant_only=self._metadata.constant_only,
+                sorted_by=tuple(remaining_dims) if keyed else None,
+                index_token=derive_index_token(
+                    self._metadata.index_token, "sum", frozenset(over)
+                ),
+            ),
         )
 
+    def weighted_sum(
+        self,
+        weights: SupportsToExpr,
+        over: Optional[Union[str, Iterable[str]]] = None,
+    ) -> Expression:
+        """
+        Multiplies the expression by `weights` and sums the product over the dimensions `over` (by default, all dimensions).
+
+        The result is the same as `(self * weights).sum(over)` but the product is never fully materialized:
+        dimensions that are summed over and found on only one side are summed before the join,
+        and the join and the summation are run as a single (lazy) query.
+
+        Parameters:
+            weights : SupportsToExpr
+                The weights to multiply by (typically a DataFrame of parameters).
+            over : str | Iterable[str], optional
+                The dimensions to sum over. If None, sums over all the dimensions of the product.
+
+        Examples:
+            >>> import polars as pl
+            >>> from pyoframe import Variable, Model
+            >>> m = Model("min")
+            >>> m.transport = Variable({"wharehouse": ["a", "b"]}, {"plant": [1, 2]})
+            >>> cost = pl.DataFrame({"wharehouse": ["a", "a", "b", "b"], "plant": [1, 2, 1, 2], "cost": [1, 2, 3, 4]})
+            >>> m.transport.weighted_sum(cost)
+            <Expression size=1 dimensions={} terms=4>
+            transport[a,1] +2 transport[a,2] +3 transport[b,1] +4 transport[b,2]
+            >>> m.transport.weighted_sum(cost, over="wharehouse")
+            <Expression size=2 dimensions={'plant': 2} terms=4>
+            [1]: transport[a,1] +3 transport[b,1]
+            [2]: 2 transport[a,2] +4 transport[b,2]
+        """
+        other = weights.to_expr()
+        self._learn_from_other(other)
+
+        if not other._constant_only:
+            self, other = other, self
+        if not other._constant_only:
+            raise ValueError(
+                "Multiplication of two expressions with variables is non-linear and not supported."
+            )
+
+        dims = self.dimensions_unsafe
+        other_dims = other.dimensions_unsafe
+        product_dims = dims + [dim for dim in other_dims if dim not in dims]
+        if over is None:
+            over = product_dims
+        elif isinstance(over, str):
+            over = [over]
+        else:
+            over = list(over)
+        assert set(over) <= set(
+            product_dims
+        ), f"Cannot sum over {over} as it is not in {product_dims}"
+        remaining_dims = [dim for dim in product_dims if dim not in over]
+
+        data, multiplier = _align_laziness(self._frame, other._frame.drop(VAR_KEY))
+
+        # Summing over a dimension found on only one side can be done before the join (e.g. sum_i x_i * w = w * sum_i x_i)
+        self_only = [dim for dim in over if dim not in other_dims]
+        if self_only:
+            dims = [dim for dim in dims if dim not in self_only]
+            data = _sum_terms(data.drop(self_only), dims)
+        other_only = [dim for dim in over if dim not in self.dimensions_unsafe]
+        if other_only:
+            other_dims = [dim for dim in other_dims if dim not in other_only]
+            multiplier = multiplier.drop(other_only)
+            multiplier = (
+                multiplier.group_by(other_dims, maintain_order=True).sum()
+                if other_dims
+                else multiplier.sum()
+            )
+
+        dims_in_common = [dim for dim in dims if dim in other_dims]
+        how = "inner" if dims_in_common else "cross"
+        estimate = _estimate_join(
+            "Expression.weighted_sum",
+            data,
+            multiplier,
+            how,
+            dims_in_common,
+            # Summing over the dimensions found only on the right makes it unique
+            right_unique=bool(other._metadata.unique or other_only)
+            and len(dims_in_common) == len(other_dims),
+            left_rows=None if self_only else self._metadata.height,
+            right_rows=None if other_only else other._metadata.height,
+        )
+        lazy = isinstance(data, pl.LazyFrame)
+        product = (
+            data.lazy()
+            .join(multiplier.lazy(), on=dims_in_common, how=how)
+            .select(
+                *remaining_dims,
+                VAR_KEY,
+                pl.col(COEF_KEY) * pl.col(COEF_KEY + "_right"),
+            )
+        )
+        # Terms are unique per index on both sides, so only summing over a shared dimension can combine terms
+        if any(dim in dims_in_common for dim in over):
+            product = _sum_terms(product, remaining_dims)
+
+        result = self._new(
+            product if lazy else product.collect(),
+            ElementMetadata(
+                tuple(remaining_dims) or None,
+                constant_only=self._metadata.constant_only,
+            ),
+        )
+        result._joins = self._joins + other._joins + (estimate,)
+        return result
+
+    @profiled
     def map(self, mapping_set: SetTypes, drop_shared_dims: bool = True):
         """
         Replaces the dimensions that are shared with mapping_set with the other dimensions found in mapping_set.
@@ -394,6 +620,7 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         Parameters:
             mapping_set : SetTypes
                 The set to map the expression to. This can be a DataFrame, Index, or another Set.
+                If an Expression (e.g. `df.to_expr()`) is given, its values are used as weights (see the last example).
             drop_shared_dims : bool, default True
                 If True, the dimensions shared between the expression and the mapping set are dropped from the resulting expression and
                     repeated rows are summed.
@@ -419,8 +646,15 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         [Toronto,2024,Canada]: 10
         [Vancouver,2024,Canada]: 2
         [Boston,2024,USA]: 8
+
+        >>> city_shares = pl.DataFrame({"city": ["Toronto", "Vancouver", "Boston"], "country": ["Canada", "Canada", "USA"], "share": [0.5, 1, 1]})
+        >>> pop_data.map(city_shares.to_expr())
+        <Expression size=2 dimensions={'year': 1, 'country': 2} terms=2>
+        [2024,Canada]: 7
+        [2024,USA]: 8
         """
-        mapping_set = Set(mapping_set)
+        if not isinstance(mapping_set, Expression):
+            mapping_set = Set(mapping_set)
 
         dims = self.dimensions
         if dims is None:
@@ -438,14 +672,56 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
                 f"Cannot apply .map() as there are no shared dimensions between the expression (dims={self.dimensions}) and the mapping set (dims={mapping_set.dimensions})."
             )
 
-        mapped_expression = self * mapping_set
-
         if drop_shared_dims:
-            return sum(shared_dims, mapped_expression)
+            return self.weighted_sum(mapping_set, over=shared_dims)
+
+        return self * mapping_set
+
+    def explain(self) -> str:
+        """
+        Describes the joins run by the operations that created the expression (multiplications, broadcasting and
+        mappings) with an upper bound of the number of rows each join creates.
+
+        Note that the joins of an eager expression have already run by the time `explain()` is called: it reports
+        after the fact what the operations did. Only the joins of lazy expressions (see `Config.lazy_expressions`)
+        are run once the expression is collected and can hence be inspected before running them.
 
-        return mapped_expression
+        The estimates never run a query. The number of rows is read from eager frames or from the metadata of lazy
+        expressions, and is shown as `?` if unknown. Unless the keys are known to be unique on the right, a join may
+        match each row with every row of the right. If `Config.max_join_rows` is set, unknown numbers of rows are
+        counted and the repetitions of the keys computed (running part of the query of lazy frames) to check the limit.
 
-    def rolling_sum(self, over: str, window_size: int):
+        Examples:
+            >>> import pyoframe as pf
+            >>> m = pf.Model("min")
+            >>> m.x = pf.Variable({"t": range(24)})
+            >>> m.y = pf.Variable({"city": ["A", "B"]})
+            >>> cost = pl.DataFrame({"city": ["A", "B"], "t": [1, 1], "cost": [3, 4]})
+            >>> expr = m.x.add_dim("city") + m.y.add_dim("t") + pf.sum("t", m.y * cost)
+            >>> print(expr.explain())
+            Adding dimensions: cross join of 24 x 2 rows -> at most 48 rows
+            Adding dimensions: cross join of 2 x 24 rows -> at most 48 rows
+            Expression.__mul__: inner join on ['city'] of 2 x 2 rows -> at most 4 rows
+            Adding dimensions: left join on ['city'] of 2 x 48 rows -> at most 96 rows
+
+            Each estimate is checked against `Config.max_join_rows`:
+
+            >>> pf.Config.max_join_rows = 100
+            >>> m.x * pl.DataFrame({"hour": range(24), "cost": 1})
+            Traceback (most recent call last):
+            ...
+            pyoframe.constants.PyoframeError: Expression.__mul__ would create up to 576 rows (cross join of 24 x 24 rows), more than Config.max_join_rows (100). Check that the operands share the intended dimensions (e.g. that no dimension is missing).
+        """
+        if not self._joins:
+            return "No joins"
+        return "\n".join(str(join) for join in self._joins)
+
+    def rolling_sum(
+        self,
+        over: str,
+        window_size: int,
+        weights: Optional[Sequence[float]] = None,
+    ):
         """
         Calculates the rolling sum of the Expression over a specified window size for a given dimension.
 
@@ -458,14 +734,19 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
                 The name of the dimension (column) over which the rolling sum is calculated.
                 This dimension must exist within the Expression's dimensions.
             window_size : int
-                The size of the moving window in terms of number of records.
-                The rolling sum is calculated over this many consecutive elements.
+                The size of the moving window. If `over` is an integer dimension, the window at `t` covers
+                the values `t - window_size + 1` to `t`. Otherwise, the window covers `window_size` consecutive
+                values of `over` (in sorted order).
+            weights : Sequence[float], optional
+                The weight of each position in the window, starting with the current value
+                (i.e. `weights[k]` multiplies the value `k` steps back). Must have length `window_size`.
 
         Returns:
             Expression
                 A new Expression instance containing the result of the rolling sum operation.
                 This new Expression retains all dimensions (columns) of the original data,
                 with the rolling sum applied over the specified dimension.
+                The rows are sorted by the other dimensions and then by `over`.
 
         Examples:
             >>> import polars as pl
@@ -480,6 +761,12 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
             [1,3]: 2 quantity[1,2] +3 quantity[1,3]
             [2,1]: 4 quantity[2,1]
             [2,2]: 4 quantity[2,1] +5 quantity[2,2]
+            >>> m.level = Variable({"day": ["mon", "tue", "wed"]})
+            >>> m.level.rolling_sum(over="day", window_size=2, weights=[1, 0.5])
+            <Expression size=3 dimensions={'day': 3} terms=5>
+            [mon]: level[mon]
+            [tue]: 0.5 level[mon] + level[tue]
+            [wed]: 0.5 level[tue] + level[wed]
         """
         dims = self.dimensions
         if dims is None:
@@ -488,16 +775,206 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
             )
         assert over in dims, f"Cannot sum over {over} as it is not in {dims}"
         remaining_dims = [dim for dim in dims if dim not in over]
+        assert (
+            window_size >= 1
+        ), f"Expected a window size of at least 1 but got {window_size}."
+        if weights is None:
+            weights = [1] * window_size
+        assert (
+            len(weights) == window_size
+        ), f"Expected {window_size} weights but got {len(weights)}."
+        assert any(
+            weight != 0 for weight in weights
+        ), "Expected at least one non-zero weight."
+
+        # The windows depend on the range of `over`, which is read from the data: lazy data is collected
+        # once here rather than having its query run again for the result
+        data = self.data
+        dtype = data.schema[over]
+        if dtype.is_integer():
+            position = pl.col(over)
+        else:
+            # Windows are measured in number of distinct (sorted) values of `over`
+            positions = data.select(over).unique().sort(over)
+            positions = positions.with_row_index("__position")
+            data = data.join(positions, on=over, how="left", coalesce=True)
+            position = pl.col("__position")
+        position = position.cast(pl.Int64)
+        start, end = data.select(position.min(), position.max().alias("end")).row(0)
+        if start is None:
+            return self
+        span = end - start + 1
+
+        # Each index is identified by a single integer (its group of remaining dimensions and its position)
+        # such that the windows can be built with integer arithmetic instead of joins on every dimension.
+        group = (
+            pl.struct(remaining_dims).rank("dense").cast(pl.Int64) - 1
+            if remaining_dims
+            else 0
+        )
+        data = data.with_columns(
+            (group * span + position - start).alias(TERM_KEY),
+            # Only the terms of variables (or the constant) that appear more than once need to be combined
+            pl.col(VAR_KEY).is_duplicated().alias("__repeated"),
+        )
+        indices = data.select(TERM_KEY).unique()
+
+        # Every term is repeated once per position in the window (lag) and kept only if
+        # the index it contributes to exists (in the same group)
+        columns = [TERM_KEY, VAR_KEY, *remaining_dims, COEF_KEY]
+        data = pl.concat(
+            [
+                data.select(
+                    pl.col(TERM_KEY) + lag,
+                    VAR_KEY,
+                    *remaining_dims,
+                    pl.col(COEF_KEY) * weight,
+                    "__repeated",
+                ).filter(pl.col(TERM_KEY) % span >= lag)
+                for lag, weight in reversed(list(enumerate(weights)))
+                if weight != 0
+            ],
+            how="vertical_relaxed",
+        ).join(indices, on=TERM_KEY, how="semi")
+        combined = (
+            data.filter("__repeated")
+            .group_by([TERM_KEY, VAR_KEY], maintain_order=True)
+            .agg(pl.col(remaining_dims).first(), pl.col(COEF_KEY).sum())
+        )
+        data = pl.concat([combined, data.filter(~pl.col("__repeated")).select(columns)])
+        data = data.sort(TERM_KEY, maintain_order=True)
+
+        offset = pl.col(TERM_KEY) % span + start
+        if dtype.is_integer():
+            data = data.with_columns(offset.cast(dtype).alias(over))
+        else:
+            data = data.with_columns(offset.cast(pl.UInt32).alias("__position"))
+            data = data.join(positions, on="__position", how="left", coalesce=True)
 
         return self._new(
-            pl.concat(
-                [
-                    df.with_columns(pl.col(over).max())
-                    for _, df in self.data.rolling(
-                        index_column=over, period=f"{window_size}i", by=remaining_dims
-                    )
-                ]
+            data.select(*dims, COEF_KEY, VAR_KEY),
+            # Every index is in its own window hence the indices are unchanged, unless the current
+            # value has no weight in which case the first index of every group is dropped
+            ElementMetadata(
+                tuple(dims),
+                constant_only=self._metadata.constant_only,
+                index_token=self._metadata.index_token if weights[0] != 0 else None,
+            ),
+        )
+
+    def shift(
+        self,
+        dim: str,
+        k: int | timedelta = 1,
+        wrap_around: bool = False,
+        fill: Optional[int | float] = None,
+    ) -> Expression:
+        """
+        Shifts the expression by `k` steps along dimension `dim` such that the result at index `t` is the expression at index `t - k`
+        (for the same values of the other dimensions).
+
+        If `dim` is an integer dimension, `k` is subtracted from its values. If `dim` is a temporal dimension, `k` can be a timedelta
+        which is also subtracted from its values. Otherwise, `k` is a number of positions in the sorted values of `dim`.
+
+        Parameters:
+            dim:
+                The dimension over which to shift the expression.
+            k:
+                The offset. Positive values look back (lag) and negative values look ahead (e.g. `shift(dim, -1)` is the next value).
+            wrap_around:
+                If True, the offset wraps around from the last value of the dimension to the first value (and vice versa).
+                For integer dimensions, the dimension is assumed to take every value between its minimum and maximum.
+            fill:
+                The constant used for indices that have nothing to shift from (e.g. the first `k` indices).
+                If None, those indices are dropped.
+
+        Returns:
+            An expression with the same dimensions (and, if `fill` is given, the same indices).
+
+        Examples:
+            >>> from pyoframe import Variable, Model
+            >>> m = Model("min")
+            >>> m.charge = Variable({"time": [1, 2, 3, 4]}, {"city": ["Toronto", "Berlin"]})
+            >>> m.charge.filter(city="Toronto").shift("time", 2)
+            <Expression size=2 dimensions={'time': 2, 'city': 1} terms=2>
+            [3,Toronto]: charge[1,Toronto]
+            [4,Toronto]: charge[2,Toronto]
+            >>> m.charge.filter(city="Toronto").shift("time", 1, fill=10)
+            <Expression size=4 dimensions={'time': 4, 'city': 1} terms=4>
+            [1,Toronto]: 10
+            [2,Toronto]: charge[1,Toronto]
+            [3,Toronto]: charge[2,Toronto]
+            [4,Toronto]: charge[3,Toronto]
+            >>> m.charge.filter(city="Berlin").shift("time", -1, wrap_around=True)
+            <Expression size=4 dimensions={'time': 4, 'city': 1} terms=4>
+            [1,Berlin]: charge[2,Berlin]
+            [2,Berlin]: charge[3,Berlin]
+            [3,Berlin]: charge[4,Berlin]
+            [4,Berlin]: charge[1,Berlin]
+        """
+        dims = self.dimensions
+        if dims is None:
+            raise ValueError("Cannot use shift() on an expression with no dimensions.")
+        assert dim in dims, f"Cannot shift over {dim} as it is not in {dims}"
+        remaining_dims = [d for d in dims if d != dim]
+
+        # Wrapping around depends on the range of `dim`, which is read from the data: lazy data is then
+        # collected once rather than having its query run again for the result
+        data = self.data if wrap_around else self._frame
+        dtype = data.schema[dim]
+        position = dim
+        if isinstance(k, timedelta):
+            if not dtype.is_temporal():
+                raise ValueError(
+                    f"Cannot shift dimension '{dim}' of type {dtype} by a timedelta."
+                )
+            if wrap_around:
+                raise ValueError(
+                    "wrap_around is not supported when shifting by a timedelta."
+                )
+        elif not dtype.is_integer():
+            # Shift by positions in the sorted values of the dimension
+            position = "__position"
+            positions = data.select(dim).unique().sort(dim).with_row_index(position)
+            data = data.join(positions, on=dim, how="left", coalesce=True)
+
+        # The terms are moved to the index they are shifted to and then matched with the existing indices
+        shifted = pl.col(position) + k
+        if wrap_around:
+            start, end = data.select(
+                pl.col(position).min(), pl.col(position).max().alias("end")
+            ).row(0)
+            if start is not None:
+                span = end - start + 1
+                shifted = ((shifted - start) % span + span) % span + start
+        source = data.select(
+            *remaining_dims,
+            # Values shifted out of range (e.g. negative positions) can't match any index
+            shifted.cast(data.schema[position], strict=False),
+            VAR_KEY,
+            COEF_KEY,
+        )
+        indices = data.select(list(dict.fromkeys(dims + [position])))
+        if not self._metadata.unique:
+            indices = indices.unique(maintain_order=True)
+        data = indices.join(
+            source, on=remaining_dims + [position], how="left", coalesce=True
+        )
+        if fill is None:
+            data = data.drop_nulls(VAR_KEY)
+        else:
+            data = data.with_columns(
+                pl.col(VAR_KEY).fill_null(pl.lit(CONST_TERM, VAR_TYPE)),
+                pl.col(COEF_KEY).fill_null(fill),
             )
+
+        return self._new(
+            data.select(*dims, COEF_KEY, VAR_KEY),
+            ElementMetadata(
+                tuple(dims),
+                unique=self._metadata.unique,
+                sorted_by=self._metadata.sorted_by,
+            ),
         )
 
     def within(self, set: "SetTypes") -> Expression:
@@ -527,9 +1004,12 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
             dims is not None
         ), "Cannot use .within() with an expression with no dimensions."
         dims_in_common = [dim for dim in dims if dim in set_dims]
-        by_dims = df.select(dims_in_common).unique(maintain_order=True)
-        return self._new(self.data.join(by_dims, on=dims_in_common))
+        data, by_dims = _align_laziness(
+            self._frame, df.select(dims_in_common).unique(maintain_order=True)
+        )
+        return self._new(data.join(by_dims, on=dims_in_common))
 
+    @profiled
     def __add__(self, other):
         """
         Examples:
@@ -576,39 +1056,64 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         self._learn_from_other(other)
         return _add_expressions(self, other)
 
+    @profiled
     def __mul__(
         self: "Expression", other: int | float | SupportsToExpr
     ) -> "Expression":
         if isinstance(other, (int, float)):
-            return self.with_columns(pl.col(COEF_KEY) * other)
+            # Scaling the coefficients doesn't change any of the facts about the data
+            return self._new(
+                self._frame.with_columns(pl.col(COEF_KEY) * other), self._metadata
+            )
 
         other = other.to_expr()
         self._learn_from_other(other)
 
-        if (other.data.get_column(VAR_KEY) != CONST_TERM).any():
+        if not other._constant_only:
             self, other = other, self
 
-        if (other.data.get_column(VAR_KEY) != CONST_TERM).any():
+        if not other._constant_only:
             raise ValueError(
                 "Multiplication of two expressions with variables is non-linear and not supported."
             )
-        multiplier = other.data.drop(VAR_KEY)
+        data, multiplier = _align_laziness(self._frame, other._frame.drop(VAR_KEY))
 
         dims = self.dimensions_unsafe
         other_dims = other.dimensions_unsafe
         dims_in_common = [dim for dim in dims if dim in other_dims]
 
+        how = "inner" if dims_in_common else "cross"
+        estimate = _estimate_join(
+            "Expression.__mul__",
+            data,
+            multiplier,
+            how,
+            dims_in_common,
+            right_unique=bool(other._metadata.unique)
+            and len(dims_in_common) == len(other_dims),
+            left_rows=self._metadata.height,
+            right_rows=other._metadata.height,
+        )
+
+        if _can_merge_join(self, other, dims_in_common):
+            data = data.with_columns(pl.col(dims_in_common).set_sorted())
+            multiplier = multiplier.with_columns(pl.col(dims_in_common).set_sorted())
+
         data = (
-            self.data.join(
-                multiplier,
-                on=dims_in_common,
-                how="inner" if dims_in_common else "cross",
-            )
+            data.join(multiplier, on=dims_in_common, how=how)
             .with_columns(pl.col(COEF_KEY) * pl.col(COEF_KEY + "_right"))
             .drop(COEF_KEY + "_right")
         )
 
-        return self._new(data)
+        result = self._new(
+            data,
+            ElementMetadata(
+                tuple(dims + [dim for dim in other_dims if dim not in dims]) or None,
+                constant_only=self._metadata.constant_only,
+            ),
+        )
+        result._joins = self._joins + other._joins + (estimate,)
+        return result
 
     def to_expr(self) -> Expression:
         return self
@@ -617,37 +1122,85 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         if self._model is None and other._model is not None:
             self._model = other._model
 
-    def _new(self, data: pl.DataFrame) -> Expression:
+    def _new(
+        self, data: pl.DataFrame, metadata: Optional[ElementMetadata] = None
+    ) -> Expression:
         e = Expression(data)
+        e._inherit_metadata(metadata)
         e._model = self._model
         # Note: We intentionally don't propogate the unmatched strategy to the new expression
         e.allowed_new_dims = self.allowed_new_dims
+        e._joins = self._joins
         return e
 
     def _add_const(self, const: int | float) -> Expression:
         dim = self.dimensions
-        data = self.data
+        data = self._frame
         # Fill in missing constant terms
         if not dim:
+            data = self.data
             if CONST_TERM not in data[VAR_KEY]:
                 data = pl.concat(
                     [
                         data,
                         pl.DataFrame(
                             {COEF_KEY: [0.0], VAR_KEY: [CONST_TERM]},
-                            schema={COEF_KEY: pl.Float64, VAR_KEY: VAR_TYPE},
+                            schema={
+                                COEF_KEY: Config.coefficient_dtype,
+                                VAR_KEY: VAR_TYPE,
+                            },
                         ),
                     ],
                     how="vertical_relaxed",
                 )
+        elif self._is_sorted_by(dim):
+            # Indices are numbered in order to find and place the new constant terms without hashing every dimension.
+            data = data.with_columns(_index_boundaries(dim).cum_sum().alias(TERM_KEY))
+            unique = self._metadata.unique
+            if unique is None and isinstance(data, pl.DataFrame):
+                unique = (
+                    data.height == 0 or data.get_column(TERM_KEY)[-1] == data.height
+                )
+            if unique:
+                missing = data.filter(pl.col(VAR_KEY) != CONST_TERM)
+            else:
+                missing = data.filter(_index_boundaries(dim)).join(
+                    data.filter(pl.col(VAR_KEY) == CONST_TERM).select(TERM_KEY),
+                    on=TERM_KEY,
+                    how="anti",
+                )
+            missing = missing.with_columns(
+                pl.lit(0.0, Config.coefficient_dtype).alias(COEF_KEY),
+                pl.lit(CONST_TERM).alias(VAR_KEY).cast(VAR_TYPE),
+            )
+            # Sorting by the index number keeps the data sorted
+            data = (
+                _place_constant_terms(data, missing, unique, dim)
+                .sort(TERM_KEY, maintain_order=True)
+                .drop(TERM_KEY)
+            )
         else:
-            keys = (
-                data.select(dim)
-                .unique(maintain_order=True)
-                .with_columns(pl.lit(CONST_TERM).alias(VAR_KEY).cast(VAR_TYPE))
+            unique = self._metadata.unique
+            if unique:
+                # Every index has a single term, so indices with a variable term have no constant term
+                missing = data.filter(pl.col(VAR_KEY) != CONST_TERM).select(dim)
+            else:
+                if self._is_sorted_by(dim):
+                    indices = data.filter(_index_boundaries(dim)).select(dim)
+                else:
+                    indices = data.select(dim).unique(maintain_order=True)
+                if unique is None and isinstance(data, pl.DataFrame):
+                    unique = indices.height == data.height
+                missing = indices.join(
+                    data.filter(pl.col(VAR_KEY) == CONST_TERM).select(dim),
+                    on=dim,
+                    how="anti",
+                )
+            missing = missing.with_columns(
+                pl.lit(0.0, Config.coefficient_dtype).alias(COEF_KEY),
+                pl.lit(CONST_TERM).alias(VAR_KEY).cast(VAR_TYPE),
             )
-            data = data.join(keys, on=dim + [VAR_KEY], how="outer_coalesce")
-            data = data.with_columns(pl.col(COEF_KEY).fill_null(0.0))
+            data = _place_constant_terms(data, missing, unique, dim)
 
         data = data.with_columns(
             pl.when(pl.col(VAR_KEY) == CONST_TERM)
@@ -655,25 +1208,60 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
             .otherwise(pl.col(COEF_KEY))
         )
 
-        return self._new(data)
+        # Constant terms are only added to existing indices hence the indices are unchanged
+        sorted_by = self._sorted_by if dim and self._is_sorted_by(dim) else None
+        return self._new(
+            data,
+            replace(self._metadata, height=None, unique=None, sorted_by=sorted_by),
+        )
 
     @property
     def constant_terms(self):
+        """
+        The constant of every index (0 for indices without a constant term).
+
+        The constants are read in a single pass over the terms: without a join if each index has only one term
+        (the constant is then simply the coefficient or 0) and with one grouping otherwise.
+
+        Examples:
+            >>> import pyoframe as pf
+            >>> m = pf.Model("min")
+            >>> m.x = pf.Variable({"t": [1, 2, 3]})
+            >>> (m.x.to_expr().keep_unmatched() + pl.DataFrame({"t": [1, 3], "c": [4, 5]})).constant_terms
+            shape: (3, 2)
+            ┌─────┬─────────┐
+            │ t   ┆ __coeff │
+            │ --- ┆ ---     │
+            │ i64 ┆ f64     │
+            ╞═════╪═════════╡
+            │ 1   ┆ 4.0     │
+            │ 2   ┆ 0.0     │
+            │ 3   ┆ 5.0     │
+            └─────┴─────────┘
+        """
         dims = self.dimensions
-        constant_terms = self.data.filter(pl.col(VAR_KEY) == CONST_TERM).drop(VAR_KEY)
-        if dims is not None:
-            return constant_terms.join(
-                self.data.select(dims).unique(maintain_order=True),
-                on=dims,
-                how="outer_coalesce",
-            ).with_columns(pl.col(COEF_KEY).fill_null(0.0))
-        else:
-            if len(constant_terms) == 0:
-                return pl.DataFrame(
-                    {COEF_KEY: [0.0], VAR_KEY: [CONST_TERM]},
-                    schema={COEF_KEY: pl.Float64, VAR_KEY: VAR_TYPE},
+        constant = (
+            pl.when(pl.col(VAR_KEY) == CONST_TERM)
+            .then(pl.col(COEF_KEY))
+            .otherwise(0.0)
+            .alias(COEF_KEY)
+        )
+        if dims is None:
+            return self.data.select(
+                constant.sum(), pl.lit(CONST_TERM, dtype=VAR_TYPE).alias(VAR_KEY)
+            )
+        if self._metadata.unique:
+            return self.data.select(*dims, constant)
+        if self._is_sorted_by(dims):
+            return (
+                self.data.with_columns(
+                    _index_boundaries(dims).cum_sum().alias(TERM_KEY)
                 )
-            return constant_terms
+                .group_by(TERM_KEY, maintain_order=True)
+                .agg(*[pl.col(dim).first() for dim in dims], constant.sum())
+                .drop(TERM_KEY)
+            )
+        return self.data.group_by(dims, maintain_order=True).agg(constant.sum())
 
     @property
     def variable_terms(self):
@@ -732,7 +1320,7 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         dims = self.dimensions
         if dims is not None:
             df = df.group_by(dims, maintain_order=True)
-        return df.sum()
+        return _decode_result(df.sum(), dims)
 
     def to_str_table(
         self,
@@ -742,8 +1330,22 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         include_const_variable=False,
         var_map=None,
         float_precision=None,
+        const_column=None,
     ):
-        data = self.data if include_const_term else self.variable_terms
+        """
+        Returns one string per index. If `const_column` is given, the constant terms are summed
+        into that (numeric) column while the terms are combined, rather than being written in the string.
+        """
+        if const_column is not None:
+            data = self.data.with_columns(
+                pl.when(pl.col(VAR_KEY) == CONST_TERM)
+                .then(pl.col(COEF_KEY))
+                .otherwise(0.0)
+                .alias(const_column)
+            )
+            include_const_variable = False
+        else:
+            data = self.data if include_const_term else self.variable_terms
         data = cast_coef_to_string(data, float_precision=float_precision)
 
         if var_map is not None:
@@ -760,7 +1362,8 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         else:
             data = data.with_columns(
                 pl.when(pl.col(VAR_KEY) == CONST_TERM)
-                .then(pl.lit(""))
+                # A null term is skipped when the terms are combined
+                .then(pl.lit(None if const_column is not None else ""))
                 .otherwise("str_var")
                 .alias(VAR_KEY)
             ).drop("str_var")
@@ -777,12 +1380,22 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         ).drop(COEF_KEY, VAR_KEY)
 
         # Combine terms into one string
-        if dimensions is not None:
-            data = data.group_by(dimensions, maintain_order=True).agg(
-                pl.col("expr").str.concat(delimiter=" ")
+        aggregations = [pl.col("expr").str.concat(delimiter=" ")]
+        if const_column is not None:
+            aggregations.append(pl.col(const_column).sum())
+        if dimensions is not None and self._is_sorted_by(dimensions):
+            data = (
+                data.with_columns(
+                    _index_boundaries(dimensions).cum_sum().alias(TERM_KEY)
+                )
+                .group_by(TERM_KEY, maintain_order=True)
+                .agg(*[pl.col(dim).first() for dim in dimensions], *aggregations)
+                .drop(TERM_KEY)
             )
+        elif dimensions is not None:
+            data = data.group_by(dimensions, maintain_order=True).agg(*aggregations)
         else:
-            data = data.select(pl.col("expr").str.concat(delimiter=" "))
+            data = data.select(*aggregations)
 
         # Remove leading +
         data = data.with_columns(pl.col("expr").str.strip_chars(characters=" +"))
@@ -806,7 +1419,13 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
 
     def to_str_create_prefix(self, data):
         if self.name is not None or self.dimensions:
-            data = concat_dimensions(data, prefix=self.name, ignore_columns=["expr"])
+            data = concat_dimensions(
+                data,
+                prefix=self.name,
+                ignore_columns=[
+                    c for c in data.columns if c not in self.dimensions_unsafe
+                ],
+            )
             data = data.with_columns(
                 pl.concat_str("concated_dim", pl.lit(": "), "expr").alias("expr")
             ).drop("concated_dim")
@@ -827,7 +1446,7 @@ class Expression(ModelElement, SupportsMath, SupportPolarsMethodMixin):
         result = ""
         if include_header:
             result += get_obj_repr(
-                self, size=len(self), dimensions=self.shape, terms=len(self.data)
+                self, size=len(self), dimensions=self.shape, terms=self._height
             )
         if include_header and include_data:
             result += "\n"
@@ -896,9 +1515,192 @@ def sum_by(by: Union[str, Sequence[str]], expr: SupportsToExpr) -> "Expression":
     return sum(over=remaining_dims, expr=expr)
 
 
+def dot(
+    expr: SupportsToExpr,
+    weights: SupportsToExpr,
+    over: Optional[Union[str, Sequence[str]]] = None,
+) -> "Expression":
+    """
+    Multiplies `expr` by `weights` and sums over the dimensions `over` (by default, all dimensions).
+    Same as `pf.sum(over, expr * weights)` but without materializing the product (see `Expression.weighted_sum()`).
+
+    Examples:
+        >>> import pyoframe as pf
+        >>> m = pf.Model("min")
+        >>> m.X = pf.Variable({"t": [1, 2]}, {"city": ["A", "B"]})
+        >>> price = pl.DataFrame({"city": ["A", "B"], "price": [10, 20]})
+        >>> pf.dot(m.X, price, over="city")
+        <Expression size=2 dimensions={'t': 2} terms=4>
+        [1]: 10 X[1,A] +20 X[1,B]
+        [2]: 10 X[2,A] +20 X[2,B]
+    """
+    return expr.to_expr().weighted_sum(weights, over)
+
+
+def add(
+    *expressions: SupportsToExpr | int | float | Iterable[SupportsToExpr],
+) -> "Expression":
+    """
+    Adds expressions together. The result is the same as `expr_1 + expr_2 + ...` (including how unmatched values
+    and missing dimensions are handled) but the data is only concatenated and grouped once rather than after every `+`.
+
+    Examples:
+        >>> import pyoframe as pf
+        >>> m = pf.Model("min")
+        >>> m.X = pf.Variable({"t": [1, 2]})
+        >>> m.Y = pf.Variable({"t": [1, 2]})
+        >>> costs = pl.DataFrame({"t": [1, 2], "cost": [10, 20]})
+        >>> pf.add(m.X, 2 * m.Y, costs, 5)
+        <Expression size=2 dimensions={'t': 2} terms=6>
+        [1]: X[1] +2 Y[1] +15
+        [2]: X[2] +2 Y[2] +25
+        >>> pf.add([m.X, m.Y.drop_unmatched(), costs.filter(t=1)])
+        <Expression size=1 dimensions={'t': 1} terms=3>
+        [1]: Y[1] + X[1] +10
+    """
+    exprs: List[Expression] = []
+    const: Optional[int | float] = None
+    for expr in parse_inputs_as_iterable(*expressions):
+        if isinstance(expr, str):
+            raise ValueError(
+                "Cannot add a string to an expression. Perhaps you meant to use pf.sum() instead of sum()?"
+            )
+        if isinstance(expr, (int, float)):
+            const = expr if const is None else const + expr
+        else:
+            exprs.append(expr.to_expr())
+    if not exprs:
+        raise ValueError("At least one expression must be provided.")
+
+    if len(exprs) == 1:
+        result = exprs[0]
+    else:
+        for expr in exprs[1:]:
+            exprs[0]._learn_from_other(expr)
+        result = _add_expressions(*exprs)
+    if const is not None:
+        result = result._add_const(const)
+    return result
+
+
+def quicksum(expressions: Iterable[SupportsToExpr | int | float]) -> "Expression":
+    """
+    Same as `add()` but takes an iterable of expressions (like `gurobipy.quicksum`).
+
+    Examples:
+        >>> import pyoframe as pf
+        >>> m = pf.Model("min")
+        >>> m.X = pf.Variable({"t": [1, 2, 3]})
+        >>> pf.quicksum(i * m.X for i in range(1, 4))
+        <Expression size=3 dimensions={'t': 3} terms=3>
+        [1]: 6 X[1]
+        [2]: 6 X[2]
+        [3]: 6 X[3]
+    """
+    return add(list(expressions))
+
+
+class ExpressionBuilder(SupportsMath):
+    """
+    Accumulates expressions that are added one at a time (e.g. in a loop) and only adds them together when the result is needed.
+
+    Each `expr += other` concatenates and groups all the terms accumulated so far, such that building an expression
+    from many parts takes quadratic time. Adding to a builder instead just records the part and `to_expr()` adds
+    all the parts in one pass (see `add()`). The result is the same as adding the parts one by one.
+
+    Examples:
+        >>> import pyoframe as pf
+        >>> m = pf.Model("min")
+        >>> m.X = pf.Variable({"t": [1, 2]})
+        >>> builder = pf.ExpressionBuilder()
+        >>> for i in range(1, 4):
+        ...     builder += i * m.X
+        >>> builder -= m.X
+        >>> builder
+        <ExpressionBuilder parts=4>
+        >>> builder.to_expr()
+        <Expression size=2 dimensions={'t': 2} terms=2>
+        [1]: 5 X[1]
+        [2]: 5 X[2]
+        >>> builder <= 5
+        <Constraint sense='<=' size=2 dimensions={'t': 2} terms=4>
+        [1]: 5 X[1] <= 5
+        [2]: 5 X[2] <= 5
+    """
+
+    def __init__(self, *expressions: SupportsToExpr | int | float):
+        super().__init__()
+        self._parts: List[SupportsToExpr | int | float] = list(expressions)
+
+    def __iadd__(self, other: SupportsToExpr | int | float):
+        self._parts.append(other)
+        return self
+
+    def __isub__(self, other: SupportsToExpr | int | float):
+        if isinstance(other, (int, float)):
+            self._parts.append(-other)
+        else:
+            self._parts.append(-other.to_expr())
+        return self
+
+    def to_expr(self) -> Expression:
+        if not self._parts:
+            raise ValueError(
+                "Cannot create an expression from an empty ExpressionBuilder."
+            )
+        result = add(self._parts)
+        # The sum replaces the parts so that later calls don't repeat the work
+        self._parts = [result]
+        return result
+
+    def __repr__(self) -> str:
+        return get_obj_repr(self, parts=len(self._parts))
+
+
+def _place_constant_terms(
+    data: pl.DataFrame | pl.LazyFrame,
+    missing: pl.DataFrame | pl.LazyFrame,
+    unique: Optional[bool],
+    dims: List[str],
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Concatenates the existing terms and the new constant terms (see `Expression._add_const`) such that the constant
+    term is shown before the term of an index if every index has a single term, and after the terms of its index otherwise.
+    If `unique` isn't known (e.g. for lazy frames) this is decided as part of the query rather than by computing it.
+    """
+    if unique is not None:
+        return pl.concat([missing, data] if unique else [data, missing], how="diagonal")
+    position, is_unique = "__position", "__unique"
+    return (
+        pl.concat(
+            [
+                data.with_columns(
+                    pl.lit(1).alias(position),
+                    (pl.struct(dims).n_unique() == pl.len()).alias(is_unique),
+                ),
+                missing,
+            ],
+            how="diagonal",
+        )
+        .with_columns(
+            pl.col(position).fill_null(
+                pl.when(pl.col(is_unique).max()).then(0).otherwise(2)
+            )
+        )
+        .sort(position, maintain_order=True)
+        .drop(position, is_unique)
+    )
+
+
+def _decode_result(df: pl.DataFrame, dims: Optional[List[str]]) -> pl.DataFrame:
+    """Results (e.g. solutions or duals) are always returned with the dimensions as provided by the user."""
+    return restore_dimension_dtypes(df, dims or [])
+
+
 class Constraint(ModelElementWithId):
     """A linear programming constraint."""
 
+    @profiled
     def __init__(self, lhs: Expression, sense: ConstraintSense):
         """Initialize a constraint.
 
@@ -908,21 +1710,86 @@ class Constraint(ModelElementWithId):
             sense: Sense
                 The sense of the constraint.
         """
-        self.lhs = lhs
+        self._lhs: Optional[Expression] = lhs
+        # Once the model is frozen, the terms of the left hand side are kept in the model's term store instead
+        self._terms: Optional[pl.DataFrame] = None
+        self._lhs_metadata: Optional[ElementMetadata] = None
         self._model = lhs._model
         self.sense = sense
         self.to_relax: Optional[FuncArgs] = None
 
         dims = self.lhs.dimensions
-        data = pl.DataFrame() if dims is None else self.lhs.data.select(dims).unique()
+        if dims is None:
+            data = pl.DataFrame()
+        elif self.lhs._metadata.unique:
+            data = self.lhs.data.select(dims)
+        elif self.lhs._is_sorted_by(dims):
+            data = self.lhs.data.filter(_index_boundaries(dims)).select(dims)
+        else:
+            data = self.lhs.data.select(dims).unique(maintain_order=True)
 
         super().__init__(data)
+        self._update_metadata(unique=True, shape=self.lhs._metadata.shape)
 
     def on_add_to_model(self, model: "Model", name: str):
         super().on_add_to_model(model, name)
         if self.to_relax is not None:
             self.relax(*self.to_relax.args, **self.to_relax.kwargs)
 
+    @property
+    def lhs(self) -> Expression:
+        """
+        The left hand side of the constraint.
+
+        Once the model is frozen (see `Model.freeze`), the left hand side is rebuilt from the model's term store
+        every time it is accessed. Writing the model to a file reads the term store directly instead.
+        """
+        if self._lhs is not None:
+            return self._lhs
+        assert self._terms is not None and self._lhs_metadata is not None
+        dims = self.dimensions
+        if dims is None:
+            data = self._terms.drop(CONSTRAINT_KEY)
+        else:
+            data = self._terms.join(
+                self.data.select(dims + [CONSTRAINT_KEY]), on=CONSTRAINT_KEY, how="left"
+            ).select(*dims, COEF_KEY, VAR_KEY)
+        lhs = Expression(data)
+        lhs._inherit_metadata(self._lhs_metadata)
+        lhs._model = self._model
+        return lhs
+
+    @lhs.setter
+    def lhs(self, value: Expression):
+        if self._lhs is None:
+            raise PyoframeError(
+                f"Cannot modify constraint '{self.name}' since the model is frozen."
+            )
+        self._lhs = value
+
+    def _compact_terms(self) -> pl.DataFrame:
+        """
+        Returns the terms of the left hand side keyed by constraint id rather than by the (wider) dimensions
+        and releases the left hand side. Used by `Model.freeze`.
+        """
+        lhs = self.lhs
+        dims = self.dimensions
+        if dims is None:
+            terms = lhs.data.select(
+                pl.lit(self.data.get_column(CONSTRAINT_KEY).item(), pl.UInt32).alias(
+                    CONSTRAINT_KEY
+                ),
+                COEF_KEY,
+                VAR_KEY,
+            )
+        else:
+            terms = lhs.data.join(
+                self.data.select(dims + [CONSTRAINT_KEY]), on=dims, how="left"
+            ).select(CONSTRAINT_KEY, COEF_KEY, VAR_KEY)
+        self._lhs_metadata = lhs._metadata
+        self._lhs = None
+        return terms
+
     @property
     @unwrap_single_values
     def slack(self):
@@ -938,7 +1805,10 @@ class Constraint(ModelElementWithId):
             if self._model.solver is None:
                 raise ValueError("The model has not been solved yet.")
             self._model.solver.load_slack()
-        return self.data.select(self.dimensions_unsafe + [SLACK_COL])
+        return _decode_result(
+            self.data.select(self.dimensions_unsafe + [SLACK_COL]),
+            self.dimensions_unsafe,
+        )
 
     @slack.setter
     def slack(self, value):
@@ -949,7 +1819,10 @@ class Constraint(ModelElementWithId):
     def dual(self) -> Union[pl.DataFrame, float]:
         if DUAL_KEY not in self.data.columns:
             raise ValueError(f"No dual values founds for constraint '{self.name}'")
-        return self.data.select(self.dimensions_unsafe + [DUAL_KEY])
+        return _decode_result(
+            self.data.select(self.dimensions_unsafe + [DUAL_KEY]),
+            self.dimensions_unsafe,
+        )
 
     @dual.setter
     def dual(self, value):
@@ -959,20 +1832,20 @@ class Constraint(ModelElementWithId):
     def get_id_column_name(cls):
         return CONSTRAINT_KEY
 
-    def to_str_create_prefix(self, data, const_map=None):
+    def to_str_create_prefix(self, data, const_map=None, ids=None):
         if const_map is None:
             return self.lhs.to_str_create_prefix(data)
 
-        data_map = const_map.apply(self.ids, to_col=None)
+        data_map = const_map.apply(self.ids if ids is None else ids, to_col=None)
 
         if self.dimensions is None:
             assert data.height == 1
             prefix = data_map.select(pl.col(CONSTRAINT_KEY)).item()
-            return data.select(
+            return data.with_columns(
                 pl.concat_str(pl.lit(f"{prefix}: "), "expr").alias("expr")
             )
 
-        data = data.join(data_map, on=self.dimensions)
+        data = data.join(data_map, on=self.dimensions, how="left", coalesce=True)
         return data.with_columns(
             pl.concat_str(CONSTRAINT_KEY, pl.lit(": "), "expr").alias("expr")
         ).drop(CONSTRAINT_KEY)
@@ -1086,21 +1959,130 @@ class Constraint(ModelElementWithId):
         float_precision=None,
         const_map=None,
     ) -> str:
+        return self._to_str(
+            self.lhs,
+            max_line_len=max_line_len,
+            max_rows=max_rows,
+            var_map=var_map,
+            float_precision=float_precision,
+            const_map=const_map,
+        )
+
+    def to_str_chunks(
+        self, chunk_size: int, var_map=None, float_precision=None, const_map=None
+    ) -> Iterator[str]:
+        """
+        Yields the lines of `to_str()` in chunks of at most `chunk_size` indices, such that writing a large
+        constraint never requires the string of the entire constraint (see `io.to_file`).
+
+        Examples:
+            >>> import pyoframe as pf
+            >>> m = pf.Model("min")
+            >>> m.x = pf.Variable({"t": [3, 1, 2]})
+            >>> m.con = m.x + 1 <= 4
+            >>> list(m.con.to_str_chunks(2, var_map=m.var_map))
+            ['[1]: x[1] <= 3\\n[2]: x[2] <= 3', '[3]: x[3] <= 3']
+        """
+        for _, render in self._chunk_renderers(
+            chunk_size,
+            var_map=var_map,
+            float_precision=float_precision,
+            const_map=const_map,
+        ):
+            yield render()
+
+    def _chunk_renderers(
+        self, chunk_size: int, var_map=None, float_precision=None, const_map=None
+    ) -> Iterator[Tuple[int, Callable[[], str]]]:
+        """
+        Yields the number of indices of each chunk of `to_str_chunks` and a function that renders the chunk.
+        The chunks are split up beforehand such that the functions can be called concurrently (see `io.constraints_to_file`).
+        """
         dims = self.dimensions
-        str_table = self.lhs.to_str_table(
+        frozen = self._lhs is None
+        if dims is None or (not frozen and len(self) <= chunk_size):
+            yield len(self), partial(
+                self.to_str,
+                var_map=var_map,
+                float_precision=float_precision,
+                const_map=const_map,
+            )
+            return
+
+        # Number the indices in the order in which they're written, and sort the terms accordingly.
+        position = "__position"
+        ids = self.data.select(dims + [CONSTRAINT_KEY])
+        if frozen:
+            # Read straight from the model's term store (see Model.freeze) rather than rebuilding the left hand side
+            data = self._terms.join(
+                ids.sort(dims).with_row_index(position), on=CONSTRAINT_KEY
+            ).sort(position, maintain_order=True)
+        elif self.lhs._is_sorted_by(dims):
+            # The constraint's indices are in the order of the left hand side (see __init__)
+            data = self.lhs.data.with_columns(
+                (_index_boundaries(dims).cum_sum() - 1).cast(pl.UInt32).alias(position)
+            ).join(ids.select(CONSTRAINT_KEY).with_row_index(position), on=position)
+        else:
+            data = self.lhs.data.join(
+                ids.sort(dims).with_row_index(position), on=dims
+            ).sort(position, maintain_order=True)
+
+        bounds = data.get_column(position).search_sorted(
+            pl.Series(range(0, len(self) + chunk_size, chunk_size), dtype=pl.UInt32)
+        )
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            chunk = data.slice(start, end - start)
+            chunk_lhs = Expression(chunk.select(*dims, COEF_KEY, VAR_KEY))
+            # Each chunk is sorted like the whole constraint's output
+            chunk_lhs._inherit_metadata(
+                ElementMetadata(tuple(dims), sorted_by=tuple(dims))
+            )
+            chunk_ids = chunk.filter(_index_boundaries([position])).select(ids.columns)
+            yield chunk_ids.height, partial(
+                self._to_str,
+                chunk_lhs,
+                ids=chunk_ids,
+                var_map=var_map,
+                float_precision=float_precision,
+                const_map=const_map,
+            )
+
+    def _to_str(
+        self,
+        lhs: Expression,
+        ids=None,
+        max_line_len=None,
+        max_rows=None,
+        var_map=None,
+        float_precision=None,
+        const_map=None,
+    ) -> str:
+        """Writes the constraint given its left hand side, or part of it (see to_str_chunks)."""
+        dims = self.dimensions
+        # The right hand side is summed up in the same pass that writes the left hand side
+        str_table = lhs.to_str_table(
             max_line_len=max_line_len,
             max_rows=max_rows,
-            include_const_term=False,
             var_map=var_map,
+            const_column="rhs",
+        )
+        if dims and not lhs._is_sorted_by(dims):
+            str_table = str_table.sort(dims)
+        if const_map is None:
+            str_table = lhs.to_str_create_prefix(str_table)
+        else:
+            str_table = self.to_str_create_prefix(
+                str_table, const_map=const_map, ids=ids
+            )
+        constr_str = cast_coef_to_string(
+            str_table.with_columns(pl.col("rhs") * -1),
+            column_name="rhs",
+            drop_ones=False,
+            float_precision=float_precision,
         )
-        str_table = self.to_str_create_prefix(str_table, const_map=const_map)
-        rhs = self.lhs.constant_terms.with_columns(pl.col(COEF_KEY) * -1)
-        rhs = cast_coef_to_string(rhs, drop_ones=False, float_precision=float_precision)
         # Remove leading +
-        rhs = rhs.with_columns(pl.col(COEF_KEY).str.strip_chars(characters=" +"))
-        rhs = rhs.rename({COEF_KEY: "rhs"})
-        constr_str = pl.concat(
-            [str_table, rhs], how=("align" if dims else "horizontal")
+        constr_str = constr_str.with_columns(
+            pl.col("rhs").str.strip_chars(characters=" +")
         )
         constr_str = constr_str.select(
             pl.concat_str("expr", pl.lit(f" {self.sense.value} "), "rhs").str.concat(
@@ -1117,7 +2099,7 @@ class Constraint(ModelElementWithId):
                 sense=f"'{self.sense.value}'",
                 size=len(self),
                 dimensions=self.shape,
-                terms=len(self.lhs.data),
+                terms=self.lhs._height,
             )
             + "\n"
             + self.to_str(max_line_len=80, max_rows=15)
@@ -1183,11 +2165,22 @@ class Variable(ModelElementWithId, SupportsMath, SupportPolarsMethodMixin):
             ), "Cannot specify both 'equals' and 'indexing_sets'"
             indexing_sets = (equals,)
 
-        data = Set(*indexing_sets).data if len(indexing_sets) > 0 else pl.DataFrame()
-        super().__init__(data)
+        if len(indexing_sets) > 0:
+            indexing_set = Set(*indexing_sets)
+            super().__init__(indexing_set.data)
+            self._update_metadata(
+                unique=True,
+                shape=indexing_set._metadata.shape,
+                index_token=indexing_set._metadata.index_token,
+            )
+        else:
+            super().__init__(pl.DataFrame())
+            self._update_metadata(unique=True)
 
         self.vtype: VType = VType(vtype)
         self._equals = equals
+        # The data of to_expr() and the variable data it was created from (see to_expr())
+        self._expr_data: Optional[Tuple[pl.DataFrame, pl.DataFrame]] = None
 
         # Tightening the bounds is not strictly necessary, but it adds clarity
         if self.vtype == VType.BINARY:
@@ -1222,7 +2215,10 @@ class Variable(ModelElementWithId, SupportsMath, SupportPolarsMethodMixin):
         if SOLUTION_KEY not in self.data.columns:
             raise ValueError(f"No solution solution found for Variable '{self.name}'.")
 
-        return self.data.select(self.dimensions_unsafe + [SOLUTION_KEY])
+        return _decode_result(
+            self.data.select(self.dimensions_unsafe + [SOLUTION_KEY]),
+            self.dimensions_unsafe,
+        )
 
     @property
     @unwrap_single_values
@@ -1239,7 +2235,9 @@ class Variable(ModelElementWithId, SupportsMath, SupportPolarsMethodMixin):
             if self._model.solver is None:
                 raise ValueError("The model has not been solved yet.")
             self._model.solver.load_rc()
-        return self.data.select(self.dimensions_unsafe + [RC_COL])
+        return _decode_result(
+            self.data.select(self.dimensions_unsafe + [RC_COL]), self.dimensions_unsafe
+        )
 
     @RC.setter
     def RC(self, value):
@@ -1252,17 +2250,47 @@ class Variable(ModelElementWithId, SupportsMath, SupportPolarsMethodMixin):
     def __repr__(self):
         return (
             get_obj_repr(
-                self, ("name", "lb", "ub"), size=self.data.height, dimensions=self.shape
+                self, ("name", "lb", "ub"), size=self._height, dimensions=self.shape
             )
             + "\n"
             + self.to_expr().to_str(max_line_len=80, max_rows=10)
         )
 
     def to_expr(self) -> Expression:
-        return self._new(self.data.drop(SOLUTION_KEY))
+        # Variables are converted to expressions by almost every operation so the expression's data is
+        # reused as long as the variable's data doesn't change (e.g. when the solution is loaded)
+        if self._expr_data is None or self._expr_data[0] is not self._data:
+            self._expr_data = (
+                self._data,
+                self._with_coefficients(self.data.drop(SOLUTION_KEY)),
+            )
+        constant_only = self._height == 0
+        return self._wrap(
+            self._expr_data[1], replace(self._metadata, constant_only=constant_only)
+        )
 
-    def _new(self, data: pl.DataFrame):
-        e = Expression(data.with_columns(pl.lit(1.0).alias(COEF_KEY)))
+    @staticmethod
+    def _with_coefficients(data: pl.DataFrame) -> pl.DataFrame:
+        """Adds a coefficient of 1 to every row (the columns are ordered as expected by Expression)."""
+        return data.select(
+            pl.exclude(RESERVED_COL_KEYS),
+            pl.lit(1.0, Config.coefficient_dtype).alias(COEF_KEY),
+            *(
+                col
+                for col in RESERVED_COL_KEYS
+                if col in data.columns and col != COEF_KEY
+            ),
+        )
+
+    def _new(self, data: pl.DataFrame, metadata: Optional[ElementMetadata] = None):
+        return self._wrap(self._with_coefficients(data), metadata)
+
+    def _wrap(
+        self, data: pl.DataFrame, metadata: Optional[ElementMetadata]
+    ) -> Expression:
+        """Returns an expression of the data (which includes the coefficients)."""
+        e = Expression(data)
+        e._inherit_metadata(metadata)
         e._model = self._model
         # We propogate the unmatched strategy intentionally. Without this a .keep_unmatched() on a variable would always be lost.
         e.unmatched_strategy = self.unmatched_strategy
@@ -1272,6 +2300,7 @@ class Variable(ModelElementWithId, SupportsMath, SupportPolarsMethodMixin):
     def next(self, dim: str, wrap_around: bool = False) -> Expression:
         """
         Creates an expression where the variable at each index is the next variable in the specified dimension.
+        See `Expression.shift()` for other offsets.
 
         Parameters:
             dim:
@@ -1326,15 +2355,22 @@ class Variable(ModelElementWithId, SupportsMath, SupportPolarsMethodMixin):
             [18:00,Toronto]: bat_charge[18:00,Toronto] + bat_flow[18:00,Toronto] - bat_charge[00:00,Toronto] = 0
         """
 
-        wrapped = self.data.select(dim).unique(maintain_order=True).sort(by=dim)
+        expr = self.to_expr()
+        if expr._is_sorted_by([dim]):
+            wrapped = self.data.filter(_index_boundaries([dim])).select(dim)
+        else:
+            wrapped = self.data.select(dim).unique(maintain_order=True).sort(by=dim)
         wrapped = wrapped.with_columns(pl.col(dim).shift(-1).alias("__next"))
         if wrap_around:
             wrapped = wrapped.with_columns(pl.col("__next").fill_null(pl.first(dim)))
         else:
-            wrapped = wrapped.drop_nulls(dim)
+            wrapped = wrapped.drop_nulls("__next")
 
-        expr = self.to_expr()
         data = expr.data.rename({dim: "__prev"})
+        if not wrap_around and _can_merge_join(expr, expr, [dim]):
+            # Both keys are sorted (the next values are the sorted values shifted by one)
+            data = data.with_columns(pl.col("__prev").set_sorted())
+            wrapped = wrapped.with_columns(pl.col("__next").set_sorted())
         data = data.join(
             wrapped, left_on="__prev", right_on="__next", how="inner"
         ).drop(["__prev", "__next"])
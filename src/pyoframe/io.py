@@ -2,14 +2,40 @@
 Module containing all import/export functionalities.
 """
 
+import gzip
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import TextIOWrapper
 from tempfile import NamedTemporaryFile
 from pathlib import Path
-from typing import TYPE_CHECKING, Iterable, Optional, TypeVar, Union
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    TypeVar,
+    Union,
+)
 from tqdm import tqdm
 
-from pyoframe.constants import CONST_TERM, VAR_KEY, ObjSense
+from pyoframe.constants import (
+    COEF_KEY,
+    CONST_TERM,
+    CONSTRAINT_KEY,
+    VAR_KEY,
+    ConstraintSense,
+    ObjSense,
+    PyoframeError,
+    VType,
+)
 from pyoframe.core import Constraint, Variable
+from pyoframe.profiling import profiled
 from pyoframe.io_mappers import (
     Base36ConstMapper,
     Base36VarMapper,
@@ -24,7 +50,11 @@ if TYPE_CHECKING:  # pragma: no cover
 
 import polars as pl
 
+# Number of rows of a constraint or variable that are written to a file at once
+DEFAULT_CHUNK_SIZE = 100_000
 
+
+@profiled
 def objective_to_file(m: "Model", f: TextIOWrapper, var_map):
     """
     Write out the objective of a model to a lp file.
@@ -33,20 +63,74 @@ def objective_to_file(m: "Model", f: TextIOWrapper, var_map):
         return
     objective_sense = "minimize" if m.sense == ObjSense.MIN else "maximize"
     f.write(f"{objective_sense}\n\nobj:\n\n")
-    result = m.objective.to_str(
+    result = m.objective._materialize().to_str(
         var_map=var_map, include_prefix=False, include_const_variable=True
     )
     f.write(result)
 
 
-def constraints_to_file(m: "Model", f: TextIOWrapper, var_map, const_map):
-    for constraint in create_section(
-        tqdm(m.constraints, desc="Writing constraints to file"), f, "s.t."
-    ):
-        f.write(constraint.to_str(var_map=var_map, const_map=const_map) + "\n")
+@profiled
+def constraints_to_file(
+    m: "Model",
+    f: TextIOWrapper,
+    var_map,
+    const_map,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    max_workers: Optional[int] = None,
+):
+    # The number of constraints in each chunk, in the order in which the chunks are written
+    chunk_rows: Deque[int] = deque()
+
+    def renderers():
+        for constraint in create_section(m.constraints, f, "s.t."):
+            for rows, render in constraint._chunk_renderers(
+                chunk_size, var_map=var_map, const_map=const_map
+            ):
+                chunk_rows.append(rows)
+                yield render
+
+    with tqdm(
+        total=sum(len(constraint) for constraint in m.constraints),
+        desc="Writing constraints to file",
+    ) as progress:
+        for chunk in render_in_order(renderers(), max_workers):
+            f.write(chunk + "\n")
+            progress.update(chunk_rows.popleft())
+
+
+def render_in_order(
+    renderers: Iterable[Callable[[], str]], max_workers: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Calls the renderers on a thread pool of `max_workers` threads (defaults to the number of CPUs) and yields
+    their results in the order of the renderers.
+
+    Only a few renderers per thread are called ahead of the result being yielded such that the memory used
+    stays bounded.
+
+    Examples:
+        >>> list(render_in_order((lambda i=i: str(i) for i in range(5)), max_workers=2))
+        ['0', '1', '2', '3', '4']
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers == 1:
+        for render in renderers:
+            yield render()
+        return
 
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: Deque[Future] = deque()
+        for render in renderers:
+            pending.append(executor.submit(render))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
-def bounds_to_file(m: "Model", f, var_map):
+
+@profiled
+def bounds_to_file(m: "Model", f, var_map, chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Write out variables of a model to a lp file.
     """
@@ -74,43 +158,353 @@ def bounds_to_file(m: "Model", f, var_map):
         if len(terms) < 3:
             continue
 
-        df = (
-            var_map.apply(variable.data, to_col=None)
-            .select(pl.concat_str(terms).str.concat(""))
-            .item()
-        )
+        for chunk in variable.data.iter_slices(chunk_size):
+            f.write(
+                var_map.apply(chunk, to_col=None)
+                .select(pl.concat_str(terms).str.concat(""))
+                .item()
+            )
 
-        f.write(df)
 
-
-def binaries_to_file(m: "Model", f, var_map: Mapper):
+@profiled
+def binaries_to_file(m: "Model", f, var_map: Mapper, chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Write out binaries of a model to a lp file.
     """
     for variable in create_section(
         tqdm(m.binary_variables, "Writing binary variables to file"), f, "binary"
     ):
-        lines = (
-            var_map.apply(variable.data, to_col=None)
-            .select(pl.col(VAR_KEY).str.concat("\n"))
-            .item()
-        )
-        f.write(lines + "\n")
+        for chunk in variable.data.iter_slices(chunk_size):
+            lines = (
+                var_map.apply(chunk, to_col=None)
+                .select(pl.col(VAR_KEY).str.concat("\n"))
+                .item()
+            )
+            f.write(lines + "\n")
 
 
-def integers_to_file(m: "Model", f, var_map: Mapper):
+@profiled
+def integers_to_file(m: "Model", f, var_map: Mapper, chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Write out integers of a model to a lp file.
     """
     for variable in create_section(
         tqdm(m.integer_variables, "Writing integer variables to file"), f, "general"
     ):
-        lines = (
-            var_map.apply(variable.data, to_col=None)
-            .select(pl.col(VAR_KEY).str.concat("\n"))
-            .item()
+        for chunk in variable.data.iter_slices(chunk_size):
+            lines = (
+                var_map.apply(chunk, to_col=None)
+                .select(pl.col(VAR_KEY).str.concat("\n"))
+                .item()
+            )
+            f.write(lines + "\n")
+
+
+# Name of the objective's row in mps files
+MPS_OBJECTIVE_ROW = "obj"
+_MPS_SENSES = {
+    ConstraintSense.LE: "L",
+    ConstraintSense.GE: "G",
+    ConstraintSense.EQ: "E",
+}
+
+
+@profiled
+def mps_to_file(
+    m: "Model",
+    f: TextIOWrapper,
+    var_map: Mapper,
+    const_map: Mapper,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """
+    Write out a model to a free mps file.
+
+    Since mps files list the coefficients column by column, the terms of the objective and of all the constraints
+    are gathered in a single frame sorted by variable. No coefficient is formatted beyond polars' cast to a string.
+
+    Examples:
+        >>> import tempfile
+        >>> import pyoframe as pf
+        >>> m = pf.Model("max")
+        >>> m.x = pf.Variable({"t": [1, 2]}, lb=0, ub=4)
+        >>> m.y = pf.Variable(vtype=pf.VType.INTEGER, lb=-1)
+        >>> m.con = m.x + m.y.add_dim("t") <= 3
+        >>> m.objective = pf.sum(m.x) + 2 * m.y + 1
+        >>> path = m.to_file(Path(tempfile.mkdtemp()) / "model.mps", use_var_names=True)
+        >>> print(path.read_text())
+        NAME
+        OBJSENSE
+            MAX
+        ROWS
+         N  obj
+         L  con[1]
+         L  con[2]
+        COLUMNS
+            _ONE obj 1.0
+            x[1] obj 1.0
+            x[1] con[1] 1.0
+            x[2] obj 1.0
+            x[2] con[2] 1.0
+            MARKER 'MARKER' 'INTORG'
+            y obj 2.0
+            y con[1] 1.0
+            y con[2] 1.0
+            MARKER 'MARKER' 'INTEND'
+        RHS
+            RHS con[1] 3.0
+            RHS con[2] 3.0
+        BOUNDS
+         FX BND _ONE 1
+         UP BND x[1] 4
+         UP BND x[2] 4
+         LO BND y -1
+         PL BND y
+        ENDATA
+        <BLANKLINE>
+    """
+    _check_mps_names(var_map, const_map)
+    f.write("NAME" + (f" {m.name}" if m.name else "") + "\n")
+    f.write("OBJSENSE\n    " + ("MIN" if m.sense == ObjSense.MIN else "MAX") + "\n")
+
+    f.write(f"ROWS\n N  {MPS_OBJECTIVE_ROW}\n")
+    for constraint in m.constraints:
+        rows = const_map.apply(constraint.data.select(CONSTRAINT_KEY))
+        _write_lines(
+            f,
+            rows.select(
+                pl.concat_str(
+                    pl.lit(f" {_MPS_SENSES[constraint.sense]}  "), CONSTRAINT_KEY
+                )
+            ),
+            chunk_size,
         )
-        f.write(lines + "\n")
+
+    row = "__row"
+    terms = []
+    if m.objective is not None:
+        objective = m.objective._materialize().data
+        if not m.objective.has_constant:
+            objective = objective.filter(pl.col(VAR_KEY) != CONST_TERM)
+        terms.append(
+            objective.select(VAR_KEY, pl.lit(MPS_OBJECTIVE_ROW).alias(row), COEF_KEY)
+        )
+    # The constant terms of the constraints, written in the RHS section
+    rhs_terms = []
+    for constraint in m.constraints:
+        constraint_terms = _constraint_terms(constraint)
+        is_constant = pl.col(VAR_KEY) == CONST_TERM
+        rhs_terms.append(constraint_terms.filter(is_constant & (pl.col(COEF_KEY) != 0)))
+        constraint_terms = constraint_terms.filter(~is_constant)
+        if constraint_terms.height > 0:
+            terms.append(
+                const_map.apply(constraint_terms, to_col=row).select(
+                    VAR_KEY, row, COEF_KEY
+                )
+            )
+    terms = (
+        pl.concat(terms)
+        if terms
+        else pl.DataFrame(
+            schema={VAR_KEY: pl.UInt32, row: pl.String, COEF_KEY: pl.Float64}
+        )
+    )
+
+    # Every variable is listed, even those that don't appear in any constraint (with a 0 in the objective)
+    columns = {False: [], True: []}
+    if m.objective is not None and m.objective.has_constant:
+        columns[False].append(
+            pl.DataFrame({VAR_KEY: [CONST_TERM]}, schema={VAR_KEY: pl.UInt32})
+        )
+    for variable in m.variables:
+        columns[variable.vtype != VType.CONTINUOUS].append(
+            variable.data.select(VAR_KEY)
+        )
+
+    f.write("COLUMNS\n")
+    for integer in (False, True):
+        if not columns[integer]:
+            continue
+        if integer:
+            f.write("    MARKER 'MARKER' 'INTORG'\n")
+        column_terms = (
+            pl.concat(columns[integer])
+            .join(terms, on=VAR_KEY, how="left")
+            .with_columns(
+                pl.col(row).fill_null(MPS_OBJECTIVE_ROW), pl.col(COEF_KEY).fill_null(0)
+            )
+            .sort(VAR_KEY, maintain_order=True)
+        )
+        _write_lines(
+            f,
+            var_map.apply(column_terms).select(
+                pl.concat_str(
+                    pl.lit("    "),
+                    VAR_KEY,
+                    pl.lit(" "),
+                    row,
+                    pl.lit(" "),
+                    pl.col(COEF_KEY).cast(pl.String),
+                )
+            ),
+            chunk_size,
+        )
+        if integer:
+            f.write("    MARKER 'MARKER' 'INTEND'\n")
+
+    f.write("RHS\n")
+    for rhs in rhs_terms:
+        if rhs.height == 0:
+            continue
+        _write_lines(
+            f,
+            const_map.apply(rhs).select(
+                pl.concat_str(
+                    pl.lit("    RHS "),
+                    CONSTRAINT_KEY,
+                    pl.lit(" "),
+                    (-pl.col(COEF_KEY)).cast(pl.String),
+                )
+            ),
+            chunk_size,
+        )
+
+    f.write("BOUNDS\n")
+    if m.objective is not None and m.objective.has_constant:
+        const_term_df = pl.DataFrame(
+            {VAR_KEY: [CONST_TERM]}, schema={VAR_KEY: pl.UInt32}
+        )
+        f.write(f" FX BND {var_map.apply(const_term_df).item()} 1\n")
+    for variable in m.variables:
+        bounds = _mps_bounds(variable)
+        if not bounds:
+            continue
+        _write_lines(
+            f,
+            var_map.apply(variable.data.select(VAR_KEY)).select(
+                pl.concat_str(
+                    *[
+                        term
+                        for i, (bound_type, value) in enumerate(bounds)
+                        for term in (
+                            pl.lit(("\n" if i else "") + f" {bound_type} BND "),
+                            pl.col(VAR_KEY),
+                            pl.lit(value),
+                        )
+                    ]
+                )
+            ),
+            chunk_size,
+        )
+
+    f.write("ENDATA\n")
+
+
+def _check_mps_names(var_map: Mapper, const_map: Mapper):
+    """
+    Raises an error if a name can't be written to a free mps file: names are separated by whitespace (spaces
+    in dimensions are already replaced, see `concat_dimensions`) and the objective's row is named `MPS_OBJECTIVE_ROW`. Only names built from the model (see `NamedMapper`) are
+    checked since generated names (see `Base36Mapper`) are always valid.
+    """
+    for mapper, kind in ((var_map, "variable"), (const_map, "constraint")):
+        if not isinstance(mapper, NamedMapper):
+            continue
+        names = mapper.mapping_registry.get_column(Mapper.NAME_COL)
+        invalid = names.filter(names.str.contains(r"\s"))
+        if len(invalid) > 0:
+            raise PyoframeError(
+                f"Cannot write {kind} names containing whitespace to an mps file (e.g. {invalid[0]!r}). "
+                "Remove the whitespace from the names or dimensions, or write the file with use_var_names=False."
+            )
+        if kind == "constraint" and (names == MPS_OBJECTIVE_ROW).any():
+            raise PyoframeError(
+                f"Cannot write a constraint named '{MPS_OBJECTIVE_ROW}' to an mps file since it's the name of "
+                "the objective's row. Rename the constraint, or write the file with use_var_names=False."
+            )
+
+
+def _constraint_terms(constraint: Constraint) -> pl.DataFrame:
+    """The terms of the constraint's left hand side with the id of their constraint instead of their index."""
+    if constraint._terms is not None:
+        # The model is frozen: the terms are already keyed by constraint id (see Model.freeze)
+        return constraint._terms.select(CONSTRAINT_KEY, VAR_KEY, COEF_KEY)
+    dims = constraint.dimensions
+    terms = constraint.lhs.data
+    if dims is None:
+        return terms.select(
+            pl.lit(
+                constraint.data.get_column(CONSTRAINT_KEY).item(), dtype=pl.UInt32
+            ).alias(CONSTRAINT_KEY),
+            VAR_KEY,
+            COEF_KEY,
+        )
+    return terms.join(constraint.data, on=dims).select(
+        CONSTRAINT_KEY, VAR_KEY, COEF_KEY
+    )
+
+
+def _mps_bounds(variable: Variable) -> List[Tuple[str, str]]:
+    """The bound types and values of a variable (mps variables are continuous, >= 0 and unbounded above by default)."""
+    if variable.vtype == VType.BINARY:
+        return [("BV", "")]
+    lb, ub = variable.lb, variable.ub
+    if lb == float("-inf") and ub == float("inf"):
+        return [("FR", "")]
+    if lb == ub:
+        return [("FX", f" {lb:.12g}")]
+    bounds = []
+    if lb == float("-inf"):
+        bounds.append(("MI", ""))
+    # A negative upper bound alone would make some readers set the lower bound to -inf
+    elif lb != 0 or ub < 0:
+        bounds.append(("LO", f" {lb:.12g}"))
+    if ub != float("inf"):
+        bounds.append(("UP", f" {ub:.12g}"))
+    elif variable.vtype == VType.INTEGER:
+        # Some readers give integer variables an upper bound of 1 by default
+        bounds.append(("PL", ""))
+    return bounds
+
+
+def _write_lines(f, lines: pl.DataFrame, chunk_size: int):
+    """Writes the lines of a single column DataFrame in chunks of at most `chunk_size` lines."""
+    for chunk in lines.iter_slices(chunk_size):
+        f.write(chunk.to_series().str.concat("\n").item() + "\n")
+
+
+# Default compression level of each supported compressed file suffix (see to_file)
+COMPRESSION_LEVELS = {".gz": 6, ".zst": 3}
+
+
+def open_for_writing(
+    file_path: Path, compression_level: Optional[int] = None
+) -> TextIO:
+    """
+    Opens a file to write text to, compressing the text as it is written if the file's suffix is `.gz` or `.zst`.
+
+    Examples:
+        >>> import gzip, tempfile
+        >>> file_path = Path(tempfile.mkdtemp()) / "model.lp.gz"
+        >>> with open_for_writing(file_path) as f:
+        ...     _ = f.write("minimize")
+        >>> gzip.decompress(file_path.read_bytes())
+        b'minimize'
+    """
+    if file_path.suffix not in COMPRESSION_LEVELS:
+        return open(file_path, mode="w")
+    if compression_level is None:
+        compression_level = COMPRESSION_LEVELS[file_path.suffix]
+    if file_path.suffix == ".gz":
+        return gzip.open(file_path, mode="wt", compresslevel=compression_level)
+    try:
+        import zstandard
+    except ImportError as e:  # pragma: no cover
+        raise ImportError(
+            "Writing .zst files requires the zstandard package (pip install pyoframe[zstd])."
+        ) from e
+    return zstandard.open(
+        file_path, mode="wt", cctx=zstandard.ZstdCompressor(level=compression_level)
+    )
 
 
 T = TypeVar("T")
@@ -138,21 +532,36 @@ def get_var_map(m: "Model", use_var_names):
     return var_map
 
 
+@profiled
 def to_file(
-    m: "Model", file_path: Optional[Union[str, Path]] = None, use_var_names=False
+    m: "Model",
+    file_path: Optional[Union[str, Path]] = None,
+    use_var_names=False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: Optional[int] = None,
+    compression_level: Optional[int] = None,
 ) -> Path:
     """
-    Write out a model to a lp file.
+    Write out a model to a lp file or, if the file path ends with `.mps`, to a free mps file (see `mps_to_file`).
+
+    The file is compressed while it is written if the file path ends with `.gz` (gzip) or `.zst` (zstandard,
+    requires the `zstandard` package), e.g. `model.lp.gz` or `model.mps.zst`.
 
     Args:
         m: The model to write out.
         file_path: The path to write the model to. If None, a temporary file is created. The caller is responsible for
             deleting the file after use.
-        use_var_names: If True, variable names are used in the lp file. Otherwise, variable
-            indices are used.
+        use_var_names: If True, variable names are used in the file. Otherwise, variable
+            indices are used. Names may not contain spaces in mps files.
+        chunk_size: Constraints and variables are written in chunks of at most this many rows such that the
+            memory used to write the file doesn't depend on the size of the largest constraint or variable.
+        max_workers: The number of threads rendering the chunks of constraints concurrently (defaults to the
+            number of CPUs). The file is the same regardless of the number of threads.
+        compression_level: The compression level of compressed files (see `COMPRESSION_LEVELS` for the defaults).
+            Higher levels give smaller files but take longer to write.
 
     Returns:
-        The path to the lp file.
+        The path to the file.
     """
     if file_path is None:
         with NamedTemporaryFile(
@@ -161,7 +570,15 @@ def to_file(
             file_path = f.name
 
     file_path = Path(file_path)
-    assert file_path.suffix == ".lp", f"File format `{file_path.suffix}` not supported."
+    file_format = (
+        Path(file_path.stem).suffix
+        if file_path.suffix in COMPRESSION_LEVELS
+        else file_path.suffix
+    )
+    assert file_format in (
+        ".lp",
+        ".mps",
+    ), f"File format `{file_path.suffix}` not supported."
 
     if file_path.exists():
         file_path.unlink()
@@ -174,12 +591,17 @@ def to_file(
     var_map = get_var_map(m, use_var_names)
     m.io_mappers = IOMappers(var_map, const_map)
 
-    with open(file_path, mode="w") as f:
+    if file_format == ".mps":
+        with open_for_writing(file_path, compression_level) as f:
+            mps_to_file(m, f, var_map, const_map, chunk_size)
+        return file_path
+
+    with open_for_writing(file_path, compression_level) as f:
         objective_to_file(m, f, var_map)
-        constraints_to_file(m, f, var_map, const_map)
-        bounds_to_file(m, f, var_map)
-        binaries_to_file(m, f, var_map)
-        integers_to_file(m, f, var_map)
+        constraints_to_file(m, f, var_map, const_map, chunk_size, max_workers)
+        bounds_to_file(m, f, var_map, chunk_size)
+        binaries_to_file(m, f, var_map, chunk_size)
+        integers_to_file(m, f, var_map, chunk_size)
         f.write("\nend\n")
 
     return file_path
@@ -3,16 +3,16 @@ Defines various methods for mapping a variable or constraint to its string repre
 """
 
 from dataclasses import dataclass
-import math
 import string
 from abc import ABC, abstractmethod
 
 from typing import TYPE_CHECKING, Optional, Type, Union
+import numpy as np
 import polars as pl
+import pyarrow as pa
 from pyoframe.util import concat_dimensions
 from pyoframe.constants import CONST_TERM
 
-
 if TYPE_CHECKING:  # pragma: no cover
     from pyoframe.model import Variable
     from pyoframe.core import Constraint
@@ -108,14 +108,14 @@ class NamedVariableMapper(NamedMapper):
 
 
 class Base36Mapper(Mapper, ABC):
-    # Mapping between a base 36 character and its integer value
+    # The base 36 characters in the order of their integer value
     # Note: we must use only lowercase since Gurobi auto-converts variables that aren't in constraints to lowercase (kind of annoying)
-    _CHAR_TABLE = pl.DataFrame(
-        {"char": list(string.digits + string.ascii_lowercase)},
-    ).with_columns(pl.int_range(pl.len()).cast(pl.UInt32).alias("code"))
-
-    _BASE = _CHAR_TABLE.height  # _BASE = 36
-    _ZERO = _CHAR_TABLE.filter(pl.col("code") == 0).select("char").item()  # _ZERO = "0"
+    _CHARS = np.frombuffer(
+        (string.digits + string.ascii_lowercase).encode(), dtype=np.uint8
+    )
+    _BASE = len(_CHARS)  # _BASE = 36
+    # Number of ids converted at once by _to_base36 (bounds the memory of the intermediate arrays)
+    _BATCH_SIZE = 1 << 20
 
     @property
     @abstractmethod
@@ -129,24 +129,23 @@ class Base36Mapper(Mapper, ABC):
         if df.height == 0:
             return df
 
-        query = pl.concat_str(
-            pl.lit(self._prefix),
-            pl.col(self._ID_COL).map_batches(
-                Base36Mapper._to_base36,
-                return_dtype=pl.String,
-                is_elementwise=True,
-            ),
-        )
+        # Computed eagerly rather than with map_batches: a Python function called from polars' thread pool
+        # deadlocks when chunks are written concurrently (see io.render_in_order)
+        names = self._to_base36(df.get_column(self._ID_COL), prefix=self._prefix)
 
         if to_col is None:
             to_col = self._ID_COL
 
-        return df.with_columns(query.alias(to_col))
+        return df.with_columns(names.alias(to_col))
 
     @classmethod
-    def _to_base36(cls, int_col: pl.Series) -> pl.Series:
+    def _to_base36(cls, int_col: pl.Series, prefix: str = "") -> pl.Series:
         """Returns a series of dtype str with a base 36 representation of the integers in int_col.
-        The letters 0-9A-Z are used as symbols for the representation.
+        The letters 0-9a-z are used as symbols for the representation.
+
+        The names are built byte by byte with integer arithmetic: the digits of each id are written right-aligned
+        in a matrix of bytes with one row per id, and the bytes of the prefix and of the significant digits are
+        then read out in a single pass to form the string buffer.
 
         Examples:
 
@@ -158,36 +157,54 @@ class Base36Mapper(Mapper, ABC):
             >>> s = pl.Series([0], dtype=pl.UInt32)
             >>> Base36Mapper._to_base36(s).to_list()
             ['0']
+
+            >>> s = pl.Series([35, 36, 1295, 1296, 2**32 - 1], dtype=pl.UInt32)
+            >>> Base36Mapper._to_base36(s, prefix="x").to_list()
+            ['xz', 'x10', 'xzz', 'x100', 'x1z141z3']
         """
         assert isinstance(
             int_col.dtype, pl.UInt32
         ), "_to_base36() only works for UInt32 id columns"
+        assert int_col.null_count() == 0, "_to_base36() doesn't support null ids"
 
-        largest_id = int_col.max()
-        if largest_id == 0:
-            max_digits = 1
-        else:
-            max_digits = math.floor(math.log(largest_id, cls._BASE)) + 1  # type: ignore
+        ids = int_col.to_numpy()
+        prefix_bytes = np.frombuffer(prefix.encode(), dtype=np.uint8)
+        batches = [
+            cls._to_base36_batch(ids[start : start + cls._BATCH_SIZE], prefix_bytes)
+            for start in range(0, len(ids), cls._BATCH_SIZE)
+        ]
+        return pl.from_arrow(pa.chunked_array(batches, type=pa.large_string()))  # type: ignore
 
-        digits = []
-
-        for i in range(max_digits):
-            remainder = int_col % cls._BASE
-
-            digits.append(
-                remainder.to_frame(name="code")
-                .join(cls._CHAR_TABLE, on="code", how="left")
-                .select("char")
-                .rename({"char": f"digit{i}"})
-            )
-            int_col //= cls._BASE
-
-        return (
-            pl.concat(reversed(digits), how="horizontal")
-            .select(pl.concat_str(pl.all()))
-            .to_series()
-            .str.strip_chars_start(cls._ZERO)
-            .replace("", cls._ZERO)
+    @classmethod
+    def _to_base36_batch(cls, ids: np.ndarray, prefix: np.ndarray) -> pa.Array:
+        n_digits = np.ones(len(ids), dtype=np.int64)
+        power = cls._BASE
+        largest_id = ids.max()
+        while power <= largest_id:
+            n_digits += ids >= power
+            power *= cls._BASE
+        max_digits = int(n_digits.max())
+        width = len(prefix) + max_digits
+
+        # Right-aligned digits, most significant first
+        matrix = np.empty((len(ids), width), dtype=np.uint8)
+        remaining = ids.copy()
+        for digit in range(max_digits):
+            matrix[:, width - 1 - digit] = cls._CHARS[remaining % cls._BASE]
+            remaining //= cls._BASE
+
+        # The prefix goes right before the first significant digit
+        matrix[:, : len(prefix)] = prefix
+        shorter = np.flatnonzero(n_digits < max_digits)
+        for i, char in enumerate(prefix):
+            matrix[shorter, width - n_digits[shorter] - len(prefix) + i] = char
+
+        lengths = n_digits + len(prefix)
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        data = matrix[np.arange(width)[None, :] >= (width - lengths)[:, None]]
+        return pa.LargeStringArray.from_buffers(
+            len(ids), pa.py_buffer(offsets), pa.py_buffer(data)
         )
 
     def _element_to_map(self, element) -> pl.DataFrame:
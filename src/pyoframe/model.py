@@ -1,4 +1,4 @@
-from typing import Any, Iterable, List, Optional, Union
+from typing import Any, Iterable, List, Optional, Tuple, Union
 from pyoframe.constants import (
     ObjSense,
     VType,
@@ -14,6 +14,8 @@ from pyoframe.objective import Objective
 from pyoframe.user_defined import Container, AttrContainerMixin
 from pyoframe.core import Variable
 from pyoframe.io import to_file
+from pyoframe.profiling import record_assignment
+from pyoframe.scheduler import build
 from pyoframe.solvers import solve, Solver
 import polars as pl
 import pandas as pd
@@ -38,6 +40,7 @@ class Model(AttrContainerMixin):
         "attr",
         "sense",
         "objective",
+        "_frozen",
     ]
 
     def __init__(self, min_or_max: Union[ObjSense, ObjSenseValue], name=None, **kwargs):
@@ -55,6 +58,7 @@ class Model(AttrContainerMixin):
         self.solver_model: Optional[Any] = None
         self.params = Container()
         self.result: Optional[Result] = None
+        self._frozen = False
 
     @property
     def variables(self) -> List[Variable]:
@@ -74,11 +78,17 @@ class Model(AttrContainerMixin):
 
     @property
     def objective(self):
+        # Doesn't add the objective's pending terms such that `m.objective += expr` in a loop
+        # stays linear (see Objective.__iadd__); reading the objective's data adds them.
         return self._objective
 
     @objective.setter
     def objective(self, value):
-        value = Objective(value)
+        if self._frozen:
+            raise PyoframeError("Cannot set the objective since the model is frozen.")
+        # An objective of another model is copied such that the two models don't share its (pending) terms
+        if not isinstance(value, Objective) or value._model not in (None, self):
+            value = Objective(value)
         self._objective = value
         value.on_add_to_model(self, "objective")
 
@@ -94,23 +104,201 @@ class Model(AttrContainerMixin):
             isinstance(__value, ModelElement)
             and __name not in Model._reserved_attributes
         ):
+            if self._frozen:
+                raise PyoframeError(
+                    f"Cannot add '{__name}' to the model since the model is frozen."
+                )
             if isinstance(__value, ModelElementWithId):
                 assert not hasattr(
                     self, __name
                 ), f"Cannot create {__name} since it was already created."
 
-            __value.on_add_to_model(self, __name)
+            with record_assignment(__name, __value):
+                __value.on_add_to_model(self, __name)
 
-            if isinstance(__value, Variable):
-                self._variables.append(__value)
-                if self.var_map is not None:
-                    self.var_map.add(__value)
-            elif isinstance(__value, Constraint):
-                self._constraints.append(__value)
+                if isinstance(__value, Variable):
+                    self._variables.append(__value)
+                    if self.var_map is not None:
+                        self.var_map.add(__value)
+                elif isinstance(__value, Constraint):
+                    self._constraints.append(__value)
         return super().__setattr__(__name, __value)
 
+    @property
+    def frozen(self) -> bool:
+        """Whether the model has been frozen (see `freeze`)."""
+        return self._frozen
+
+    def freeze(self) -> "Model":
+        """
+        Releases the state that is only needed while the model is being built, to reduce the model's memory.
+        Call it once all variables, constraints and the objective have been added (e.g. before solving).
+
+        The terms of all constraints are moved into a single store that identifies each term by its
+        constraint id rather than by the constraint's dimensions. Files are written straight from the store and the
+        left hand side of a constraint is only rebuilt when it is accessed (e.g. `constraint.lhs`). Cached data of the
+        variables is dropped. Afterwards, no elements can be added to the model and constraints can't be
+        modified (e.g. relaxed).
+
+        Returns:
+            The model itself.
+
+        Examples:
+            >>> import pyoframe as pf
+            >>> m = pf.Model("min")
+            >>> m.x = pf.Variable({"t": [1, 2]}, lb=0)
+            >>> m.con = 2 * m.x >= pl.DataFrame({"t": [1, 2], "demand": [4, 6]})
+            >>> m.objective = pf.sum(m.x)
+            >>> m.freeze().frozen
+            True
+            >>> m.con
+            <Constraint name=con sense='>=' size=2 dimensions={'t': 2} terms=4>
+            [1]: 2 x[1] >= 4
+            [2]: 2 x[2] >= 6
+            >>> m.y = pf.Variable()
+            Traceback (most recent call last):
+            ...
+            pyoframe.constants.PyoframeError: Cannot add 'y' to the model since the model is frozen.
+        """
+        if self._frozen:
+            return self
+        if self._objective is not None:
+            self._objective._materialize().collect()
+        terms = [constraint._compact_terms() for constraint in self._constraints]
+        if terms:
+            # A single contiguous store of which every constraint holds a (zero-copy) slice
+            store = pl.concat(terms, rechunk=True)
+            offset = 0
+            for constraint, constraint_terms in zip(self._constraints, terms):
+                constraint._terms = store.slice(offset, constraint_terms.height)
+                offset += constraint_terms.height
+        for variable in self._variables:
+            variable._expr_data = None
+        self._frozen = True
+        return self
+
+    def memory_report(self, top: Optional[int] = None) -> pl.DataFrame:
+        """
+        Returns the estimated memory (in bytes, see polars' `DataFrame.estimated_size`) used by each part of the
+        model, largest first. The size of a constraint includes its left hand side and the size of a variable
+        includes the expression data it caches (see `Variable.to_expr`). For variables, constraints and the
+        objective, `bytes_per_term` is the memory divided by the number of terms (for variables, one term per variable).
+
+        The report doesn't compute anything: lazy elements that haven't been collected (see `Config.lazy_expressions`)
+        have no bytes (nor rows unless already known), and the objective's pending terms (see `Objective.__iadd__`) aren't counted.
+
+        Parameters:
+            top: If given, only the `top` largest parts are returned.
+
+        Examples:
+            >>> import pyoframe as pf
+            >>> m = pf.Model("min")
+            >>> m.x = pf.Variable({"t": range(100)}, lb=0)
+            >>> m.y = pf.Variable()
+            >>> m.con = m.x + m.y.add_dim("t") >= 1
+            >>> m.objective = pf.sum(m.x)
+            >>> report = m.memory_report()
+            >>> report.drop("bytes", "bytes_per_term").sort("name")
+            shape: (5, 4)
+            ┌───────────┬────────────┬──────┬───────┐
+            │ name      ┆ kind       ┆ rows ┆ terms │
+            │ ---       ┆ ---        ┆ ---  ┆ ---   │
+            │ str       ┆ str        ┆ u32  ┆ u32   │
+            ╞═══════════╪════════════╪══════╪═══════╡
+            │ con       ┆ constraint ┆ 100  ┆ 300   │
+            │ objective ┆ objective  ┆ 1    ┆ 100   │
+            │ var_map   ┆ mapper     ┆ 102  ┆ null  │
+            │ x         ┆ variable   ┆ 100  ┆ 100   │
+            │ y         ┆ variable   ┆ 1    ┆ 1     │
+            └───────────┴────────────┴──────┴───────┘
+            >>> report.get_column("bytes").is_sorted(descending=True, nulls_last=True)
+            True
+        """
+        rows = []
+        for variable in self._variables:
+            data = variable._data
+            size = data.estimated_size()
+            cache = variable._expr_data
+            if cache is not None and cache[0] is data:
+                # The cached expression data shares the variable's columns, only its other columns take up memory
+                size += cache[1].select(pl.exclude(data.columns)).estimated_size()
+            rows.append((variable.name, "variable", data.height, data.height, size))
+        for constraint in self._constraints:
+            if constraint._lhs is None:  # frozen (see freeze())
+                lhs = constraint._terms
+            else:
+                lhs = constraint._lhs._data
+            rows.append(
+                (
+                    constraint.name,
+                    "constraint",
+                    *_frame_size(constraint._data, lhs),
+                )
+            )
+        if self._objective is not None:
+            _, terms, size = _frame_size(self._objective._data)
+            if terms is None:
+                terms = self._objective._metadata.height
+            rows.append(("objective", "objective", 1, terms, size))
+
+        mappers = {}
+        if self.var_map is not None:
+            mappers[id(self.var_map)] = ("var_map", self.var_map)
+        if self.io_mappers is not None:
+            for name in ("var_map", "const_map"):
+                mapper = getattr(self.io_mappers, name)
+                mappers.setdefault(id(mapper), (name, mapper))
+        for name, mapper in mappers.values():
+            registry = mapper.mapping_registry
+            rows.append(
+                (name, "mapper", registry.height, None, registry.estimated_size())
+            )
+
+        if self.result is not None and self.result.solution is not None:
+            for name in ("primal", "dual"):
+                df = getattr(self.result.solution, name)
+                if df is not None:
+                    rows.append((name, "result", df.height, None, df.estimated_size()))
+
+        report = pl.DataFrame(
+            rows,
+            schema={
+                "name": pl.String,
+                "kind": pl.String,
+                "rows": pl.UInt32,
+                "terms": pl.UInt32,
+                "bytes": pl.UInt64,
+            },
+            orient="row",
+        )
+        report = report.with_columns(
+            (pl.col("bytes") / pl.col("terms")).alias("bytes_per_term")
+        ).sort("bytes", descending=True, nulls_last=True, maintain_order=True)
+        return report if top is None else report.head(top)
+
     def __repr__(self) -> str:
         return f"""Model '{self.name}' ({len(self.variables)} vars, {len(self.constraints)} constrs, {1 if self.objective else "no"} obj)"""
 
     to_file = to_file
     solve = solve
+    build = build
+
+
+def _frame_size(
+    data: Union[pl.DataFrame, pl.LazyFrame],
+    terms: Optional[Union[pl.DataFrame, pl.LazyFrame]] = None,
+) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """
+    Returns the rows of `data`, the rows of `terms` (or of `data` if not given) and their estimated size in bytes.
+    LazyFrames aren't collected, their rows and size are unknown (None).
+    """
+    terms = data if terms is None else terms
+    frames = [data] if terms is data else [data, terms]
+    size = None
+    if all(isinstance(frame, pl.DataFrame) for frame in frames):
+        size = sum(frame.estimated_size() for frame in frames)
+    return (
+        data.height if isinstance(data, pl.DataFrame) else None,
+        terms.height if isinstance(terms, pl.DataFrame) else None,
+        size,
+    )
@@ -1,12 +1,21 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from collections import defaultdict
-from typing import Any, Dict, List, Optional
+import threading
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
 import polars as pl
 from typing import TYPE_CHECKING
 
-from pyoframe.constants import COEF_KEY, RESERVED_COL_KEYS, VAR_KEY
-from pyoframe._arithmetic import _get_dimensions
+from pyoframe.constants import (
+    COEF_KEY,
+    CONST_TERM,
+    RESERVED_COL_KEYS,
+    VAR_KEY,
+    Config,
+)
+from pyoframe._arithmetic import _sorted_prefix
+from pyoframe.util import ElementMetadata, derive_index_token
 from pyoframe.user_defined import AttrContainerMixin
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -14,27 +23,42 @@ if TYPE_CHECKING:  # pragma: no cover
 
 
 class ModelElement(ABC):
-    def __init__(self, data: pl.DataFrame, **kwargs) -> None:
-        # Sanity checks, no duplicate column names
-        assert len(data.columns) == len(
-            set(data.columns)
-        ), "Duplicate column names found."
-
-        cols = _get_dimensions(data)
-        if cols is None:
-            cols = []
-        cols += [col for col in RESERVED_COL_KEYS if col in data.columns]
+    def __init__(self, data: pl.DataFrame | pl.LazyFrame, **kwargs) -> None:
+        # Resolved once (resolving the schema of a LazyFrame requires going through its query plan).
+        # Polars frames can't have duplicate column names so there's no need to check for them.
+        schema = data.schema
+        dims = [col for col in schema if col not in RESERVED_COL_KEYS] or None
+        cols = [] if dims is None else list(dims)
+        cols += [col for col in RESERVED_COL_KEYS if col in schema]
+
+        # Frames created by pyoframe are usually already consistent, in which case DataFrames are stored as is
+        # rather than copied. LazyFrames are always normalized since, depending on the shape of the
+        # query plan, polars may otherwise collect the columns in a different order than the schema's.
+        normalize = isinstance(data, pl.LazyFrame)
 
         # Reorder columns to keep things consistent
-        data = data.select(cols)
+        if normalize or list(schema) != cols:
+            data = data.select(cols)
 
         # Cast to proper dtype
-        if COEF_KEY in data.columns:
-            data = data.cast({COEF_KEY: pl.Float64})
-        if VAR_KEY in data.columns:
-            data = data.cast({VAR_KEY: pl.UInt32})
+        casts = {
+            col: dtype
+            for col, dtype in (
+                (COEF_KEY, Config.coefficient_dtype),
+                (VAR_KEY, pl.UInt32),
+            )
+            if col in schema and (normalize or schema[col] != dtype)
+        }
+        if casts:
+            data = data.cast(casts)
 
         self._data = data
+        self._lazy = isinstance(data, pl.LazyFrame)
+        self._metadata = ElementMetadata(
+            None if dims is None else tuple(dims),
+            # Known for free for eager data (and used e.g. by Expression.explain without running lazy queries)
+            height=None if self._lazy else data.height,
+        )
         self._model: Optional[Model] = None
         self.name = None
         super().__init__(**kwargs)
@@ -45,8 +69,38 @@ class ModelElement(ABC):
 
     @property
     def data(self) -> pl.DataFrame:
+        """
+        The element's data. Lazy elements (see `Config.lazy_expressions`) are collected on first access.
+        """
+        if isinstance(self._data, pl.LazyFrame):
+            self._data = self._data.collect()
         return self._data
 
+    def collect(self):
+        """
+        Materializes the element's data if the element is lazy (see `Config.lazy_expressions`). Returns the element itself.
+
+        Examples:
+            >>> import pyoframe as pf
+            >>> pf.Config.lazy_expressions = True
+            >>> expr = pf.Set(x=[1, 2, 3]).to_expr() * 2
+            >>> type(expr._data).__name__
+            'LazyFrame'
+            >>> type(expr.collect()._data).__name__
+            'DataFrame'
+            >>> pf.Config.lazy_expressions = False
+        """
+        self.data
+        return self
+
+    @property
+    def _frame(self) -> pl.DataFrame | pl.LazyFrame:
+        """
+        The data as a LazyFrame if the element is lazy, otherwise as a DataFrame.
+        Operations should build on this rather than on `data` to avoid collecting lazy elements.
+        """
+        return self._data.lazy() if self._lazy else self.data
+
     @property
     def friendly_name(self) -> str:
         return self.name if self.name is not None else "unnamed"
@@ -65,7 +119,8 @@ class ModelElement(ABC):
             >>> Variable([{"hour": ["00:00", "06:00", "12:00", "18:00"]}, {"city": ["Toronto", "Berlin", "Paris"]}]).dimensions
             ['hour', 'city']
         """
-        return _get_dimensions(self.data)
+        dims = self._metadata.dimensions
+        return None if dims is None else list(dims)
 
     @property
     def dimensions_unsafe(self) -> List[str]:
@@ -92,16 +147,76 @@ class ModelElement(ABC):
             >>> Variable([{"hour": ["00:00", "06:00", "12:00", "18:00"]}, {"city": ["Toronto", "Berlin", "Paris"]}]).shape
             {'hour': 4, 'city': 3}
         """
-        dims = self.dimensions
-        if dims is None:
-            return {}
-        return {dim: self.data[dim].n_unique() for dim in dims}
+        if self._metadata.shape is None:
+            data = self.data
+            self._update_metadata(
+                shape={dim: data[dim].n_unique() for dim in self.dimensions_unsafe}
+            )
+        return dict(self._metadata.shape)  # type: ignore
 
     def __len__(self) -> int:
-        dims = self.dimensions
-        if dims is None:
-            return 1
-        return self.data.select(dims).n_unique()
+        if self._metadata.size is None:
+            dims = self.dimensions
+            if dims is None:
+                size = 1
+            elif self._metadata.unique:
+                size = self._height
+            else:
+                size = self.data.select(dims).n_unique()
+            self._update_metadata(size=size)
+        return self._metadata.size  # type: ignore
+
+    @property
+    def _height(self) -> int:
+        """The number of rows in the data."""
+        if self._metadata.height is None:
+            self._update_metadata(height=self.data.height)
+        return self._metadata.height  # type: ignore
+
+    @property
+    def _constant_only(self) -> bool:
+        """Whether all the terms are constant terms (i.e. the data contains no variables)."""
+        if self._metadata.constant_only is None:
+            self._update_metadata(
+                constant_only=not (self.data.get_column(VAR_KEY) != CONST_TERM).any()
+            )
+        return self._metadata.constant_only  # type: ignore
+
+    @property
+    def _sorted_by(self) -> Tuple[str, ...]:
+        """
+        The longest prefix of the dimensions by which the data is sorted.
+        Uncollected lazy elements are treated as unsorted since checking would require collecting them.
+        """
+        if self._metadata.sorted_by is None:
+            if isinstance(self._data, pl.LazyFrame):
+                return ()
+            self._update_metadata(
+                sorted_by=_sorted_prefix(self._data, self.dimensions_unsafe)
+            )
+        return self._metadata.sorted_by  # type: ignore
+
+    def _is_sorted_by(self, dims: List[str]) -> bool:
+        """Whether the data is sorted by `dims` (in that order)."""
+        return tuple(dims) == self._sorted_by[: len(dims)]
+
+    def _update_metadata(self, **facts):
+        self._metadata = replace(self._metadata, **facts)
+
+    def _inherit_metadata(self, metadata: Optional[ElementMetadata]):
+        """
+        Takes on the facts of `metadata`, which must describe this element's data.
+        Used by operations that know the facts of the elements they create (e.g. multiplying by a scalar preserves the shape).
+        """
+        if metadata is None:
+            return
+        assert set(metadata.dimensions or ()) == set(
+            self._metadata.dimensions or ()
+        ), "Metadata doesn't match the element's dimensions."
+        height = self._metadata.height if metadata.height is None else metadata.height
+        self._metadata = replace(
+            metadata, dimensions=self._metadata.dimensions, height=height
+        )
 
 
 def _support_polars_method(method_name: str):
@@ -110,15 +225,45 @@ def _support_polars_method(method_name: str):
     """
 
     def method(self: "SupportPolarsMethodMixin", *args, **kwargs) -> Any:
-        result_from_polars = getattr(self.data, method_name)(*args, **kwargs)
-        if isinstance(result_from_polars, pl.DataFrame):
-            return self._new(result_from_polars)
+        data = self._frame
+        if not hasattr(data, method_name):
+            data = self.data
+        result_from_polars = getattr(data, method_name)(*args, **kwargs)
+        if isinstance(result_from_polars, (pl.DataFrame, pl.LazyFrame)):
+            return self._new(
+                result_from_polars,
+                _polars_method_metadata(self, method_name, args, kwargs),
+            )
         else:
             return result_from_polars
 
     return method
 
 
+def _polars_method_metadata(
+    element: "SupportPolarsMethodMixin", method_name: str, args, kwargs
+) -> Optional[ElementMetadata]:
+    """
+    Returns the metadata known after calling a Polars method. Only filtering on the values of dimensions
+    (e.g. `.filter(hour=1)`) is understood: it gives the same indices whenever it's applied to the same indices.
+    """
+    metadata = element._metadata
+    if (
+        method_name != "filter"
+        or args
+        or not set(kwargs) <= set(metadata.dimensions or ())
+    ):
+        return None
+    try:
+        operation = frozenset((k, type(v), v) for k, v in kwargs.items())
+    except TypeError:  # Unhashable values (e.g. lists)
+        return None
+    return ElementMetadata(
+        metadata.dimensions,
+        index_token=derive_index_token(metadata.index_token, "filter", operation),
+    )
+
+
 class SupportPolarsMethodMixin(ABC):
     rename = _support_polars_method("rename")
     with_columns = _support_polars_method("with_columns")
@@ -126,15 +271,20 @@ class SupportPolarsMethodMixin(ABC):
     estimated_size = _support_polars_method("estimated_size")
 
     @abstractmethod
-    def _new(self, data: pl.DataFrame):
+    def _new(self, data: pl.DataFrame, metadata: Optional[ElementMetadata] = None):
         """
         Used to create a new instance of the same class with the given data (for e.g. on .rename(), .with_columns(), etc.).
+        If known, the metadata of the new data can be provided to avoid recomputing it.
         """
 
     @property
     @abstractmethod
     def data(self): ...
 
+    @property
+    @abstractmethod
+    def _frame(self): ...
+
 
 class ModelElementWithId(ModelElement, AttrContainerMixin):
     """
@@ -145,6 +295,11 @@ class ModelElementWithId(ModelElement, AttrContainerMixin):
 
     # Keys are the subclass names and values are the next unasigned ID.
     _id_counters: Dict[str, int] = defaultdict(lambda: 1)
+    # Elements may be created concurrently (see Model.build) so IDs are assigned under a lock
+    _id_lock = threading.Lock()
+    # If `current` is set for the current thread, its `wait()` is called before assigning IDs and its `end()`
+    # after, such that concurrent builders assign their IDs in a fixed order (see scheduler.build)
+    _id_turn = threading.local()
 
     @classmethod
     def reset_counters(cls):
@@ -157,6 +312,8 @@ class ModelElementWithId(ModelElement, AttrContainerMixin):
     def __init__(self, data: pl.DataFrame, **kwargs) -> None:
         super().__init__(data, **kwargs)
         self._data = self._assign_ids(self.data)
+        # Dimensionless elements get their single row (and id) here
+        self._update_metadata(height=self._data.height)
 
     @classmethod
     def _assign_ids(cls, df: pl.DataFrame) -> pl.DataFrame:
@@ -165,18 +322,23 @@ class ModelElementWithId(ModelElement, AttrContainerMixin):
         of unique consecutive IDs.
         """
         cls_name = cls.__name__
-        cur_count = cls._id_counters[cls_name]
         id_col_name = cls.get_id_column_name()
 
-        if df.height == 0:
-            df = df.with_columns(pl.lit(cur_count).alias(id_col_name))
-        else:
-            df = df.with_columns(
-                pl.int_range(cur_count, cur_count + pl.len()).alias(id_col_name)
-            )
-        df = df.with_columns(pl.col(id_col_name).cast(pl.UInt32))
-        cls._id_counters[cls_name] += df.height
-        return df
+        turn = getattr(ModelElementWithId._id_turn, "current", None)
+        if turn is not None:
+            turn.wait()
+        with cls._id_lock:
+            cur_count = cls._id_counters[cls_name]
+            if df.height == 0:
+                df = df.with_columns(pl.lit(cur_count).alias(id_col_name))
+            else:
+                df = df.with_columns(
+                    pl.int_range(cur_count, cur_count + pl.len()).alias(id_col_name)
+                )
+            cls._id_counters[cls_name] += df.height
+        if turn is not None:
+            turn.end()
+        return df.with_columns(pl.col(id_col_name).cast(pl.UInt32))
 
     @classmethod
     @abstractmethod
@@ -5,6 +5,7 @@ from pyoframe.core import Expression
 from functools import wraps
 
 from pyoframe.constants import COEF_KEY, CONST_TERM, VAR_KEY
+from pyoframe.util import apply_dimension_dtypes
 
 # pyright: reportAttributeAccessIssue=false
 
@@ -28,10 +29,10 @@ def _patch_class(cls):
 
 
 def _dataframe_to_expr(self: pl.DataFrame) -> Expression:
+    # Renamed first such that the values are not cast as if they were a dimension
+    df = apply_dimension_dtypes(self.rename({self.columns[-1]: COEF_KEY}))
     return Expression(
-        self.rename({self.columns[-1]: COEF_KEY})
-        .drop_nulls(COEF_KEY)
-        .with_columns(pl.lit(CONST_TERM).alias(VAR_KEY))
+        df.drop_nulls(COEF_KEY).with_columns(pl.lit(CONST_TERM).alias(VAR_KEY))
     )
 
 
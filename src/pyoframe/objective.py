@@ -1,6 +1,9 @@
+from __future__ import annotations
 from typing import Optional
-from pyoframe.constants import COEF_KEY
-from pyoframe.core import SupportsMath, Expression
+import polars as pl
+from pyoframe.constants import COEF_KEY, PyoframeError
+from pyoframe.core import SupportsMath, SupportsToExpr, Expression, ExpressionBuilder
+from pyoframe.util import ElementMetadata
 
 
 class Objective(Expression):
@@ -14,17 +17,74 @@ class Objective(Expression):
         >>> m.objective
         <Objective size=1 dimensions={} terms=4>
         objective: a + b[1] + b[2] + b[3]
+
+        Terms added with `+=` or `-=` are only added to the objective once it is next used,
+        such that the objective is not regrouped after every addition (see `ExpressionBuilder`).
+
+        >>> m.objective += 2 * m.a
+        >>> m.objective -= 3
+        >>> m.objective._pending
+        <ExpressionBuilder parts=3>
+        >>> m.objective
+        <Objective size=1 dimensions={} terms=5>
+        objective: 3 a + b[1] + b[2] + b[3] -3
     """
 
     def __init__(self, expr: SupportsMath) -> None:
         expr = expr.to_expr()
-        super().__init__(expr.data)
+        super().__init__(expr._frame)
+        self._pending: Optional[ExpressionBuilder] = None
         self._model = expr._model
         assert (
             self.dimensions is None
         ), "Objective cannot have dimensions as it must be a single expression"
         self._value: Optional[float] = None
 
+    def __iadd__(self, other: SupportsToExpr | int | float):
+        if self._model is not None and self._model.frozen:
+            raise PyoframeError(
+                "Cannot modify the objective since the model is frozen."
+            )
+        if self._pending is None:
+            current = Expression(self._frame)
+            current._inherit_metadata(self._metadata)
+            current._model = self._model
+            self._pending = ExpressionBuilder(current)
+            # The facts about the current terms no longer hold; reading them falls back to the data (which adds the pending terms)
+            self._metadata = ElementMetadata(dimensions=self._metadata.dimensions)
+        self._pending += other
+        self._value = None
+        return self
+
+    def __isub__(self, other: SupportsToExpr | int | float):
+        if isinstance(other, (int, float)):
+            return self.__iadd__(-other)
+        return self.__iadd__(-other.to_expr())
+
+    @property
+    def data(self) -> pl.DataFrame:
+        self._materialize()
+        return super().data
+
+    @property
+    def _frame(self) -> pl.DataFrame | pl.LazyFrame:
+        self._materialize()
+        return super()._frame
+
+    def _materialize(self):
+        """Adds the terms pending from `+=` and `-=` to the objective (see `__iadd__`). Returns the objective itself."""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return self
+        expr = pending.to_expr()
+        assert (
+            expr.dimensions is None
+        ), "Objective cannot have dimensions as it must be a single expression"
+        self._data = expr._data
+        self._lazy = expr._lazy
+        self._metadata = expr._metadata
+        return self
+
     @property
     def value(self):
         if self._value is None:
@@ -0,0 +1,313 @@
+"""
+Records the time, rows and memory of pyoframe's core operations (see `profile`).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from functools import wraps
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Union
+
+import polars as pl
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Not available on Windows
+    resource = None
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The profiler of the enclosing `profile()` block, if any
+_profiler: Optional["Profiler"] = None
+
+
+@dataclass
+class ProfileEvent:
+    """One call to a profiled operation. Times are in seconds since the profiler started."""
+
+    operation: str
+    start: float
+    depth: int
+    thread: int
+    # The line of the user's script that led to the operation (e.g. "model.py:42")
+    location: Optional[str]
+    # The model attribute being built (e.g. "con_max_capacity"), see `Profiler.summary`
+    target: Optional[str] = None
+    duration: Optional[float] = None
+    # Time spent in the operation itself (excluding nested profiled operations)
+    self_time: Optional[float] = None
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    # How much the peak resident memory of the process (in bytes) went up during the operation: zero unless
+    # the operation used more memory than the process ever did before
+    peak_memory_increase: Optional[int] = None
+
+
+class Profiler:
+    """
+    Collects the events recorded within a `profile()` block.
+
+    Operations are attributed to the model attribute they build: all operations recorded since the previous
+    element was added to a model belong to the next element that is added (e.g. the additions and sums in
+    `m.con = pf.sum("t", m.x) + m.y <= 1` belong to `con`).
+    """
+
+    def __init__(self) -> None:
+        self.events: List[ProfileEvent] = []
+        self._start = time.perf_counter()
+        # Operations may run concurrently (see Model.build) so every thread has its own stack of open events
+        self._threads = threading.local()
+        # Index of the first event that isn't attributed to a model attribute yet
+        self._unattributed = 0
+
+    @contextmanager
+    def _record(self, operation: str, rows_in: Optional[int]) -> Iterator[ProfileEvent]:
+        if not hasattr(self._threads, "nested_time"):
+            # Time spent in the nested operations of each open event
+            self._threads.nested_time = []
+        nested_times: List[float] = self._threads.nested_time
+        event = ProfileEvent(
+            operation=operation,
+            start=time.perf_counter() - self._start,
+            depth=len(nested_times),
+            thread=threading.get_ident(),
+            location=_caller_location(),
+            target=getattr(self._threads, "target", None),
+            rows_in=rows_in,
+        )
+        self.events.append(event)
+        nested_times.append(0.0)
+        peak_memory = _peak_memory()
+        try:
+            yield event
+        finally:
+            nested_time = nested_times.pop()
+            event.duration = time.perf_counter() - self._start - event.start
+            event.self_time = event.duration - nested_time
+            if nested_times:
+                nested_times[-1] += event.duration
+            if peak_memory is not None:
+                event.peak_memory_increase = _peak_memory() - peak_memory
+
+    def _attribute(self, target: str) -> None:
+        for event in self.events[self._unattributed :]:
+            if event.target is None:
+                event.target = target
+        self._unattributed = len(self.events)
+
+    def to_frame(self) -> pl.DataFrame:
+        """Returns one row per recorded event."""
+        return pl.DataFrame(
+            [
+                tuple(getattr(e, f.name) for f in fields(ProfileEvent))
+                for e in self.events
+            ],
+            schema={
+                "operation": pl.String,
+                "start": pl.Float64,
+                "depth": pl.UInt32,
+                "thread": pl.UInt64,
+                "location": pl.String,
+                "target": pl.String,
+                "duration": pl.Float64,
+                "self_time": pl.Float64,
+                "rows_in": pl.Int64,
+                "rows_out": pl.Int64,
+                "peak_memory_increase": pl.Int64,
+            },
+            orient="row",
+        )
+
+    def summary(self, by: str = "target") -> pl.DataFrame:
+        """
+        Returns the number of calls, the time (in seconds) and the rows of the recorded events
+        grouped by `by` (e.g. "target", "operation" or "location"), the most time consuming first.
+
+        `time` is the time spent in the operations themselves (excluding nested operations)
+        such that it adds up to the total profiled time.
+
+        Examples:
+            >>> import pyoframe as pf
+            >>> with pf.profile() as profiler:
+            ...     m = pf.Model("min")
+            ...     m.x = pf.Variable({"t": [1, 2, 3]})
+            ...     m.con = pf.sum(2 * m.x) + 1 <= 10
+            >>> profiler.summary("operation").select("operation", "calls", "rows_in").sort("operation")
+            shape: (5, 3)
+            ┌─────────────────────┬───────┬─────────┐
+            │ operation           ┆ calls ┆ rows_in │
+            │ ---                 ┆ ---   ┆ ---     │
+            │ str                 ┆ u32   ┆ i64     │
+            ╞═════════════════════╪═══════╪═════════╡
+            │ Constraint.__init__ ┆ 1     ┆ 4       │
+            │ Expression.__add__  ┆ 2     ┆ 7       │
+            │ Expression.__mul__  ┆ 1     ┆ 3       │
+            │ Expression.sum      ┆ 1     ┆ 3       │
+            │ Model.__setattr__   ┆ 2     ┆ 4       │
+            └─────────────────────┴───────┴─────────┘
+        """
+        return (
+            self.to_frame()
+            .group_by(by, maintain_order=True)
+            .agg(
+                pl.len().alias("calls"),
+                pl.col("self_time").sum().alias("time"),
+                pl.col("rows_in").sum(),
+                pl.col("rows_out").sum(),
+                pl.col("peak_memory_increase").max(),
+            )
+            .sort("time", descending=True, maintain_order=True)
+        )
+
+    def to_chrome_trace(self, file_path: Union[str, Path]) -> Path:
+        """
+        Writes the events in the Chrome trace event format, which can be opened in Perfetto
+        (https://ui.perfetto.dev) or chrome://tracing.
+        """
+        pid = os.getpid()
+        trace_events = [
+            {
+                "name": event.operation,
+                "cat": "pyoframe",
+                "ph": "X",
+                "ts": event.start * 1e6,
+                "dur": (event.duration or 0) * 1e6,
+                "pid": pid,
+                "tid": event.thread,
+                "args": {
+                    "target": event.target,
+                    "location": event.location,
+                    "rows_in": event.rows_in,
+                    "rows_out": event.rows_out,
+                    "peak_memory_increase": event.peak_memory_increase,
+                },
+            }
+            for event in self.events
+        ]
+        file_path = Path(file_path)
+        with open(file_path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+        return file_path
+
+
+@contextmanager
+def profile() -> Iterator[Profiler]:
+    """
+    Records the wall time, the number of rows going in and out and the increase of the peak memory of pyoframe's
+    core operations (arithmetic, sums, constraint creation, adding elements to a model and writing files) within
+    the block.
+
+    Examples:
+        >>> import pyoframe as pf
+        >>> with pf.profile() as profiler:
+        ...     m = pf.Model("min")
+        ...     m.x = pf.Variable({"t": [1, 2, 3]})
+        ...     m.con = pf.sum(m.x) <= 10
+        >>> sorted(profiler.summary().get_column("target"))
+        ['con', 'x']
+    """
+    global _profiler
+    previous = _profiler
+    _profiler = Profiler()
+    try:
+        yield _profiler
+    finally:
+        _profiler = previous
+
+
+def profiled(func):
+    """Decorator that records the calls to `func` when profiling (see `profile`)."""
+    operation = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _profiler
+        if profiler is None:
+            return func(*args, **kwargs)
+        with profiler._record(operation, _rows(*args)) as event:
+            result = func(*args, **kwargs)
+            # __init__ builds the element it is called on
+            event.rows_out = _rows(args[0] if func.__name__ == "__init__" else result)
+        return result
+
+    return wrapper
+
+
+@contextmanager
+def attribute_to(target: str) -> Iterator[None]:
+    """
+    Attributes the operations recorded by the current thread within the block to `target`, regardless of the order
+    in which elements are added to the model (see Model.build).
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    previous = getattr(profiler._threads, "target", None)
+    profiler._threads.target = target
+    try:
+        yield
+    finally:
+        profiler._threads.target = previous
+
+
+@contextmanager
+def record_assignment(target: str, value: Any) -> Iterator[None]:
+    """
+    Records the addition of an element to a model (`Model.__setattr__`) and attributes the operations
+    recorded since the previous addition to `target`.
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    with profiler._record("Model.__setattr__", _rows(value)) as event:
+        profiler._attribute(target)
+        yield
+        event.rows_out = event.rows_in
+
+
+def _rows(*objs: Any) -> Optional[int]:
+    """The total number of rows of the given elements and DataFrames if known without computing anything."""
+    total = None
+    for obj in objs:
+        if isinstance(obj, pl.DataFrame):
+            rows = obj.height
+        else:
+            metadata = getattr(obj, "_metadata", None)
+            rows = None if metadata is None else metadata.height
+            if rows is None:
+                data = getattr(obj, "_data", None)
+                if isinstance(data, pl.DataFrame):
+                    rows = data.height
+        if rows is not None:
+            total = rows if total is None else total + rows
+    return total
+
+
+def _caller_location() -> Optional[str]:
+    """The file and line of the first frame outside of pyoframe (and the standard library's contextlib)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_PACKAGE_DIR) and not filename.endswith(
+            "contextlib.py"
+        ):
+            return f"{filename}:{frame.f_lineno}"
+        frame = frame.f_back
+    return None
+
+
+def _peak_memory() -> Optional[int]:
+    """The peak resident memory of the process so far (in bytes)."""
+    if resource is None:  # pragma: no cover
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
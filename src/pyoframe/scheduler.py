@@ -0,0 +1,228 @@
+"""
+Builds the elements of a model concurrently (see `build`).
+"""
+
+import inspect
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from pyoframe.constants import PyoframeError
+from pyoframe.model_element import ModelElementWithId
+from pyoframe.profiling import attribute_to
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pyoframe.model import Model
+
+
+def build(m: "Model", max_workers: Optional[int] = None, **builders: Callable) -> None:
+    """
+    Builds elements (variables, expressions, constraints or the objective) concurrently and adds them to the model.
+
+    Each keyword argument is the name of an element and a function that builds it. The parameters of the function
+    are its dependencies: each parameter is given the element built by the builder of the same name, or otherwise
+    the model's attribute of the same name. Builders that don't depend on one another run concurrently on a
+    thread pool (polars releases the GIL while it runs queries).
+
+    Builders should not modify the model themselves: once all the builders ran, their elements are added to the
+    model in the order the builders were given. The IDs of the variables and constraints are the same as if the
+    builders had run one after the other (in the order they were given, unless a builder depends on a later one):
+    a builder waits for the builders before it to assign their IDs (or finish) before it assigns IDs. Hence a
+    builder should create at most one variable or constraint, the element it returns.
+
+    Parameters:
+        max_workers: The number of builders that run at once (defaults to the default number of threads of
+            `concurrent.futures.ThreadPoolExecutor`).
+
+    Examples:
+        >>> import pyoframe as pf
+        >>> m = pf.Model("min")
+        >>> m.x = pf.Variable({"t": [1, 2, 3]}, lb=0)
+        >>> m.build(
+        ...     y=lambda: pf.Variable({"t": [1, 2, 3]}, lb=0),
+        ...     total=lambda x, y: x + 2 * y,
+        ...     con_min=lambda total: total >= 1,
+        ...     con_max=lambda total: total <= 10,
+        ...     objective=lambda total: pf.sum(total),
+        ... )
+        >>> m.con_min
+        <Constraint name=con_min sense='>=' size=3 dimensions={'t': 3} terms=9>
+        [1]: x[1] +2 y[1] >= 1
+        [2]: x[2] +2 y[2] >= 1
+        [3]: x[3] +2 y[3] >= 1
+        >>> m.build(con=lambda undefined: undefined <= 1)
+        Traceback (most recent call last):
+        ...
+        pyoframe.constants.PyoframeError: Builder 'con' depends on 'undefined' which is neither built nor found on the model.
+    """
+    dependencies = {
+        name: _get_dependencies(m, name, builder, builders)
+        for name, builder in builders.items()
+    }
+    _check_for_cycles(dependencies)
+    order = _build_order(dependencies)
+    if max_workers is None:
+        # The default of ThreadPoolExecutor
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+    if max_workers <= 0:
+        raise ValueError("max_workers must be greater than 0")
+    turns = _IdTurns()
+    # Every ready builder gets a thread but at most `max_workers` of them run at once: a builder waiting for
+    # its turn gives up its slot such that the builder whose turn it is can always run
+    slots = threading.Semaphore(max_workers)
+    counters = dict(ModelElementWithId._id_counters)
+
+    results: Dict[str, Any] = {}
+    running: Dict[Future, str] = {}
+    waiting = list(order)
+
+    def run(turn: int, name: str, builder: Callable, kwargs: Dict[str, Any]):
+        ModelElementWithId._id_turn.current = _IdTurn(turns, turn, slots)
+        try:
+            with slots, attribute_to(name):
+                return builder(**kwargs)
+        finally:
+            ModelElementWithId._id_turn.current = None
+            turns.end(turn)
+
+    def submit_ready(executor: ThreadPoolExecutor):
+        for name in [n for n in waiting if all(d in results for d in dependencies[n])]:
+            waiting.remove(name)
+            builder = builders[name]
+            kwargs = {
+                param: results[param] if param in builders else getattr(m, param)
+                for param in _parameters(builder)
+                if param in builders or hasattr(m, param)
+            }
+            future = executor.submit(run, order.index(name), name, builder, kwargs)
+            running[future] = name
+
+    with ThreadPoolExecutor(max_workers=max(len(builders), 1)) as executor:
+        submit_ready(executor)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    # Builders waiting for their turn stop instead of assigning IDs and, once the others
+                    # finished, the IDs they assigned are given back (their elements are never added)
+                    turns.cancel()
+                    wait(running)
+                    ModelElementWithId._id_counters.clear()
+                    ModelElementWithId._id_counters.update(counters)
+                    raise error
+                results[name] = future.result()
+            submit_ready(executor)
+
+    for name in builders:
+        setattr(m, name, results[name])
+
+
+class _BuildCancelled(Exception):
+    """Raised in the builders waiting for their turn once another builder failed."""
+
+
+class _IdTurns:
+    """Lets builders assign IDs in turns: a builder's turn starts once all the builders before it assigned their IDs (or finished)."""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._finished = set()
+        # The turn of the first builder that hasn't assigned its IDs
+        self._current = 0
+        self._cancelled = False
+
+    def wait(self, turn: int) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self._cancelled or self._current >= turn)
+            if self._cancelled:
+                raise _BuildCancelled()
+
+    def end(self, turn: int) -> None:
+        with self._condition:
+            self._finished.add(turn)
+            while self._current in self._finished:
+                self._current += 1
+            self._condition.notify_all()
+
+    def cancel(self) -> None:
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify_all()
+
+
+class _IdTurn:
+    """The turn of a single builder (see `ModelElementWithId._assign_ids`)."""
+
+    def __init__(self, turns: _IdTurns, turn: int, slots: threading.Semaphore):
+        self._turns = turns
+        self._turn = turn
+        self._slots = slots
+
+    def wait(self) -> None:
+        self._slots.release()
+        try:
+            self._turns.wait(self._turn)
+        finally:
+            self._slots.acquire()
+
+    def end(self) -> None:
+        self._turns.end(self._turn)
+
+
+def _build_order(dependencies: Dict[str, List[str]]) -> List[str]:
+    """The builders in the order they were given, except that builders come after their dependencies."""
+    order: List[str] = []
+    while len(order) < len(dependencies):
+        order.append(
+            next(
+                name
+                for name, deps in dependencies.items()
+                if name not in order and all(dep in order for dep in deps)
+            )
+        )
+    return order
+
+
+def _parameters(builder: Callable) -> List[str]:
+    return [
+        param.name
+        for param in inspect.signature(builder).parameters.values()
+        if param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY)
+    ]
+
+
+def _get_dependencies(
+    m: "Model", name: str, builder: Callable, builders: Dict[str, Callable]
+) -> List[str]:
+    """The builders that `builder` depends on (parameters that refer to the model's attributes are not)."""
+    dependencies = []
+    for param in inspect.signature(builder).parameters.values():
+        if param.name in builders:
+            dependencies.append(param.name)
+        elif not hasattr(m, param.name) and param.default is param.empty:
+            raise PyoframeError(
+                f"Builder '{name}' depends on '{param.name}' which is neither built nor found on the model."
+            )
+    return dependencies
+
+
+def _check_for_cycles(dependencies: Dict[str, List[str]]) -> None:
+    # Depth-first search where names on the current path are "visiting"
+    state: Dict[str, str] = {}
+
+    def visit(name: str, path: List[str]):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            cycle = path[path.index(name) :] + [name]
+            raise PyoframeError(f"Builders depend on each other: {' -> '.join(cycle)}")
+        state[name] = "visiting"
+        for dep in dependencies[name]:
+            visit(dep, path + [name])
+        state[name] = "done"
+
+    for name in dependencies:
+        visit(name, [])
@@ -2,7 +2,7 @@
 File containing utility functions and classes.
 """
 
-from typing import Any, Iterable, Optional, Union, List, Dict
+from typing import Any, Hashable, Iterable, Optional, Tuple, Union, List, Dict
 
 from dataclasses import dataclass, field
 
@@ -10,7 +10,7 @@ import polars as pl
 import pandas as pd
 from functools import wraps
 
-from pyoframe.constants import COEF_KEY, CONST_TERM, RESERVED_COL_KEYS, VAR_KEY
+from pyoframe.constants import COEF_KEY, CONST_TERM, RESERVED_COL_KEYS, VAR_KEY, Config
 
 
 def get_obj_repr(obj: object, _props: Iterable[str] = (), **kwargs):
@@ -159,6 +159,100 @@ def concat_dimensions(
     return df
 
 
+def encode_dimensions(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Encodes the string dimensions of a DataFrame as (lexically ordered) categoricals.
+
+    The categories are stored in polars' string cache such that the integer codes are shared across all
+    DataFrames and joins between encoded dimensions never need to compare strings. The cache is only held
+    during the encoding (`pl.StringCache()`): frames encoded separately can only be joined if the global
+    string cache is enabled, which `Config.encode_string_dimensions` does (see `apply_dimension_dtypes`).
+
+    Examples:
+        >>> import polars as pl
+        >>> df = encode_dimensions(pl.DataFrame({"city": ["Toronto", "Berlin"], "year": [2024, 2024]}))
+        >>> df.dtypes
+        [Categorical(ordering='lexical'), Int64]
+        >>> decode_dimensions(df).dtypes
+        [String, Int64]
+    """
+    string_dims = [
+        col
+        for col, dtype in df.schema.items()
+        if dtype == pl.String and col not in RESERVED_COL_KEYS
+    ]
+    if not string_dims:
+        return df
+    with pl.StringCache():
+        return df.with_columns(pl.col(string_dims).cast(pl.Categorical("lexical")))
+
+
+def decode_dimensions(df: pl.DataFrame) -> pl.DataFrame:
+    """Reverts encode_dimensions() by casting categorical columns back to strings."""
+    categorical_dims = [
+        col for col, dtype in df.schema.items() if dtype == pl.Categorical
+    ]
+    if not categorical_dims:
+        return df
+    return df.with_columns(pl.col(categorical_dims).cast(pl.String))
+
+
+def apply_dimension_dtypes(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Casts the dimensions of user data to the dtypes configured in `Config`
+    (see `Config.encode_string_dimensions` and `Config.integer_dimension_dtype`).
+
+    Examples:
+        >>> import polars as pl
+        >>> from pyoframe import Config
+        >>> Config.integer_dimension_dtype = pl.Int16
+        >>> df = apply_dimension_dtypes(pl.DataFrame({"year": [2024, 2025], "city": ["Toronto", "Berlin"]}))
+        >>> df.dtypes
+        [Int16, String]
+        >>> restore_dimension_dtypes(df, ["year", "city"]).dtypes
+        [Int64, String]
+        >>> apply_dimension_dtypes(pl.DataFrame({"id": [2**20]}))
+        Traceback (most recent call last):
+        ...
+        polars.exceptions.ComputeError: conversion from `i64` to `i16` failed in column 'id' for 1 out of 1 values: [1048576]
+        >>> Config.reset_defaults()
+    """
+    if Config.encode_string_dimensions:
+        # Opted into through Config: elements encoded at different times must share their categories
+        pl.enable_string_cache()
+        df = encode_dimensions(df)
+    int_dtype = Config.integer_dimension_dtype
+    if int_dtype is None:
+        return df
+    int_dims = [
+        col
+        for col, dtype in df.schema.items()
+        if dtype.is_integer() and dtype != int_dtype and col not in RESERVED_COL_KEYS
+    ]
+    if not int_dims:
+        return df
+    return df.with_columns(pl.col(int_dims).cast(int_dtype))
+
+
+def restore_dimension_dtypes(df: pl.DataFrame, dims: List[str]) -> pl.DataFrame:
+    """
+    Reverts apply_dimension_dtypes() on the dimensions `dims` such that results have the dimensions dtypes users expect.
+    Other columns (e.g. solutions) are left as they are.
+    """
+    schema = df.schema
+    casts = []
+    if Config.encode_string_dimensions:
+        casts += [
+            pl.col(d).cast(pl.String) for d in dims if schema[d] == pl.Categorical
+        ]
+    int_dtype = Config.integer_dimension_dtype
+    if int_dtype is not None:
+        casts += [pl.col(d).cast(pl.Int64) for d in dims if schema[d] == int_dtype]
+    if not casts:
+        return df
+    return df.with_columns(casts)
+
+
 def cast_coef_to_string(
     df: pl.DataFrame, column_name: str = COEF_KEY, drop_ones=True, float_precision=None
 ) -> pl.DataFrame:
@@ -270,3 +364,68 @@ def dataframe_to_tupled_list(
 class FuncArgs:
     args: List
     kwargs: Dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class ElementMetadata:
+    """
+    Facts about an element's data that would otherwise be recomputed from the data every time they're needed.
+
+    The dimensions are always known. The other facts are None until they're first needed, or until an operation
+    that knows them passes them on to the element it creates (see `ModelElement._inherit_metadata`).
+    """
+
+    dimensions: Optional[Tuple[str, ...]]
+    # Number of rows in the data
+    height: Optional[int] = None
+    # Number of unique values in each dimension
+    shape: Optional[Dict[str, int]] = None
+    # Number of unique indices (i.e. len(element))
+    size: Optional[int] = None
+    # Whether every term is a constant term (only applies to data with a VAR_KEY column)
+    constant_only: Optional[bool] = None
+    # Whether every index appears in exactly one row
+    unique: Optional[bool] = None
+    # The longest prefix of the dimensions by which the data is sorted (ascending)
+    sorted_by: Optional[Tuple[str, ...]] = None
+    # Identifies the set of indices: elements with equal (not None) tokens have the same indices (see derive_index_token).
+    # Tokens are derived from the identity of the data the indices were built from, never from their content.
+    index_token: Optional[Hashable] = None
+
+
+def derive_index_token(
+    token: Optional[Hashable], *operation: Hashable
+) -> Optional[Hashable]:
+    """
+    Returns the token of the indices obtained by applying `operation` to the indices identified by `token`.
+    Applying the same (deterministic) operation to the same indices gives the same indices and hence the same token.
+
+    Examples:
+        >>> derive_index_token(("Set", 123), "sum", frozenset(["hour"])) == derive_index_token(("Set", 123), "sum", frozenset(["hour"]))
+        True
+        >>> derive_index_token(None, "sum", frozenset(["hour"])) is None
+        True
+    """
+    if token is None:
+        return None
+    return (token, *operation)
+
+
+@dataclass(frozen=True)
+class JoinEstimate:
+    """A join run by an operation and the (upper bound of the) number of rows it creates (see `Expression.explain`)."""
+
+    operation: str
+    how: str
+    on: Tuple[str, ...]
+    # Unknown (None) for lazy frames unless Config.max_join_rows is set
+    left_rows: Optional[int]
+    right_rows: Optional[int]
+    rows: Optional[int]
+
+    def __str__(self) -> str:
+        def fmt(rows):
+            return "?" if rows is None else f"{rows:,}"
+
+        on = f" on {list(self.on)}" if self.on else ""
+        return f"{self.operation}: {self.how} join{on} of {fmt(self.left_rows)} x {fmt(self.right_rows)} rows -> at most {fmt(self.rows)} rows"
@@ -9,6 +9,7 @@ import polars as pl
 from pyoframe.constants import COEF_KEY, CONST_TERM, VAR_KEY
 from pyoframe import Variable, Model, sum, Set, Config, Expression, VType
 from .util import csvs_to_expr
+import pyoframe as pf
 
 
 def test_set_multiplication():
@@ -24,6 +25,23 @@ def test_set_multiplication_same_name():
         Set(x=dim1) * Set(x=dim2)
 
 
+def test_set_product_is_not_expanded_until_needed():
+    product = Set(x=range(1000), y=range(1000)) * Set(z=["a", "b"])
+    assert isinstance(product._data, pl.LazyFrame)
+    assert len(product) == 2_000_000
+    assert product.shape == {"x": 1000, "y": 1000, "z": 2}
+    assert isinstance(product._data, pl.LazyFrame)
+
+    small = Set(x=[1, 2], y=["a", "b"])
+    assert small.data.rows() == [(1, "a"), (1, "b"), (2, "a"), (2, "b")]
+    assert isinstance(small._data, pl.DataFrame)
+
+    with pytest.raises(ValueError, match="Duplicate rows"):
+        Set(x=[1, 1], y=["a", "b"])
+    # No rows hence no duplicates
+    assert len(Set(x=[1, 1], y=[])) == 0
+
+
 def test_set_addition():
     with pytest.raises(
         PyoframeError,
@@ -407,6 +425,77 @@ def test_three_way_add():
     )
 
 
+def test_n_ary_add():
+    def exprs():
+        return (
+            pl.DataFrame({"dim1": [1], "value": [1]}).to_expr(),
+            pl.DataFrame({"dim1": [1, 2], "value": [3, 4]}).to_expr(),
+            pl.DataFrame({"dim1": [1], "value": [5]}).to_expr(),
+        )
+
+    df1, df2, df3 = exprs()
+    with pytest.raises(
+        PyoframeError,
+        match=re.escape(
+            "Dataframe has unmatched values. If this is intentional, use .drop_unmatched() or .keep_unmatched()"
+        ),
+    ):
+        pf.add(df1, df2, df3)
+
+    # Note that .keep_unmatched() and .drop_unmatched() modify the expression hence we create new ones each time
+    for get_operands in [
+        lambda df1, df2, df3: (df1, df2.keep_unmatched(), df3),
+        lambda df1, df2, df3: (df1, df2.drop_unmatched(), df3),
+        lambda df1, df2, df3: (df2.drop_unmatched(), df1, df3),
+        lambda df1, df2, df3: (df3, df1, df2.keep_unmatched()),
+        lambda df1, df2, df3: (df2.keep_unmatched(), df1.drop_unmatched()),
+    ]:
+        operands = get_operands(*exprs())
+        expected = operands[0]
+        for operand in operands[1:]:
+            expected = expected + operand
+        operands = get_operands(*exprs())
+        assert_frame_equal(pf.add(*operands).data, expected.data)
+
+    assert str(pf.add(df1, 2, df3, 3.5)) == "[1]: 11.5"
+    assert pf.add(df1) is df1
+    with pytest.raises(ValueError):
+        pf.add()
+
+
+def test_n_ary_add_with_add_dim():
+    m = Model("min")
+    m.x = Variable(Set(t=[1, 2]))
+    m.y = Variable(Set(t=[1, 2], city=["A", "B"]))
+    m.z = Variable()
+
+    expected = m.x.add_dim("city") + m.y + m.z.add_dim("t", "city") + 1
+    result = pf.add(m.x.add_dim("city"), m.y, m.z.add_dim("t", "city"), 1)
+    assert_frame_equal(
+        result.data.sort(["t", "city", VAR_KEY]),
+        expected.data.sort(["t", "city", VAR_KEY]),
+    )
+    assert (
+        str(result)
+        == "[1,A]: x[1] + y[1,A] + z +1\n[1,B]: x[1] + y[1,B] + z +1\n[2,A]: x[2] + y[2,A] + z +1\n[2,B]: x[2] + y[2,B] + z +1"
+    )
+
+
+def test_add_drop_and_keep_has_no_missing_rows():
+    df1 = pl.DataFrame({"dim1": [1, 2], "value": [1, 2]}).to_expr()
+    df2 = pl.DataFrame({"dim1": [2, 3], "value": [3, 4]}).to_expr()
+    result = df1.drop_unmatched() + df2.keep_unmatched()
+    assert result.data.null_count().sum_horizontal().item() == 0
+    assert str(result) == "[2]: 5\n[3]: 4"
+
+
+def test_quicksum():
+    m = Model("min")
+    m.x = Variable(Set(t=[1, 2, 3]))
+    assert str(pf.quicksum(i * m.x for i in range(1, 4))) == str(m.x * 6)
+    assert str(pf.quicksum([sum(m.x), 1, 2])) == "x[1] + x[2] + x[3] +3"
+
+
 def test_no_propogate():
     expr1, expr2, expr3 = csvs_to_expr(
         """
@@ -458,3 +547,174 @@ def test_variable_equals():
     m.objective = sum(m.Choose100)
     m.solve(log_to_console=False)
     assert m.objective.value == 300
+
+
+def test_sorted_and_unsorted_indices_give_same_results():
+    m = Model("min")
+    index = pl.DataFrame({"t": [1, 1, 2, 2, 3, 3], "city": ["A", "B"] * 3})
+    m.x = Variable(index)
+    m.y = Variable(index)
+    cost = index.with_columns(cost=pl.int_range(6)).to_expr()
+
+    def shuffle(expr):
+        return Expression(expr.to_expr().data.sample(fraction=1, shuffle=True, seed=1))
+
+    def build(x, y, cost):
+        return [
+            x + y + 2 * x,
+            sum("city", x + y),
+            x * cost,
+            (x + y) + 5,
+        ]
+
+    expected = build(shuffle(m.x), shuffle(m.y), shuffle(cost))
+    results = build(m.x.to_expr(), m.y.to_expr(), cost)
+    assert results[0]._sorted_by == ("t", "city")
+    assert results[1]._sorted_by == ("t",)
+    for result, expected in zip(results, expected):
+        sort_by = expected.dimensions + [VAR_KEY]
+        assert_frame_equal(result.data.sort(sort_by), expected.data.sort(sort_by))
+
+
+def test_sorted_indices_unmatched():
+    m = Model("min")
+    m.x = Variable(Set(t=[1, 2, 3]))
+    m.y = Variable(Set(t=[1, 2, 4]))
+    assert m.x._sorted_by == ("t",)
+    with pytest.raises(PyoframeError, match="unmatched values"):
+        m.x + m.y
+    assert str(m.x.drop_unmatched() + m.y.drop_unmatched() + 1) == (
+        "[1]: x[1] + y[1] +1\n[2]: x[2] + y[2] +1"
+    )
+
+
+def test_expression_builder_matches_repeated_addition():
+    m = Model("min")
+    m.x = Variable({"t": [1, 2, 3]})
+    m.y = Variable({"t": [1, 2]})
+    parts = [
+        (2 * m.x).keep_unmatched(),
+        m.y,
+        3,
+        pl.DataFrame({"t": [1, 2, 3], "c": [1, 2, 3]}),
+    ]
+
+    expected = parts[0]
+    builder = pf.ExpressionBuilder()
+    for part in parts:
+        builder += part
+        if part is not parts[0]:
+            expected = expected + part
+    builder -= m.x
+    expected = expected - m.x
+    assert_frame_equal(builder.to_expr().data, expected.data, check_row_order=False)
+    # The parts are replaced by their sum
+    assert builder._parts == [builder.to_expr()]
+
+
+def test_objective_is_built_incrementally():
+    m = Model("min")
+    m.x = Variable({"t": [1, 2, 3]})
+    m.objective = sum(m.x)
+    objective = m.objective
+    for i in range(2, 5):
+        m.objective += i * sum(m.x)
+    m.objective -= 1
+    # Same objective whose terms are only added when needed
+    assert m.objective is objective
+    # Internal reads see the stored terms without adding the pending ones
+    assert objective._data is not None and objective._metadata.height is None
+    assert objective._pending is not None
+    assert str(m.objective) == "objective: 10 x[1] +10 x[2] +10 x[3] -1"
+    assert objective._pending is None
+
+
+def test_objective_of_another_model_is_copied():
+    m = Model("min")
+    m.x = Variable({"t": [1, 2]})
+    m.objective = sum(m.x)
+    m.objective += 1
+    other = Model("min")
+    other.objective = m.objective
+    assert other.objective is not m.objective
+    assert m.objective._model is m and other.objective._model is other
+    other.objective += 2
+    assert str(m.objective) == "objective: x[1] + x[2] +1"
+    constant = other.objective.data.filter(pl.col("__variable_id") == 0)
+    assert constant.get_column("__coeff").to_list() == [3]
+
+
+@pytest.mark.parametrize("keep_left", [False, True])
+def test_unmatched_values_are_detected_in_unsorted_indices(keep_left):
+    index = pl.DataFrame({"t": [3, 1, 2, 2], "city": ["A", "B", "A", "B"]})
+    other = pl.DataFrame({"t": [2, 1, 3, 4], "city": ["B", "B", "A", "A"]})
+    m = Model("min")
+    m.x = Variable(index)
+    left = m.x.to_expr().keep_unmatched() if keep_left else m.x
+    with pytest.raises(
+        PyoframeError, match=re.escape("Dataframe has unmatched values")
+    ):
+        left + other.with_columns(cost=pl.lit(1))
+    matched = other.filter(pl.col("t") < 4).vstack(index.filter(t=2, city="A"))
+    result = left + matched.with_columns(cost=pl.lit(1))
+    assert len(result) == 4
+
+
+def test_hash_collisions_do_not_hide_unmatched_values(monkeypatch):
+    from pyoframe._arithmetic import _Summation
+
+    # Every index gets the same hash
+    monkeypatch.setattr(
+        _Summation, "_index_hashes", lambda self, dims: pl.Series([0], dtype=pl.UInt64)
+    )
+    m = Model("min")
+    m.x = Variable({"t": [3, 1, 2]})
+    with pytest.raises(
+        PyoframeError, match=re.escape("Dataframe has unmatched values")
+    ):
+        m.x + pl.DataFrame({"t": [2, 1, 4], "cost": [1, 2, 3]})
+    result = m.x + pl.DataFrame({"t": [2, 1, 3], "cost": [1, 2, 3]})
+    assert len(result) == 3
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_max_join_rows(lazy):
+    Config.lazy_expressions = lazy
+    hours = pl.DataFrame({"hour": range(100)})
+    m = Model("min")
+    m.x = Variable(hours, {"city": ["A", "B"]})
+    cost = pl.DataFrame({"hour": range(100), "city": "A", "cost": 1.0})
+    wrong_cost = cost.rename({"hour": "day"})
+    assert len(m.x * cost) == 100
+
+    Config.max_join_rows = 1000
+    # Forgetting the hour dimension would create 200 x 100 rows
+    with pytest.raises(PyoframeError, match=re.escape("up to 20,000 rows")):
+        m.x * wrong_cost
+    with pytest.raises(PyoframeError, match="max_join_rows"):
+        m.x.add_dim("day") + wrong_cost
+    expr = m.x * cost
+    assert len(expr) == 100
+    assert expr.explain() == (
+        "Expression.__mul__: inner join on ['hour', 'city'] of 200 x 100 rows -> at most 200 rows"
+    )
+
+
+def test_explain_does_not_run_lazy_queries(monkeypatch):
+    Config.lazy_expressions = True
+    m = Model("min")
+    m.x = Variable({"hour": range(4)}, {"city": ["A", "B"]})
+    expr = 2 * m.x
+    cost = pl.DataFrame({"hour": range(4), "city": "A", "cost": 1.0}).to_expr()
+    assert cost._constant_only
+
+    def collect(self, *args, **kwargs):
+        raise AssertionError("A lazy query was run")
+
+    monkeypatch.setattr(pl.LazyFrame, "collect", collect)
+    # The numbers of rows are known from the metadata. Without knowing how often the
+    # keys repeat, every row on the left could match every row on the right.
+    assert (expr * cost).explain() == (
+        "Expression.__mul__: inner join on ['hour', 'city'] of 8 x 4 rows "
+        "-> at most 32 rows"
+    )
@@ -0,0 +1,125 @@
+import polars as pl
+from polars.testing import assert_frame_equal
+
+import pyoframe as pf
+from pyoframe.model_element import ModelElementWithId
+from pyoframe.util import encode_dimensions, restore_dimension_dtypes
+
+
+def _build_model():
+    plants = pl.DataFrame(
+        {"plant": ["toronto", "berlin", "boston"], "capacity": [10, 20, 30]}
+    )
+    cost = pl.DataFrame(
+        {
+            "wharehouse": ["a", "a", "a", "b", "b", "b"],
+            "plant": ["toronto", "berlin", "boston"] * 2,
+            "cost": [1, 2, 3, 4, 5, 6],
+        }
+    )
+    demand = pl.DataFrame({"wharehouse": ["a", "b"], "demand": [5, 7]})
+
+    m = pf.Model("min")
+    m.open = pf.Variable(plants[["plant"]], lb=0, ub=1)
+    m.transport = pf.Variable(demand[["wharehouse"]], plants[["plant"]], lb=0)
+    m.con_max_capacity = (
+        pf.sum("wharehouse", m.transport) <= plants[["plant", "capacity"]] * m.open
+    )
+    m.con_meet_demand = pf.sum("plant", m.transport) == demand
+    m.con_next = m.transport.next("plant").drop_unmatched() <= 100
+    m.objective = pf.sum(m.transport * cost) + pf.sum(m.open)
+    return m
+
+
+def test_string_dimensions_are_encoded():
+    pf.Config.encode_string_dimensions = True
+    m = pf.Model("min")
+    m.x = pf.Variable({"city": ["Toronto", "Berlin"]})
+    assert m.x.data.schema["city"] == pl.Categorical
+    expr = m.x * pl.DataFrame({"city": ["Berlin", "Toronto"], "cost": [1, 2]})
+    assert expr.data.schema["city"] == pl.Categorical
+    assert str(expr) == "[Berlin]: x[Berlin]\n[Toronto]: 2 x[Toronto]"
+    assert str(expr.filter(city="Berlin")) == "[Berlin]: x[Berlin]"
+
+
+def test_encoded_model_matches_unencoded_model(tmp_path):
+    original_file = _build_model().to_file(tmp_path / "original.lp")
+    ModelElementWithId.reset_counters()
+    pf.Config.encode_string_dimensions = True
+    encoded_file = _build_model().to_file(tmp_path / "encoded.lp")
+    assert original_file.read_text() == encoded_file.read_text()
+
+
+def test_encoded_model_returns_decoded_results():
+    expected = _build_model()
+    expected.solve(log_to_console=False)
+    ModelElementWithId.reset_counters()
+    pf.Config.encode_string_dimensions = True
+    m = _build_model()
+    m.solve(log_to_console=False)
+
+    assert m.transport.solution.schema["plant"] == pl.String
+    assert_frame_equal(m.transport.solution, expected.transport.solution)
+    assert_frame_equal(m.con_meet_demand.dual, expected.con_meet_demand.dual)
+    assert_frame_equal(
+        (2 * m.transport).value,
+        (2 * expected.transport).value,
+    )
+
+
+def test_compact_dtypes_are_used_throughout():
+    pf.Config.coefficient_dtype = pl.Float32
+    pf.Config.integer_dimension_dtype = pl.Int16
+    m = pf.Model("min")
+    m.x = pf.Variable(pl.DataFrame({"t": [1, 2, 3]}), lb=0)
+    cost = pl.DataFrame({"t": [1, 2, 3], "cost": [1, 2, 3]}).to_expr()
+    expr = 2 * m.x * cost + cost + 1
+    assert expr.data.schema == {
+        "t": pl.Int16,
+        "__coeff": pl.Float32,
+        "__variable_id": pl.UInt32,
+    }
+    assert pf.sum(expr).data.schema["__coeff"] == pl.Float32
+    m.objective = pf.sum(expr)
+    m.solve(log_to_console=False)
+    assert m.x.solution.schema["t"] == pl.Int64
+
+
+def test_only_dimensions_are_restored():
+    pf.Config.integer_dimension_dtype = pl.Int16
+    pf.Config.encode_string_dimensions = True
+    df = pl.DataFrame(
+        {
+            "t": pl.Series([1, 2], dtype=pl.Int16),
+            "city": pl.Series(["A", "B"], dtype=pl.Categorical),
+            "count": pl.Series([3, 4], dtype=pl.Int16),
+            "label": pl.Series(["a", "b"], dtype=pl.Categorical),
+        }
+    )
+    assert restore_dimension_dtypes(df, ["t", "city"]).dtypes == [
+        pl.Int64,
+        pl.String,
+        pl.Int16,
+        pl.Categorical,
+    ]
+
+
+def test_compact_model_matches_default_model(tmp_path):
+    original_file = _build_model().to_file(tmp_path / "original.lp")
+    ModelElementWithId.reset_counters()
+    pf.Config.coefficient_dtype = pl.Float32
+    pf.Config.integer_dimension_dtype = pl.Int8
+    pf.Config.encode_string_dimensions = True
+    compact_file = _build_model().to_file(tmp_path / "compact.lp")
+    assert original_file.read_text() == compact_file.read_text()
+
+
+def test_string_cache_is_only_enabled_through_config():
+    pl.disable_string_cache()
+    encoded = encode_dimensions(pl.DataFrame({"city": ["Toronto", "Berlin"]}))
+    assert encoded.schema["city"] == pl.Categorical
+    assert not pl.using_string_cache()
+
+    pf.Config.encode_string_dimensions = True
+    pf.Set(city=["Toronto", "Berlin"])
+    assert pl.using_string_cache()
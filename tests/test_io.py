@@ -1,7 +1,14 @@
+import gzip
+
+import gurobipy
 import pytest
 import polars as pl
 
+import pyoframe as pf
+import pyoframe.io
+from pyoframe.constants import PyoframeError
 from pyoframe.core import Expression, Variable
+from pyoframe.io_mappers import Base36Mapper
 
 
 @pytest.fixture
@@ -49,5 +56,156 @@ def test_expression_with_const_to_str():
     assert str(expr) == "2 x1 +5"
 
 
+@pytest.mark.parametrize("use_var_names", [True, False])
+def test_chunked_file_matches_unchunked_file(tmp_path, use_var_names):
+    m = pf.Model("min")
+    m.x = pf.Variable({"t": [3, 1, 2, 5, 4]}, {"k": ["a", "b"]}, lb=0, ub=10)
+    m.b = pf.Variable({"t": [1, 2, 3, 4, 5]}, vtype=pf.VType.BINARY)
+    m.i = pf.Variable({"t": [1, 2, 3, 4, 5]}, vtype=pf.VType.INTEGER)
+    m.y = pf.Variable({"t": [1, 2, 3, 4, 5]}, {"k": ["a", "b"]}, lb=0)
+    # Unsorted constraint (indices follow the order of x)
+    m.con_unsorted = pf.sum("k", m.x) + m.b <= 3
+    # Sorted constraint with several terms per index
+    m.con_sorted = pf.sum("k", m.y) - 2 * m.i >= -1
+    m.con_total = pf.sum(m.x) <= 20
+    m.objective = pf.sum(m.x) + pf.sum(m.b)
+
+    expected = m.to_file(tmp_path / "expected.lp", use_var_names=use_var_names)
+    for chunk_size in [1, 2, 3]:
+        result = m.to_file(
+            tmp_path / f"chunked_{chunk_size}.lp",
+            use_var_names=use_var_names,
+            chunk_size=chunk_size,
+        )
+        assert result.read_text() == expected.read_text()
+
+    # Chunks rendered concurrently are written in the same order
+    for max_workers in [1, 4]:
+        result = m.to_file(
+            tmp_path / f"parallel_{max_workers}.lp",
+            use_var_names=use_var_names,
+            chunk_size=2,
+            max_workers=max_workers,
+        )
+        assert result.read_text() == expected.read_text()
+
+
+def test_progress_is_reported_per_written_chunk(tmp_path, monkeypatch):
+    updates = []
+
+    class Progress(pyoframe.io.tqdm):
+        def update(self, n=1):
+            if self.desc == "Writing constraints to file":
+                updates.append(n)
+            return super().update(n)
+
+    monkeypatch.setattr(pyoframe.io, "tqdm", Progress)
+    m = pf.Model("min")
+    m.x = pf.Variable({"t": [1, 2, 3, 4, 5]})
+    m.con = m.x <= 1
+    m.con_total = pf.sum(m.x) <= 3
+    m.to_file(tmp_path / "model.lp", chunk_size=2, max_workers=2)
+    # One update per written chunk of constraints
+    assert updates == [2, 2, 1, 1]
+
+
+@pytest.mark.parametrize("use_var_names", [True, False])
+def test_mps_file_matches_lp_file(tmp_path, use_var_names):
+    m = pf.Model("min")
+    m.x = pf.Variable({"t": [1, 2, 3]}, lb=0, ub=10)
+    m.free = pf.Variable(lb=float("-inf"))
+    m.neg = pf.Variable({"t": [1, 2]}, lb=-5, ub=-1)
+    m.b = pf.Variable({"t": [1, 2]}, vtype=pf.VType.BINARY)
+    m.i = pf.Variable({"t": [1, 2]}, vtype=pf.VType.INTEGER, ub=7)
+    m.j = pf.Variable(vtype=pf.VType.INTEGER)
+    m.unused = pf.Variable(lb=2, ub=2)
+    m.con_x = pf.sum(m.x) >= 4.5
+    m.con_equal = m.x.filter(t=1) == 2
+    m.con_free = m.free >= -3
+    m.con_mixed = m.b + m.i + m.neg >= 2.5
+    m.con_j = m.j + 1 >= 2.5
+    m.objective = (
+        pf.sum(2 * m.x)
+        + m.free
+        + pf.sum(m.b)
+        + pf.sum(m.i)
+        + m.j
+        + pf.sum(m.neg)
+        - 7.25
+    )
+
+    results = []
+    for suffix in ["lp", "mps"]:
+        path = m.to_file(tmp_path / f"model.{suffix}", use_var_names=use_var_names)
+        solver_model = gurobipy.read(str(path))
+        solver_model.Params.OutputFlag = 0
+        solver_model.optimize()
+        results.append(
+            (
+                solver_model.ObjVal,
+                solver_model.NumConstrs,
+                solver_model.NumIntVars,
+                sorted((v.VarName, v.LB, v.UB, v.X) for v in solver_model.getVars()),
+            )
+        )
+    assert results[0] == results[1]
+
+
+def test_invalid_mps_names_are_rejected(tmp_path):
+    m = pf.Model("min")
+    m.x = pf.Variable({"city": ["Toronto", "New\tYork"]})
+    m.con = m.x >= 1
+    with pytest.raises(PyoframeError, match="names containing whitespace"):
+        m.to_file(tmp_path / "model.mps", use_var_names=True)
+    # Generated names are always valid
+    m.to_file(tmp_path / "model.mps")
+
+    m = pf.Model("min")
+    m.x = pf.Variable()
+    m.obj = m.x >= 1
+    with pytest.raises(PyoframeError, match="name of the objective's row"):
+        m.to_file(tmp_path / "model.mps", use_var_names=True)
+
+
+@pytest.mark.parametrize("suffix", [".lp", ".mps"])
+@pytest.mark.parametrize("compression", [".gz", ".zst"])
+def test_compressed_file_matches_uncompressed_file(tmp_path, suffix, compression):
+    if compression == ".zst":
+        zstandard = pytest.importorskip("zstandard")
+        decompress = zstandard.ZstdDecompressor().decompressobj().decompress
+    else:
+        decompress = gzip.decompress
+
+    m = pf.Model("min")
+    m.x = pf.Variable({"t": [1, 2, 3]}, lb=0, ub=10)
+    m.con = 2 * m.x >= 1
+    m.objective = pf.sum(m.x)
+
+    expected = m.to_file(tmp_path / f"model{suffix}").read_text()
+    for compression_level in [None, 1]:
+        result = m.to_file(
+            tmp_path / f"model{suffix}{compression}",
+            chunk_size=2,
+            compression_level=compression_level,
+        )
+        assert decompress(result.read_bytes()).decode() == expected
+
+
+def test_base36_names(monkeypatch):
+    def to_base36(i):
+        digits = ""
+        while True:
+            digits = "0123456789abcdefghijklmnopqrstuvwxyz"[i % 36] + digits
+            i //= 36
+            if i == 0:
+                return digits
+
+    ids = [0, 1, 35, 36, 1295, 1296, 36**5, 36**6 - 1, 36**6, 2**32 - 1, 7, 123456]
+    # Batches with different numbers of digits
+    monkeypatch.setattr(Base36Mapper, "_BATCH_SIZE", 3)
+    names = Base36Mapper._to_base36(pl.Series(ids, dtype=pl.UInt32), prefix="c")
+    assert names.to_list() == ["c" + to_base36(i) for i in ids]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
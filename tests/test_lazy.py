@@ -0,0 +1,77 @@
+import re
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+import pyoframe as pf
+from pyoframe.constants import PyoframeError
+from pyoframe.model_element import ModelElementWithId
+
+
+def _build_model():
+    plants = pl.DataFrame({"plant": [1, 2, 3], "capacity": [10, 20, 30]})
+    cost = pl.DataFrame(
+        {
+            "wharehouse": ["a", "a", "a", "b", "b", "b"],
+            "plant": [1, 2, 3, 1, 2, 3],
+            "cost": [1, 2, 3, 4, 5, 6],
+        }
+    )
+    demand = pl.DataFrame({"wharehouse": ["a", "b"], "demand": [5, 7]})
+
+    m = pf.Model("min")
+    m.open = pf.Variable(plants[["plant"]], vtype="binary")
+    m.transport = pf.Variable(demand[["wharehouse"]], plants[["plant"]], lb=0)
+    m.con_max_capacity = (
+        pf.sum("wharehouse", m.transport) <= plants[["plant", "capacity"]] * m.open
+    )
+    m.con_meet_demand = pf.sum("plant", m.transport) == demand
+    m.con_within = m.transport.to_expr().within(pl.DataFrame({"plant": [1]})) <= 3
+    m.objective = pf.sum(m.transport * cost) + pf.sum(m.open) + 2
+    return m
+
+
+def test_lazy_expressions_hold_lazyframes():
+    pf.Config.lazy_expressions = True
+    m = pf.Model("min")
+    m.x = pf.Variable(pf.Set(t=[1, 2, 3]))
+    expr = pf.sum("t", 2 * m.x)
+    assert isinstance(expr._data, pl.LazyFrame)
+    assert expr.dimensions is None
+    # Accessing the data collects the expression
+    assert isinstance(expr.data, pl.DataFrame)
+    assert isinstance(expr._data, pl.DataFrame)
+    assert str(expr) == "2 x[1] +2 x[2] +2 x[3]"
+
+
+@pytest.mark.parametrize("use_var_names", [True, False])
+def test_lazy_model_matches_eager_model(tmp_path, use_var_names):
+    eager_file = _build_model().to_file(
+        tmp_path / "eager.lp", use_var_names=use_var_names
+    )
+    ModelElementWithId.reset_counters()
+    pf.Config.lazy_expressions = True
+    lazy_file = _build_model().to_file(
+        tmp_path / "lazy.lp", use_var_names=use_var_names
+    )
+    assert eager_file.read_text() == lazy_file.read_text()
+
+
+def test_lazy_unmatched_checks():
+    pf.Config.lazy_expressions = True
+    expr1 = pl.DataFrame({"dim1": [1, 2], "value": [1, 2]}).to_expr()
+    expr2 = pl.DataFrame({"dim1": [1, 2, 3], "value": [3, 4, 5]}).to_expr()
+    with pytest.raises(
+        PyoframeError, match=re.escape("Dataframe has unmatched values")
+    ):
+        expr1 + expr2
+
+    result = expr1 + expr2.drop_unmatched()
+    assert isinstance(result._data, pl.LazyFrame)
+    assert_frame_equal(
+        result.data.select("dim1", "__coeff"),
+        pl.DataFrame({"dim1": [1, 2], "__coeff": [4.0, 6.0]}),
+    )
+    result = expr1 + expr2.keep_unmatched()
+    assert str(result) == "[1]: 4\n[2]: 6\n[3]: 5"
@@ -0,0 +1,229 @@
+import threading
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+import pyoframe as pf
+from pyoframe.constants import PyoframeError
+from pyoframe.model_element import ModelElementWithId
+
+
+def _build_model():
+    demand = pl.DataFrame({"city": ["B", "A", "C"], "demand": [4, 6, 2]})
+    m = pf.Model("min")
+    m.supply = pf.Variable({"plant": [1, 2]}, demand[["city"]], lb=0)
+    m.con_demand = pf.sum("plant", m.supply) >= demand
+    m.con_capacity = pf.sum("city", m.supply) + 1 <= 10
+    m.con_total = pf.sum(m.supply) <= 100
+    m.objective = pf.sum(m.supply * pl.DataFrame({"plant": [1, 2], "cost": [1, 2]}))
+    return m
+
+
+def test_frozen_model_is_unchanged(tmp_path):
+    expected = _build_model()
+    expected_file = expected.to_file(tmp_path / "expected.lp")
+    expected.solve(log_to_console=False)
+    ModelElementWithId.reset_counters()
+    m = _build_model().freeze()
+    assert m.con_demand._lhs is None
+    assert m.to_file(tmp_path / "frozen.lp").read_text() == expected_file.read_text()
+    assert str(m.con_capacity) == str(expected.con_capacity)
+
+    m.solve(log_to_console=False)
+    assert m.objective.value == expected.objective.value
+    assert_frame_equal(m.supply.solution, expected.supply.solution)
+    assert_frame_equal(m.con_demand.dual, expected.con_demand.dual)
+
+
+def test_frozen_model_is_written_from_term_store(tmp_path, monkeypatch):
+    expected = _build_model()
+    expected = {
+        suffix: expected.to_file(tmp_path / f"expected.{suffix}").read_text()
+        for suffix in ["lp", "mps"]
+    }
+    ModelElementWithId.reset_counters()
+    m = _build_model().freeze()
+
+    # Only the left hand side of dimensionless constraints (con_total) may be rebuilt (it's cheap)
+    lhs = pf.Constraint.lhs
+
+    def get_lhs(constraint):
+        if constraint._lhs is None and constraint.dimensions is not None:
+            raise AssertionError(f"Rebuilt the left hand side of {constraint.name}")
+        return lhs.fget(constraint)
+
+    monkeypatch.setattr(pf.Constraint, "lhs", property(get_lhs))
+    for suffix in ["lp", "mps"]:
+        for chunk_size in [1, 100]:
+            result = m.to_file(tmp_path / f"frozen.{suffix}", chunk_size=chunk_size)
+            assert result.read_text() == expected[suffix]
+
+
+def test_frozen_model_cannot_be_modified():
+    m = _build_model().freeze()
+    with pytest.raises(PyoframeError, match="frozen"):
+        m.extra = pf.Variable()
+    with pytest.raises(PyoframeError, match="frozen"):
+        m.objective += m.supply
+    with pytest.raises(PyoframeError, match="frozen"):
+        m.con_demand.relax(1)
+
+
+def test_memory_report():
+    m = _build_model()
+    report = m.memory_report()
+    assert report.height == 6
+    assert set(report.get_column("kind")) == {
+        "variable",
+        "constraint",
+        "objective",
+        "mapper",
+    }
+    assert report.get_column("bytes").is_sorted(descending=True, nulls_last=True)
+    assert m.memory_report(top=2).height == 2
+
+    m.solve(log_to_console=False)
+    report = m.memory_report()
+    assert {"const_map", "primal", "dual"} <= set(report.get_column("name"))
+
+    # Frozen constraints are reported from the model's term store
+    frozen_report = m.freeze().memory_report()
+    assert_frame_equal(
+        frozen_report.filter(kind="constraint").select("name", "terms").sort("name"),
+        report.filter(kind="constraint").select("name", "terms").sort("name"),
+    )
+
+
+def test_memory_report_computes_nothing():
+    m = _build_model()
+    m.objective += 2 * pf.sum(m.supply)
+    m.supply.to_expr()
+    before = m.memory_report().filter(name="supply").get_column("bytes").item()
+    m.supply._expr_data = None
+    after = m.memory_report().filter(name="supply").get_column("bytes").item()
+    # The variable's cached expression data is included
+    assert before > after
+    assert m.objective._pending is not None
+
+    pf.Config.lazy_expressions = True
+    try:
+        m.objective = 2 * pf.sum(m.supply)
+    finally:
+        pf.Config.lazy_expressions = False
+    report = m.memory_report()
+    assert report.filter(kind="objective").get_column("bytes").item() is None
+    assert report.get_column("bytes").is_sorted(descending=True, nulls_last=True)
+    assert isinstance(m.objective._data, pl.LazyFrame)
+
+
+def _build_model_in_parallel():
+    demand = pl.DataFrame({"city": ["B", "A", "C"], "demand": [4, 6, 2]})
+    m = pf.Model("min")
+    m.build(
+        max_workers=4,
+        supply=lambda: pf.Variable({"plant": [1, 2]}, demand[["city"]], lb=0),
+        con_demand=lambda supply: pf.sum("plant", supply) >= demand,
+        con_capacity=lambda supply: pf.sum("city", supply) + 1 <= 10,
+        con_total=lambda supply: pf.sum(supply) <= 100,
+        objective=lambda supply: pf.sum(
+            supply * pl.DataFrame({"plant": [1, 2], "cost": [1, 2]})
+        ),
+    )
+    return m
+
+
+@pytest.mark.parametrize("use_var_names", [True, False])
+def test_parallel_build_matches_sequential_build(tmp_path, use_var_names):
+    expected = (
+        _build_model()
+        .to_file(tmp_path / "expected.lp", use_var_names=use_var_names)
+        .read_text()
+    )
+    # IDs don't depend on the order in which the builders happen to run
+    for i in range(8):
+        ModelElementWithId.reset_counters()
+        m = _build_model_in_parallel()
+        result = m.to_file(tmp_path / f"parallel_{i}.lp", use_var_names=use_var_names)
+        assert result.read_text() == expected
+    assert [c.name for c in m.constraints] == [
+        "con_demand",
+        "con_capacity",
+        "con_total",
+    ]
+
+
+def test_builder_operations_are_attributed_to_their_element():
+    with pf.profile() as profiler:
+        _build_model_in_parallel()
+    events = profiler.to_frame().filter(pl.col("operation") != "Model.__setattr__")
+    assert set(events.filter(operation="Expression.sum").get_column("target")) == {
+        "con_demand",
+        "con_capacity",
+        "con_total",
+        "objective",
+    }
+    assert set(events.filter(operation="Constraint.__init__").get_column("target")) == {
+        "con_demand",
+        "con_capacity",
+        "con_total",
+    }
+
+
+def test_ids_are_unique_when_built_concurrently():
+    m = pf.Model("min")
+    m.build(
+        max_workers=8,
+        **{f"x{i}": (lambda: pf.Variable({"t": range(1000)})) for i in range(16)},
+    )
+    ids = pl.concat([v.data.select("__variable_id") for v in m.variables])
+    assert ids.n_unique() == ids.height == 16_000
+
+
+def test_independent_builders_run_concurrently():
+    # Each build only completes if the two builders calling `meet()` run at the same time
+    barrier = threading.Barrier(2, timeout=10)
+
+    def meet(element=None):
+        barrier.wait()
+        return element
+
+    def meet_then_add_variable():
+        meet()
+        return pf.Variable()
+
+    m = pf.Model("min")
+    m.build(
+        max_workers=2,
+        # A builder assigns its IDs while an earlier builder is still running
+        x=lambda: meet(pf.Variable({"t": [1, 2]})),
+        y=lambda: meet(pf.Variable({"t": [1, 2]})),
+    )
+    m.build(
+        max_workers=2,
+        # A builder doesn't wait for an earlier builder whose dependencies aren't built
+        a=lambda: meet(pf.Variable()),
+        b=lambda a: a + 1,
+        c=meet_then_add_variable,
+    )
+    assert [v.name for v in m.variables] == ["x", "y", "a", "c"]
+    assert m.c.data.get_column("__variable_id").to_list() == [6]
+
+
+def test_build_errors():
+    m = pf.Model("min")
+    with pytest.raises(PyoframeError, match="a -> b -> a"):
+        m.build(a=lambda b: b, b=lambda a: a)
+
+    def failing():
+        raise ValueError("builder failed")
+
+    with pytest.raises(ValueError, match="builder failed"):
+        m.build(x=lambda: pf.Variable(), y=failing)
+    assert not hasattr(m, "x")
+
+    # Builders waiting for the failed builder's turn don't assign IDs
+    with pytest.raises(ValueError, match="builder failed"):
+        m.build(fails=failing, x=lambda: pf.Variable({"t": range(10)}))
+    m.x = pf.Variable()
+    assert m.x.data.get_column("__variable_id").to_list() == [1]
@@ -0,0 +1,156 @@
+import polars as pl
+import pytest
+
+import pyoframe as pf
+from pyoframe.constants import PyoframeError
+from pyoframe._arithmetic import _get_dimensions
+
+
+def _assert_metadata_is_correct(element):
+    """Checks that the cached metadata (if known) matches what is computed from the data."""
+    data = element.data
+    metadata = element._metadata
+    assert element.dimensions == _get_dimensions(data)
+    if metadata.height is not None:
+        assert metadata.height == data.height
+    if metadata.shape is not None:
+        assert metadata.shape == {
+            dim: data[dim].n_unique() for dim in element.dimensions_unsafe
+        }
+    if metadata.size is not None:
+        dims = element.dimensions
+        assert metadata.size == (1 if dims is None else data.select(dims).n_unique())
+    if metadata.constant_only is not None:
+        assert metadata.constant_only == (data["__variable_id"] == 0).all()
+    if metadata.unique:
+        assert not data.select(element.dimensions_unsafe).is_duplicated().any()
+
+
+def test_metadata_is_propagated():
+    m = pf.Model("min")
+    m.x = pf.Variable(pf.Set(t=[1, 2, 3]), pf.Set(city=["A", "B"]))
+    costs = pl.DataFrame({"city": ["A", "B"], "cost": [1, 2]}).to_expr()
+
+    assert m.x._metadata.unique
+    assert len(m.x) == 6
+    assert m.x.shape == {"t": 3, "city": 2}
+
+    expr = 2 * m.x
+    # Known from the variable without looking at the data
+    assert expr._metadata.unique
+    assert expr._metadata.shape == {"t": 3, "city": 2}
+    assert expr._metadata.constant_only is False
+
+    assert costs._constant_only
+    scaled_costs = costs * 3
+    assert scaled_costs._metadata.constant_only
+    assert (scaled_costs + costs)._metadata.constant_only
+    assert pf.sum("city", scaled_costs)._metadata.constant_only
+    assert (scaled_costs * costs)._metadata.constant_only
+
+    constraint = expr + 1 <= costs * m.x
+    assert constraint._metadata.unique
+    assert len(constraint) == 6
+
+    for element in [
+        m.x,
+        expr,
+        expr + 1,
+        costs * m.x,
+        pf.sum("t", expr),
+        scaled_costs,
+        scaled_costs + costs,
+        constraint,
+        constraint.lhs,
+    ]:
+        element.shape, len(element), element._height
+        _assert_metadata_is_correct(element)
+
+
+def test_metadata_is_recomputed_after_polars_operations():
+    m = pf.Model("min")
+    m.x = pf.Variable(pf.Set(t=[1, 2, 3]))
+    expr = (m.x + 2).filter(t=1)
+    assert expr._metadata.size is None
+    assert len(expr) == 1
+    assert expr.shape == {"t": 1}
+    _assert_metadata_is_correct(expr)
+
+
+def test_empty_set_metadata():
+    s = pf.Set(x=[1, 2], y=[])
+    assert len(s) == 0
+    assert s.shape == {"x": 0, "y": 0}
+    _assert_metadata_is_correct(s)
+
+
+def test_index_tokens():
+    hours = pf.Set(pl.DataFrame({"hour": [3, 1, 2]}))
+    cities = pf.Set(city=["A", "B"])
+    m = pf.Model("min")
+    m.x = pf.Variable(hours, cities)
+    m.y = pf.Variable(cities, hours)
+    m.z = pf.Variable(pl.DataFrame({"hour": [3, 1, 4]}), cities)
+    m.w = pf.Variable(pl.DataFrame({"hour": [3, 1, 2]}), pf.Set(city=["A", "B"]))
+
+    token = m.x._metadata.index_token
+    assert token is not None
+    # Variables created over the same sets have the same indices
+    assert m.y._metadata.index_token == token
+    assert m.z._metadata.index_token != token
+    # Tokens are never derived from the content of the data, the indices are checked instead
+    assert m.w._metadata.index_token != token
+    assert (m.x + m.w)._metadata.index_token == token
+
+    assert (2 * m.x + m.y)._metadata.index_token == token
+    assert (
+        pf.sum("city", m.x)._metadata.index_token
+        == pf.sum("city", m.y)._metadata.index_token
+    )
+    assert pf.sum("city", m.x)._metadata.index_token != token
+    assert (
+        m.x.filter(hour=1)._metadata.index_token
+        == m.y.filter(hour=1)._metadata.index_token
+    )
+    assert m.x.filter(hour=1)._metadata.index_token != (
+        m.y.filter(hour=2)._metadata.index_token
+    )
+    assert m.x.filter(pl.col("hour") > 1)._metadata.index_token is None
+    x, z = m.x.to_expr(), m.z.to_expr()
+    assert (x.keep_unmatched() + z.keep_unmatched())._metadata.index_token is None
+    # Fresh expressions since keep_unmatched() modifies the expression
+    x, z = m.x.to_expr(), m.z.to_expr()
+    result = x.drop_unmatched() + z.keep_unmatched()
+    assert result._metadata.index_token == z._metadata.index_token
+
+    with pytest.raises(PyoframeError, match="unmatched values"):
+        m.x + m.z
+
+
+def test_variable_expression_data_is_reused():
+    m = pf.Model("min")
+    m.x = pf.Variable(pf.Set(t=[1, 2, 3]), lb=0)
+    expr = m.x.to_expr()
+    # Same data but independent expressions
+    assert m.x.to_expr().data is expr.data
+    assert m.x.to_expr() is not expr
+    expr.keep_unmatched()
+    assert m.x.to_expr().unmatched_strategy != expr.unmatched_strategy
+
+    m.objective = pf.sum(m.x)
+    m.solve(log_to_console=False)
+    # The variable's data changed (the solution was added) so the expression's data is recreated
+    assert m.x.to_expr().data is not expr.data
+    assert str(m.x.to_expr()) == str(expr)
+    _assert_metadata_is_correct(m.x.to_expr())
+
+
+def test_consistent_frames_are_not_copied():
+    m = pf.Model("min")
+    m.x = pf.Variable(pf.Set(t=[1, 2, 3]))
+    data = (2 * m.x).data
+    assert pf.Expression(data).data is data
+    reordered = pf.Expression(data.select("__variable_id", "__coeff", "t"))
+    assert reordered.data.columns == ["t", "__coeff", "__variable_id"]
+    casted = pf.Expression(data.with_columns(pl.col("__coeff").cast(pl.Int64)))
+    assert casted.data.schema["__coeff"] == pl.Float64
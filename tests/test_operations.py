@@ -3,6 +3,10 @@ from tests.util import csvs_to_expr
 import pytest
 import pyoframe as pf
 import re
+import polars as pl
+from datetime import datetime, timedelta
+from polars.testing import assert_frame_equal
+from pyoframe.constants import VAR_KEY, PyoframeError
 
 
 def test_sum():
@@ -49,3 +53,207 @@ def test_to_str():
         repr(expr)
         == "<Expression size=3 dimensions={'day': 3} terms=3>\n[1]: 2.00000000001\n[2]: 3\n[3]: 4"
     )
+
+
+@pytest.mark.parametrize(
+    "over",
+    [None, "plant", "wharehouse", "scenario", ["wharehouse", "scenario"], []],
+)
+def test_weighted_sum_matches_sum_of_product(over):
+    m = pf.Model("min")
+    m.transport = pf.Variable({"wharehouse": ["a", "b"]}, {"plant": [1, 2, 3]})
+    cost = csvs_to_expr(
+        """
+    plant,scenario,cost
+    1,low,1
+    1,high,2
+    2,low,3
+    2,high,4
+    3,low,5
+    3,high,6
+"""
+    )
+    product = m.transport * cost
+    all_dims = product.dimensions
+    expected = pf.sum(all_dims if over is None else over, product)
+    for result in [
+        pf.dot(m.transport, cost, over=over),
+        pf.dot(cost, m.transport, over=over),
+        m.transport.weighted_sum(cost, over),
+    ]:
+        assert result.dimensions == expected.dimensions
+        sort_by = (expected.dimensions or []) + [VAR_KEY]
+        assert_frame_equal(result.data.sort(sort_by), expected.data.sort(sort_by))
+
+
+def test_weighted_map():
+    m = pf.Model("min")
+    m.x = pf.Variable({"city": ["Toronto", "Vancouver", "Boston"]})
+    shares = csvs_to_expr(
+        """
+    city,country,share
+    Toronto,Canada,0.5
+    Toronto,USA,0.5
+    Vancouver,Canada,1
+    Boston,USA,1
+"""
+    )
+    assert (
+        str(m.x.map(shares))
+        == "[Canada]: 0.5 x[Toronto] + x[Vancouver]\n[USA]: 0.5 x[Toronto] + x[Boston]"
+    )
+    mapping = shares.data.select("city", "country")
+    assert str(m.x.map(mapping)) == (
+        "[Canada]: x[Toronto] + x[Vancouver]\n[USA]: x[Toronto] + x[Boston]"
+    )
+
+
+def test_rolling_sum_matches_naive_windows():
+    m = pf.Model("min")
+    # Unsorted, with a gap in time and a different horizon per item
+    index = pl.DataFrame({"item": [2, 1, 1, 2, 1, 1], "time": [2, 5, 1, 1, 2, 3]})
+    m.x = pf.Variable(index)
+    m.y = pf.Variable(index)
+    expr = 2 * m.x + m.y.drop_unmatched() + 1
+    window_size, weights = 3, [1, 0.5, 0.25]
+
+    result = expr.rolling_sum("time", window_size, weights)
+
+    terms = expr.data
+    expected = []
+    for item, time in index.iter_rows():
+        for lag, weight in enumerate(weights):
+            expected.append(
+                terms.filter(item=item, time=time - lag).with_columns(
+                    time=pl.lit(time, pl.Int64), __coeff=pl.col("__coeff") * weight
+                )
+            )
+    expected = (
+        pl.concat(expected)
+        .group_by(["item", "time", VAR_KEY])
+        .agg(pl.col("__coeff").sum())
+    )
+    sort_by = ["item", "time", VAR_KEY]
+    assert_frame_equal(
+        result.data.sort(sort_by), expected.select(result.data.columns).sort(sort_by)
+    )
+
+
+def test_rolling_sum_non_integer_dimension():
+    m = pf.Model("min")
+    days = pl.Series("day", ["2024-01-01", "2024-01-03", "2024-01-02"]).str.to_date()
+    m.x = pf.Variable(days.to_frame())
+    assert str(m.x.rolling_sum("day", 2)) == (
+        "[2024-01-01]: x[2024-01-01]\n"
+        "[2024-01-02]: x[2024-01-01] + x[2024-01-02]\n"
+        "[2024-01-03]: x[2024-01-02] + x[2024-01-03]"
+    )
+    with pytest.raises(AssertionError, match="window size of at least 1"):
+        m.x.rolling_sum("day", 0)
+
+
+def test_rolling_sum_without_current_value():
+    m = pf.Model("min")
+    m.x = pf.Variable({"t": [1, 2, 3]})
+    lagged = m.x.rolling_sum("t", window_size=2, weights=[0, 1])
+    assert str(lagged) == "[2]: x[1]\n[3]: x[2]"
+    # The first index is dropped so the result must not be aligned with x as is
+    with pytest.raises(PyoframeError, match="unmatched"):
+        lagged + m.x
+    assert str(lagged + m.x.keep_unmatched()) == (
+        "[1]: x[1]\n[2]: x[2] + x[1]\n[3]: x[3] + x[2]"
+    )
+    with pytest.raises(AssertionError, match="at least one non-zero weight"):
+        m.x.rolling_sum("t", window_size=2, weights=[0, 0])
+
+
+def test_shift_matches_next():
+    m = pf.Model("min")
+    m.x = pf.Variable({"time": ["00:00", "06:00", "12:00"]}, {"city": ["A", "B"]})
+    for wrap_around in [True, False]:
+        expected = m.x.next("time", wrap_around=wrap_around)
+        result = m.x.shift("time", -1, wrap_around=wrap_around)
+        sort_by = ["time", "city"]
+        assert_frame_equal(
+            result.data.sort(sort_by),
+            expected.data.select(result.data.columns).sort(sort_by),
+        )
+    assert str(m.x.shift("time", 2, wrap_around=True).filter(city="A")) == (
+        "[00:00,A]: x[06:00,A]\n[06:00,A]: x[12:00,A]\n[12:00,A]: x[00:00,A]"
+    )
+
+
+def test_shift_within_groups():
+    m = pf.Model("min")
+    # Item 2 has no time 3, so time 4 of item 2 can't be shifted to
+    index = pl.DataFrame({"item": [1, 1, 1, 1, 2, 2, 2], "time": [1, 2, 3, 4, 1, 2, 4]})
+    m.x = pf.Variable(index)
+    expr = 2 * m.x + 1
+    assert str(expr.shift("time", 1, fill=5)) == (
+        "[1,1]: 5\n"
+        "[1,2]: 1  +2 x[1,1]\n"
+        "[1,3]: 1  +2 x[1,2]\n"
+        "[1,4]: 1  +2 x[1,3]\n"
+        "[2,1]: 5\n"
+        "[2,2]: 1  +2 x[2,1]\n"
+        "[2,4]: 5"
+    )
+    assert str(m.x.shift("time", 2).filter(item=1)) == "[1,3]: x[1,1]\n[1,4]: x[1,2]"
+
+
+def test_shift_by_timedelta():
+    m = pf.Model("min")
+    hours = pl.datetime_range(
+        datetime(2024, 1, 1), datetime(2024, 1, 1, 3), "1h", eager=True
+    )
+    m.x = pf.Variable(hours.alias("hour").to_frame())
+    result = m.x.shift("hour", timedelta(hours=2))
+    assert str(result) == (
+        "[2024-01-01_02:00:00.000000]: x[2024-01-01_00:00:00.000000]\n"
+        "[2024-01-01_03:00:00.000000]: x[2024-01-01_01:00:00.000000]"
+    )
+    with pytest.raises(ValueError, match="wrap_around is not supported"):
+        m.x.shift("hour", timedelta(hours=2), wrap_around=True)
+
+
+def test_constant_terms():
+    m = pf.Model("min")
+    m.x = pf.Variable({"t": [1, 2, 3]}, {"city": ["A", "B"]})
+    costs = pl.DataFrame(
+        {"t": [1, 1, 3], "city": ["A", "B", "B"], "cost": [4.0, 5.0, 6.0]}
+    ).to_expr()
+    expected = pl.DataFrame(
+        {
+            "t": [1, 1, 2, 2, 3, 3],
+            "city": ["A", "B"] * 3,
+            "__coeff": [4.0, 5.0, 0.0, 0.0, 0.0, 6.0],
+        }
+    )
+    shuffled = m.x.to_expr()
+    shuffled = pf.Expression(shuffled.data.sample(fraction=1, shuffle=True, seed=1))
+    for expr in [m.x.to_expr(), shuffled, 2 * m.x + m.x.next("t", wrap_around=True)]:
+        # Constant-less expressions have a zero constant everywhere
+        assert_frame_equal(
+            expr.constant_terms,
+            expected.with_columns(pl.lit(0.0).alias("__coeff")),
+            check_row_order=False,
+        )
+        expr = expr.keep_unmatched() + costs
+        assert_frame_equal(expr.constant_terms, expected, check_row_order=False)
+        assert_frame_equal(
+            (expr + 1).constant_terms,
+            expected.with_columns(pl.col("__coeff") + 1),
+            check_row_order=False,
+        )
+    assert pf.sum(m.x).constant_terms["__coeff"].item() == 0
+    assert pf.sum(m.x + 3).constant_terms["__coeff"].item() == 18
+
+
+def test_constraint_to_str_is_sorted_and_includes_constants():
+    m = pf.Model("min")
+    m.x = pf.Variable({"t": [1, 2, 3]})
+    shuffled = m.x.to_expr()
+    shuffled = shuffled._new(shuffled.data.reverse())
+    for lhs in [m.x.to_expr(), shuffled]:
+        constraint = lhs.keep_unmatched() + pl.DataFrame({"t": [2], "c": [4]}) <= 1
+        assert constraint.to_str() == "[1]: x[1] <= 1\n[2]: x[2] <= -3\n[3]: x[3] <= 1"
@@ -0,0 +1,70 @@
+import json
+
+import polars as pl
+import pytest
+
+import pyoframe as pf
+
+
+def test_operations_are_attributed_to_model_attributes(tmp_path):
+    with pf.profile() as profiler:
+        m = pf.Model("min")
+        m.x = pf.Variable({"t": [1, 2, 3]}, lb=0)
+        m.y = pf.Variable({"t": [1, 2, 3]}, lb=0)
+        m.con = pf.sum("t", 2 * m.x + m.y) >= 1
+        m.objective = pf.sum(m.x)
+        m.to_file(tmp_path / "model.lp")
+
+    events = profiler.to_frame()
+    con_events = events.filter(target="con")
+    assert set(con_events.get_column("operation")) == {
+        "Expression.__mul__",
+        "Expression.__add__",
+        "Expression.sum",
+        "Constraint.__init__",
+        "Model.__setattr__",
+    }
+    assert con_events.get_column("location").str.contains("test_profiling.py").all()
+    assert (
+        con_events.filter(operation="Expression.sum").get_column("rows_in").item() == 6
+    )
+    assert "to_file" in events.filter(pl.col("target").is_null())["operation"]
+
+    # Nested operations aren't counted twice
+    summary = profiler.summary()
+    top_level = events.filter(depth=0).get_column("duration").sum()
+    assert summary.get_column("time").sum() == pytest.approx(top_level)
+
+
+def test_chrome_trace_export(tmp_path):
+    with pf.profile() as profiler:
+        m = pf.Model("min")
+        m.x = pf.Variable({"t": [1, 2, 3]})
+        m.con = m.x <= 1
+    trace = json.loads(profiler.to_chrome_trace(tmp_path / "trace.json").read_text())
+    events = trace["traceEvents"]
+    assert len(events) == len(profiler.events)
+    assert {e["ph"] for e in events} == {"X"}
+    assert {e["args"]["target"] for e in events} == {"x", "con"}
+
+
+def test_nothing_is_recorded_outside_of_profile():
+    with pf.profile() as profiler:
+        pass
+    m = pf.Model("min")
+    m.x = pf.Variable({"t": [1, 2, 3]})
+    m.con = m.x <= 1
+    assert profiler.events == []
+
+
+def test_peak_memory_increase_is_measured_per_operation(monkeypatch):
+    # The process's peak memory never goes down: adding y stays below the peak reached while adding x
+    peaks = iter([100, 300, 300, 300])
+    monkeypatch.setattr(pf.profiling, "_peak_memory", lambda: next(peaks))
+    with pf.profile() as profiler:
+        m = pf.Model("min")
+        m.x = pf.Variable()
+        m.y = pf.Variable()
+    events = profiler.to_frame()
+    assert events.get_column("target").to_list() == ["x", "y"]
+    assert events.get_column("peak_memory_increase").to_list() == [200, 0]